@@ -1,25 +1,373 @@
 
-from flask import Flask, render_template_string, send_from_directory
+from flask import Flask, Response, abort, render_template_string, request, send_from_directory
+import argparse
+import base64
+import gzip
+import hashlib
+import multiprocessing
 import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from build_static import (
+    DIST_DIR, IMMUTABLE_CACHE_CONTROL, MANIFEST_NAME, S3_BUCKET_PLACEHOLDER, SITE_ASSETS, SOURCE_DIR,
+    load_manifest
+)
 
 app = Flask(__name__)
 
+# Compiled site from build_static.py, if it has been built
+MANIFEST = load_manifest()
+FINGERPRINTED_FILES = {
+    asset['path'] for asset in (MANIFEST or {}).get('files', {}).values() if asset['immutable']
+}
+
+# Production mode (APP_ENV=production or --production): the site is preloaded
+# into memory and nothing else in the repo directory is served
+PRODUCTION = os.environ.get('APP_ENV') == 'production'
+SITE_CACHE = None
+HTML_CACHE_CONTROL = 'no-cache'
+ASSET_CACHE_CONTROL = 'public, max-age=300'
+MIN_COMPRESS_BYTES = 256
+WATCH_INTERVAL = 1.0
+
+def build_site_entry(body, content_type, cache_control, last_modified):
+    """Precompute the identity and compressed variants of one site file"""
+    
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    # Each encoding gets its own strong ETag
+    variants = {'identity': (body, digest)}
+    if len(body) >= MIN_COMPRESS_BYTES:
+        variants['gzip'] = (gzip.compress(body, 9, mtime=0), digest + '-gz')
+        if brotli is not None:
+            variants['br'] = (brotli.compress(body), digest + '-br')
+    return {
+        'content_type': content_type,
+        'cache_control': cache_control,
+        'last_modified': last_modified,
+        'variants': variants
+    }
+
+def load_site():
+    """Read the site into memory, returning (entries by URL path, files to watch)"""
+    
+    manifest = load_manifest()
+    files = {}
+    if manifest:
+        for name, asset in manifest['files'].items():
+            path = os.path.join(DIST_DIR, asset['path'])
+            content_type = asset['contentType']
+            if asset['immutable']:
+                files['/' + asset['path']] = (path, content_type, IMMUTABLE_CACHE_CONTROL)
+            # Unhashed names still resolve, for pages cached before a deploy
+            cache_control = HTML_CACHE_CONTROL if content_type == 'text/html' else ASSET_CACHE_CONTROL
+            files['/' + name] = (path, content_type, cache_control)
+    else:
+        for name, content_type in SITE_ASSETS.items():
+            cache_control = HTML_CACHE_CONTROL if content_type == 'text/html' else ASSET_CACHE_CONTROL
+            files['/' + name] = (os.path.join(SOURCE_DIR, name), content_type, cache_control)
+    files['/'] = files['/index.html']
+    
+    entries = {}
+    for url_path, (path, content_type, cache_control) in files.items():
+        with open(path, 'rb') as f:
+            body = f.read()
+        if manifest and content_type == 'text/html':
+            # Same bucket default as the frontend Lambda
+            bucket = os.environ.get('S3_BUCKET', 'poli-notary-assets')
+            body = body.replace(S3_BUCKET_PLACEHOLDER.encode('ascii'), bucket.encode('utf-8'))
+        entries[url_path] = build_site_entry(body, content_type, cache_control, os.path.getmtime(path))
+    
+    watched = {path for path, _, _ in files.values()}
+    watched.add(os.path.join(DIST_DIR, MANIFEST_NAME))
+    watched.update(os.path.join(SOURCE_DIR, name) for name in SITE_ASSETS)
+    return entries, sorted(watched)
+
+class SiteCache:
+    """Site files held in memory, optionally reloaded when they change on disk"""
+    
+    def __init__(self):
+        self.entries, self.watched = load_site()
+        self.mtimes = self.snapshot()
+    
+    def get(self, path):
+        return self.entries.get(path)
+    
+    def snapshot(self):
+        """Modification times of the watched files (None for missing ones)"""
+        
+        mtimes = {}
+        for path in self.watched:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+    
+    def watch(self, interval=WATCH_INTERVAL):
+        """Poll the watched files from a background thread and reload on change"""
+        
+        thread = threading.Thread(target=self.poll, args=(interval,), daemon=True)
+        thread.start()
+        return thread
+    
+    def poll(self, interval):
+        while True:
+            time.sleep(interval)
+            if self.snapshot() == self.mtimes:
+                continue
+            try:
+                entries, watched = load_site()
+            except (OSError, ValueError, KeyError) as e:
+                # Usually a build still writing files; retry on the next tick
+                print(f"Error reloading site assets: {str(e)}")
+                continue
+            # Swapping the dict reference is atomic, so requests never see a partial reload
+            self.entries, self.watched = entries, watched
+            self.mtimes = self.snapshot()
+            print(f"♻️  Reloaded {len(entries)} site assets")
+
+def serve_cached(path):
+    """Serve a preloaded file, negotiating encoding and honouring conditional requests"""
+    
+    entry = SITE_CACHE.get(path)
+    if entry is None:
+        abort(404)
+    
+    variants = entry['variants']
+    encoding = 'identity'
+    for candidate in ('br', 'gzip'):
+        if candidate in variants and request.accept_encodings[candidate] > 0:
+            encoding = candidate
+            break
+    body, etag = variants[encoding]
+    
+    response = Response(body, mimetype=entry['content_type'])
+    response.set_etag(etag)
+    response.last_modified = entry['last_modified']
+    response.headers['Cache-Control'] = entry['cache_control']
+    if len(variants) > 1:
+        response.vary.add('Accept-Encoding')
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    # Turns matching If-None-Match / If-Modified-Since requests into 304s
+    return response.make_conditional(request)
+
+def enable_production_mode(watch=False):
+    """Preload the site into memory and serve only from there"""
+    
+    global SITE_CACHE
+    SITE_CACHE = SiteCache()
+    if watch:
+        SITE_CACHE.watch()
+
+if PRODUCTION:
+    enable_production_mode(watch=os.environ.get('WATCH_ASSETS') == '1')
+
+# Emulator mode (--emulate or APP_ENV=emulator): every request is turned into
+# an API Gateway proxy event and handled in-process by the Lambda code, with
+# DynamoDB, SES and S3 replaced by the in-memory stand-ins from local_aws.py
+EMULATE = os.environ.get('APP_ENV') == 'emulator'
+LAMBDA_DIR = os.path.join(SOURCE_DIR, 'lambda_functions')
+LAMBDA_HANDLERS = None
+LambdaContext = None
+# Bearer token for the admin export/import endpoints unless ADMIN_TOKEN_SHA256 is set
+EMULATOR_ADMIN_TOKEN = 'local-admin'
+
+def enable_emulator(rate_limits=True, echo_email=True, assets_dir=SOURCE_DIR):
+    """Load both Lambdas in-process against in-memory AWS services"""
+    
+    global LAMBDA_HANDLERS, LambdaContext
+    
+    # The same environment main.tf gives the functions; emails are sent inline
+    # because there is no DynamoDB stream worker locally
+    os.environ.setdefault('DYNAMODB_TABLE', 'contact-submissions')
+    os.environ.setdefault('IDEMPOTENCY_TABLE', 'idempotency-keys')
+    if rate_limits:
+        os.environ.setdefault('RATE_LIMIT_TABLE', 'rate-limits')
+    os.environ.setdefault('EMAIL_DISPATCH', 'inline')
+    os.environ.setdefault('S3_BUCKET', 'local-static-assets')
+    os.environ.setdefault('EXPORT_BUCKET', 'local-exports')
+    os.environ.setdefault('ADMIN_TOKEN_SHA256', hashlib.sha256(EMULATOR_ADMIN_TOKEN.encode('utf-8')).hexdigest())
+    
+    sys.path.insert(0, LAMBDA_DIR)
+    import backend
+    import frontend
+    import local_aws
+    
+    LambdaContext = local_aws.LambdaContext
+    local_aws.install(backend, frontend, echo_email=echo_email, buckets={
+        os.environ['S3_BUCKET']: assets_dir,
+        os.environ['EXPORT_BUCKET']: tempfile.mkdtemp(prefix='poli-notary-exports-')
+    })
+    LAMBDA_HANDLERS = {
+        'frontend': frontend.lambda_handler,
+        'backend': backend.lambda_handler
+    }
+
+def build_proxy_event(req):
+    """Translate a Flask request into an API Gateway REST proxy event"""
+    
+    headers = {}
+    multi_value_headers = {}
+    for name, value in req.headers.items():
+        headers[name] = value
+        multi_value_headers.setdefault(name, []).append(value)
+    query = {name: values[-1] for name, values in req.args.lists()}
+    body = req.get_data()
+    
+    return {
+        'resource': '/{proxy+}',
+        'path': req.path,
+        'httpMethod': req.method,
+        'headers': headers,
+        'multiValueHeaders': multi_value_headers,
+        'queryStringParameters': query or None,
+        'multiValueQueryStringParameters': req.args.to_dict(flat=False) or None,
+        'pathParameters': {'proxy': req.path.lstrip('/')} if req.path != '/' else None,
+        'stageVariables': None,
+        'requestContext': {
+            'requestId': str(uuid.uuid4()),
+            'stage': 'local',
+            'httpMethod': req.method,
+            'path': req.path,
+            'requestTimeEpoch': int(time.time() * 1000),
+            'identity': {'sourceIp': req.remote_addr, 'userAgent': req.user_agent.string}
+        },
+        # binary_media_types = ["*/*"] makes API Gateway base64-encode every body
+        'body': base64.b64encode(body).decode('ascii') if body else None,
+        'isBase64Encoded': bool(body)
+    }
+
+def build_flask_response(result):
+    """Translate a Lambda proxy result into a Flask response"""
+    
+    body = result.get('body') or ''
+    if result.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    
+    # API Gateway's default when the function sets no Content-Type
+    response = Response(body, status=result.get('statusCode', 200), content_type='application/json')
+    for name, value in (result.get('headers') or {}).items():
+        response.headers[name] = str(value)
+    for name, values in (result.get('multiValueHeaders') or {}).items():
+        for value in values:
+            response.headers.add(name, str(value))
+    return response
+
+@app.before_request
+def emulate_api_gateway():
+    if LAMBDA_HANDLERS is None:
+        return None
+    # /api/* goes to the backend function, everything else to the frontend
+    function = 'backend' if request.path.startswith('/api/') else 'frontend'
+    result = LAMBDA_HANDLERS[function](build_proxy_event(request), LambdaContext(function))
+    return build_flask_response(result)
+
+if EMULATE:
+    enable_emulator(rate_limits=os.environ.get('RATE_LIMITS', '1') == '1')
+
 @app.route('/')
 def index():
+    if SITE_CACHE:
+        return serve_cached('/')
+    if MANIFEST:
+        return send_from_directory(DIST_DIR, 'index.html', mimetype='text/html')
     with open('index.html', 'r') as f:
         return f.read()
 
 @app.route('/styles.css')
 def styles():
+    if SITE_CACHE:
+        return serve_cached('/styles.css')
     return send_from_directory('.', 'styles.css', mimetype='text/css')
 
 @app.route('/script.js')
 def script():
+    if SITE_CACHE:
+        return serve_cached('/script.js')
     return send_from_directory('.', 'script.js', mimetype='application/javascript')
 
 @app.route('/<path:filename>')
 def static_files(filename):
+    if SITE_CACHE:
+        return serve_cached('/' + filename)
+    if filename in FINGERPRINTED_FILES:
+        response = send_from_directory(DIST_DIR, filename)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
     return send_from_directory('.', filename)
 
+def run_production(host, port, workers, watch):
+    """Serve the app with gunicorn (pre-forked workers), or waitress where gunicorn is unavailable"""
+    
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+    
+    if BaseApplication is not None:
+        class ProductionServer(BaseApplication):
+            def load_config(self):
+                self.cfg.set('bind', f"{host}:{port}")
+                self.cfg.set('workers', workers)
+                self.cfg.set('worker_class', 'gthread')
+                self.cfg.set('threads', 4)
+                self.cfg.set('keepalive', 5)
+                # The cache is built once in the master and shared copy-on-write;
+                # watcher threads don't survive fork, so each worker starts its own
+                if watch:
+                    self.cfg.set('post_fork', lambda server, worker: SITE_CACHE.watch())
+            
+            def load(self):
+                return app
+        
+        ProductionServer().run()
+        return
+    
+    try:
+        from waitress import serve
+    except ImportError:
+        print("❌ Production mode needs a WSGI server: pip install gunicorn (or waitress on Windows)")
+        sys.exit(1)
+    if watch:
+        SITE_CACHE.watch()
+    serve(app, host=host, port=port, threads=workers * 4)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    parser = argparse.ArgumentParser(description='Poli Notary local server')
+    parser.add_argument('--production', action='store_true', default=PRODUCTION,
+                        help='Serve preloaded assets from memory under a multi-worker WSGI server')
+    parser.add_argument('--watch', action='store_true', help='Reload preloaded assets when they change')
+    parser.add_argument('--emulate', action='store_true', default=EMULATE,
+                        help='Serve through the frontend and backend Lambdas with in-memory AWS services')
+    parser.add_argument('--no-rate-limits', action='store_true',
+                        help='Disable per-client rate limits in the emulator (for load tests)')
+    parser.add_argument('--assets-dir', default=SOURCE_DIR, help='Directory the emulator serves /assets/* from')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count() * 2 + 1)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+    
+    if args.emulate and LAMBDA_HANDLERS is None:
+        enable_emulator(rate_limits=not args.no_rate_limits, assets_dir=args.assets_dir)
+    if args.emulate and args.production and args.workers > 1:
+        # Each worker process would get its own in-memory tables
+        print("ℹ️  Emulator state is per process; running one worker with threads")
+        args.workers = 1
+    
+    if args.production:
+        # Built here rather than per worker, so it is loaded once before forking
+        if SITE_CACHE is None:
+            enable_production_mode()
+        run_production(args.host, args.port, args.workers, args.watch)
+    else:
+        app.run(host=args.host, port=args.port, debug=True)
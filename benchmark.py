@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Poli Notary Lambda handlers
+This script replays a weighted mix of API Gateway events against the frontend
+and backend handlers with in-memory AWS stand-ins, reports throughput, latency
+percentiles, allocations and cold-vs-warm timings, and saves the results so
+runs on different commits can be compared
+"""
+
+import argparse
+import base64
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(SOURCE_DIR, 'lambda_functions')
+RESULTS_DIR = os.path.join(SOURCE_DIR, 'benchmark_results')
+
+# Admin reads need the bearer token whose hash the backend is configured with
+BENCHMARK_ADMIN_TOKEN = 'benchmark-admin'
+ADMIN_HEADERS = {'Authorization': f"Bearer {BENCHMARK_ADMIN_TOKEN}"}
+
+# The environment main.tf gives the backend; emails leave through the stream worker
+LAMBDA_ENVIRONMENT = {
+    'DYNAMODB_TABLE': 'contact-submissions',
+    'IDEMPOTENCY_TABLE': 'idempotency-keys',
+    'RATE_LIMIT_TABLE': 'rate-limits',
+    'EMAIL_DISPATCH': 'stream',
+    'EXPORT_BUCKET': 'local-exports',
+    'S3_BUCKET': 'local-static-assets',
+    'ADMIN_TOKEN_SHA256': hashlib.sha256(BENCHMARK_ADMIN_TOKEN.encode('utf-8')).hexdigest()
+}
+
+# Scenario -> share of the replayed traffic
+DEFAULT_MIX = {
+    'page': 25,
+    'page_revalidate': 10,
+    'css': 12,
+    'js': 12,
+    'options': 6,
+    'contact_post': 15,
+    'admin_list': 8,
+    'admin_recent': 6,
+    'admin_get': 6
+}
+
+SEED_SUBMISSIONS = 500
+SERVICE_TYPES = ('standard', 'mobile', 'real-estate', 'business', 'other')
+BROWSER_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate, br',
+    'User-Agent': 'Mozilla/5.0 (benchmark)'
+}
+
+def api_event(method, path, headers=None, query=None, body=None, source_ip='203.0.113.10'):
+    """Build an API Gateway REST proxy event the way binary_media_types = */* delivers it"""
+    
+    return {
+        'resource': '/{proxy+}',
+        'path': path,
+        'httpMethod': method,
+        'headers': dict(headers or {}),
+        'queryStringParameters': query,
+        'pathParameters': {'proxy': path.lstrip('/')},
+        'requestContext': {
+            'requestId': f"bench-{random.getrandbits(64):016x}",
+            'stage': 'bench',
+            'identity': {'sourceIp': source_ip}
+        },
+        'body': base64.b64encode(body.encode('utf-8')).decode('ascii') if body else None,
+        'isBase64Encoded': bool(body)
+    }
+
+def contact_body(rng, index):
+    return json.dumps({
+        'fullName': f"Client {index}",
+        'email': f"client{index}@example.com",
+        'phone': f"(555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        'serviceType': rng.choice(SERVICE_TYPES),
+        'preferredDate': '2030-01-15',
+        'preferredTime': rng.choice(('morning', 'afternoon', 'evening')),
+        'additionalDetails': 'Two documents, one signer.'
+    })
+
+class Workload:
+    """Event factories for every scenario, sharing state like ETags and stored IDs"""
+    
+    def __init__(self, rng, page_etag, submission_ids):
+        self.rng = rng
+        self.page_etag = page_etag
+        self.submission_ids = submission_ids
+        self.counter = 0
+    
+    def build(self, scenario):
+        """Return (function name, event) for one request of a scenario"""
+        
+        rng = self.rng
+        if scenario == 'page':
+            return 'frontend', api_event('GET', '/', BROWSER_HEADERS)
+        if scenario == 'page_revalidate':
+            return 'frontend', api_event('GET', '/', {**BROWSER_HEADERS, 'If-None-Match': self.page_etag})
+        if scenario == 'css':
+            return 'frontend', api_event('GET', '/styles.css', BROWSER_HEADERS)
+        if scenario == 'js':
+            return 'frontend', api_event('GET', '/script.js', BROWSER_HEADERS)
+        if scenario == 'options':
+            return 'backend', api_event('OPTIONS', '/api/contact', {'Origin': 'https://example.com'})
+        if scenario == 'contact_post':
+            # A distinct client each time, so rate limits and idempotency keys never collide
+            self.counter += 1
+            source_ip = f"198.51.{self.counter // 250 % 250}.{self.counter % 250}"
+            return 'backend', api_event(
+                'POST', '/api/contact', {'Content-Type': 'application/json'},
+                body=contact_body(rng, f"bench-{self.counter}"), source_ip=source_ip
+            )
+        if scenario == 'admin_list':
+            return 'backend', api_event('GET', '/api/contact', ADMIN_HEADERS, query={'limit': '25'})
+        if scenario == 'admin_recent':
+            return 'backend', api_event('GET', '/api/contact', ADMIN_HEADERS, query={'days': '7', 'limit': '25'})
+        if scenario == 'admin_get':
+            submission_id = rng.choice(self.submission_ids)
+            return 'backend', api_event('GET', f"/api/contact/{submission_id}", ADMIN_HEADERS)
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+def load_handlers():
+    """Import both Lambdas in-process against fresh in-memory AWS services"""
+    
+    for name, value in LAMBDA_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    if LAMBDA_DIR not in sys.path:
+        sys.path.insert(0, LAMBDA_DIR)
+    with quiet():
+        import backend
+        import frontend
+    import local_aws
+    
+    services = local_aws.install(backend, frontend, buckets={
+        os.environ['S3_BUCKET']: SOURCE_DIR,
+        os.environ['EXPORT_BUCKET']: os.path.join(RESULTS_DIR, 'exports')
+    })
+    return {'frontend': frontend.lambda_handler, 'backend': backend.lambda_handler}, services, local_aws
+
+@contextlib.contextmanager
+def quiet():
+    """Send the handlers' log lines to /dev/null while measuring"""
+    
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def seed_submissions(handlers, local_aws, count, rng):
+    """Store submissions through the real POST path so the admin reads have data"""
+    
+    ids = []
+    with quiet():
+        for index in range(count):
+            event = api_event(
+                'POST', '/api/contact', body=contact_body(rng, f"seed-{index}"),
+                source_ip=f"192.0.2.{index % 250}"
+            )
+            result = handlers['backend'](event, local_aws.LambdaContext('backend'))
+            ids.append(json.loads(result['body'])['id'])
+    return ids
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(samples_ns):
+    values = sorted(samples_ns)
+    total_seconds = sum(values) / 1e9
+    return {
+        'count': len(values),
+        'throughput_rps': round(len(values) / total_seconds, 1) if total_seconds else 0.0,
+        'mean_ms': round(statistics.fmean(values) / 1e6, 4) if values else 0.0,
+        'p50_ms': round(percentile(values, 0.50) / 1e6, 4),
+        'p95_ms': round(percentile(values, 0.95) / 1e6, 4),
+        'p99_ms': round(percentile(values, 0.99) / 1e6, 4)
+    }
+
+def run_warm(handlers, local_aws, workload, scenarios, weights, requests, warmup):
+    """Replay the event mix, timing each invocation; returns per-scenario and overall stats"""
+    
+    samples = {scenario: [] for scenario in scenarios}
+    plan = workload.rng.choices(scenarios, weights=weights, k=warmup + requests)
+    events = [(scenario,) + workload.build(scenario) for scenario in plan]
+    
+    with quiet():
+        for scenario, function, event in events[:warmup]:
+            handlers[function](event, local_aws.LambdaContext(function))
+        
+        started = time.perf_counter_ns()
+        for scenario, function, event in events[warmup:]:
+            context = local_aws.LambdaContext(function)
+            handler = handlers[function]
+            begin = time.perf_counter_ns()
+            handler(event, context)
+            samples[scenario].append(time.perf_counter_ns() - begin)
+        elapsed_ns = time.perf_counter_ns() - started
+    
+    overall = summarize([sample for values in samples.values() for sample in values])
+    # Wall-clock throughput also counts event-loop overhead between invocations
+    overall['wall_throughput_rps'] = round(requests / (elapsed_ns / 1e9), 1)
+    return {scenario: summarize(values) for scenario, values in samples.items() if values}, overall
+
+def run_allocations(handlers, local_aws, workload, scenarios, per_scenario):
+    """Peak traced memory and allocated blocks per request, measured in a separate pass"""
+    
+    results = {}
+    tracemalloc.start()
+    try:
+        with quiet():
+            for scenario in scenarios:
+                peaks = []
+                blocks = []
+                for _ in range(per_scenario):
+                    function, event = workload.build(scenario)
+                    context = local_aws.LambdaContext(function)
+                    tracemalloc.reset_peak()
+                    baseline, _ = tracemalloc.get_traced_memory()
+                    blocks_before = sys.getallocatedblocks()
+                    handlers[function](event, context)
+                    _, peak = tracemalloc.get_traced_memory()
+                    peaks.append(peak - baseline)
+                    blocks.append(sys.getallocatedblocks() - blocks_before)
+                results[scenario] = {
+                    'alloc_peak_kib': round(statistics.median(peaks) / 1024, 1),
+                    'retained_blocks': int(statistics.median(blocks))
+                }
+    finally:
+        tracemalloc.stop()
+    return results
+
+def probe_cold_start(function):
+    """Run in a fresh interpreter: time module import, first and warm invocations of one handler"""
+    
+    for name, value in LAMBDA_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, LAMBDA_DIR)
+    
+    with quiet():
+        started = time.perf_counter_ns()
+        module = __import__(function)
+        import_ns = time.perf_counter_ns() - started
+    
+    import local_aws
+    if function == 'backend':
+        local_aws.install(module)
+    
+    rng = random.Random(0)
+    
+    def next_event(index):
+        if function == 'frontend':
+            return api_event('GET', '/', BROWSER_HEADERS)
+        return api_event('POST', '/api/contact', body=contact_body(rng, f"probe-{index}"), source_ip=f"192.0.2.{index % 250}")
+    
+    with quiet():
+        begin = time.perf_counter_ns()
+        module.lambda_handler(next_event(0), local_aws.LambdaContext(function))
+        first_ns = time.perf_counter_ns() - begin
+        
+        warm = []
+        for index in range(1, 21):
+            begin = time.perf_counter_ns()
+            module.lambda_handler(next_event(index), local_aws.LambdaContext(function))
+            warm.append(time.perf_counter_ns() - begin)
+    
+    print(json.dumps({
+        'import_ms': import_ns / 1e6,
+        'first_invoke_ms': first_ns / 1e6,
+        'warm_invoke_ms': statistics.median(warm) / 1e6
+    }))
+
+def run_cold_starts(repeats):
+    """Median cold-start timings per function over several fresh interpreters"""
+    
+    results = {}
+    for function in ('frontend', 'backend'):
+        runs = []
+        for _ in range(repeats):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--probe', function],
+                capture_output=True, text=True, check=True, cwd=SOURCE_DIR
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        summary = {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]}
+        summary['cold_total_ms'] = round(summary['import_ms'] + summary['first_invoke_ms'], 3)
+        results[function] = summary
+    return results
+
+def git_revision():
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=SOURCE_DIR
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, cwd=SOURCE_DIR
+        ).stdout.strip()
+        return revision + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def save_results(results, output_dir=RESULTS_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    path = os.path.join(output_dir, f"{stamp}-{results['meta']['revision']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    return path
+
+def latest_results(output_dir=RESULTS_DIR, exclude=None):
+    paths = sorted(path for path in glob.glob(os.path.join(output_dir, '*.json')) if path != exclude)
+    return paths[-1] if paths else None
+
+def compare_results(current, baseline, threshold):
+    """Print per-scenario deltas against a baseline run; returns the regressions found"""
+    
+    print(f"\n📊 Compared with {baseline['meta']['revision']} ({baseline['meta']['timestamp']})")
+    print(f"  {'scenario':<18}{'p50':>10}{'p95':>10}{'rps':>10}")
+    regressions = []
+    rows = dict(current['scenarios'], overall=current['overall'])
+    base_rows = dict(baseline['scenarios'], overall=baseline['overall'])
+    for scenario, stats in rows.items():
+        base = base_rows.get(scenario)
+        if not base:
+            continue
+        deltas = []
+        for metric, higher_is_better in (('p50_ms', False), ('p95_ms', False), ('throughput_rps', True)):
+            if not base[metric]:
+                deltas.append('     n/a')
+                continue
+            change = (stats[metric] - base[metric]) / base[metric]
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append((scenario, metric, change))
+            deltas.append(f"{change:+8.1%}{'⚠️' if worse > threshold else ''}")
+        print(f"  {scenario:<18}" + ''.join(f"{delta:>10}" for delta in deltas))
+    return regressions
+
+def print_report(results):
+    print(f"\n⏱️  Warm invocations ({results['meta']['requests']} requests, seed {results['meta']['seed']})")
+    print(f"  {'scenario':<18}{'count':>7}{'rps':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak KiB':>10}{'blocks':>8}")
+    for scenario, stats in sorted(results['scenarios'].items()):
+        allocations = results['allocations'].get(scenario, {})
+        print(
+            f"  {scenario:<18}{stats['count']:>7}{stats['throughput_rps']:>10}{stats['p50_ms']:>9.3f}"
+            f"{stats['p95_ms']:>9.3f}{stats['p99_ms']:>9.3f}{allocations.get('alloc_peak_kib', 0):>10}"
+            f"{allocations.get('retained_blocks', 0):>8}"
+        )
+    overall = results['overall']
+    print(
+        f"  {'overall':<18}{overall['count']:>7}{overall['throughput_rps']:>10}{overall['p50_ms']:>9.3f}"
+        f"{overall['p95_ms']:>9.3f}{overall['p99_ms']:>9.3f}"
+    )
+    
+    if results.get('cold_start'):
+        print("\n🧊 Cold vs warm (median of fresh interpreters, in-memory AWS)")
+        for function, stats in results['cold_start'].items():
+            print(
+                f"  {function:<10} import {stats['import_ms']:.1f} ms, first invoke {stats['first_invoke_ms']:.2f} ms, "
+                f"cold total {stats['cold_total_ms']:.1f} ms, warm {stats['warm_invoke_ms']:.3f} ms"
+            )
+
+def main():
+    """Main function to run the benchmarks"""
+    
+    parser = argparse.ArgumentParser(description='Benchmark the Poli Notary Lambda handlers')
+    parser.add_argument('--requests', type=int, default=5000, help='Measured invocations in the warm run')
+    parser.add_argument('--warmup', type=int, default=500, help='Unmeasured invocations before the warm run')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the event mix')
+    parser.add_argument('--mix', help='Scenario weights, e.g. page=50,contact_post=50 (default: realistic mix)')
+    parser.add_argument('--alloc-samples', type=int, default=50, help='Requests per scenario in the allocation pass')
+    parser.add_argument('--cold-repeats', type=int, default=5, help='Fresh interpreters per function (0 to skip)')
+    parser.add_argument('--compare', help="Baseline results file, or 'latest' for the most recent saved run")
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on regressions')
+    parser.add_argument('--no-save', action='store_true', help='Do not write the results file')
+    parser.add_argument('--probe', choices=('frontend', 'backend'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.probe:
+        probe_cold_start(args.probe)
+        return
+    
+    mix = DEFAULT_MIX
+    if args.mix:
+        mix = {name: float(weight) for name, weight in (part.split('=') for part in args.mix.split(','))}
+    scenarios = list(mix)
+    weights = [mix[scenario] for scenario in scenarios]
+    
+    print("🏁 Benchmarking Poli Notary Lambda handlers...")
+    handlers, services, local_aws = load_handlers()
+    rng = random.Random(args.seed)
+    submission_ids = seed_submissions(handlers, local_aws, SEED_SUBMISSIONS, rng)
+    with quiet():
+        page = handlers['frontend'](api_event('GET', '/', BROWSER_HEADERS), local_aws.LambdaContext('frontend'))
+    workload = Workload(rng, page['headers'].get('ETag', ''), submission_ids)
+    
+    scenario_stats, overall = run_warm(handlers, local_aws, workload, scenarios, weights, args.requests, args.warmup)
+    allocations = run_allocations(handlers, local_aws, workload, scenarios, args.alloc_samples)
+    cold_start = run_cold_starts(args.cold_repeats) if args.cold_repeats > 0 else {}
+    
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'mix': mix
+        },
+        'scenarios': scenario_stats,
+        'overall': overall,
+        'allocations': allocations,
+        'cold_start': cold_start
+    }
+    print_report(results)
+    
+    path = None
+    if not args.no_save:
+        path = save_results(results)
+        print(f"\n💾 Saved {os.path.relpath(path, SOURCE_DIR)}")
+    
+    regressions = []
+    baseline_path = latest_results(exclude=path) if args.compare == 'latest' else args.compare
+    if args.compare and not baseline_path:
+        print("\nℹ️  No earlier results to compare with")
+    elif baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+    
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Build script that compiles the Poli Notary site assets for deployment
+This script minifies the page, stylesheet and script the frontend Lambda serves
+inline, writes content-hashed copies to dist/ and emits a manifest used by the
+frontend Lambda and app.py
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(SOURCE_DIR, 'lambda_functions')
+DIST_DIR = os.path.join(SOURCE_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Brotli variants, base64-encoded so Terraform can bundle them as text; the
+# Lambda package has no brotli module to compress them at cold start
+PRECOMPRESSED_SUFFIX = '.br.b64'
+
+# Stands in for the static assets bucket in the compiled page; must match
+# frontend.S3_BUCKET_PLACEHOLDER
+S3_BUCKET_PLACEHOLDER = '__S3_BUCKET__'
+
+# Logical asset name -> content type; the HTML page is compiled last so it
+# can reference the fingerprinted names of the other assets
+SITE_ASSETS = {
+    'styles.css': 'text/css',
+    'script.js': 'application/javascript',
+    'index.html': 'text/html'
+}
+
+def minify_css(content):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    
+    content = re.sub(r'/\*.*?\*/', '', content, flags=re.S)
+    content = re.sub(r'\s+', ' ', content)
+    content = re.sub(r'\s*([{};,>])\s*', r'\1', content)
+    content = re.sub(r':\s+', ':', content)
+    content = content.replace(';}', '}')
+    return content.strip()
+
+def minify_js(content):
+    """Drop indentation, blank lines and whole-line comments from a script"""
+    
+    # Newlines are kept so automatic semicolon insertion still applies
+    lines = []
+    for line in content.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+def minify_html(content):
+    """Drop comments, indentation and blank lines from an HTML page"""
+    
+    content = re.sub(r'<!--.*?-->', '', content, flags=re.S)
+    lines = [line.strip() for line in content.splitlines()]
+    return '\n'.join(line for line in lines if line)
+
+MINIFIERS = {
+    'text/css': minify_css,
+    'application/javascript': minify_js,
+    'text/html': minify_html
+}
+
+def fingerprint(name, content):
+    """Insert a short content hash into a file name"""
+    
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest[:8]}{ext}", digest
+
+def rewrite_references(html, renamed):
+    """Point href/src attributes at the fingerprinted asset names"""
+    
+    for name, hashed_name in renamed.items():
+        pattern = r'((?:href|src)=["\'])(?:\./|/)?' + re.escape(name) + r'(["\'])'
+        html = re.sub(pattern, r'\g<1>/' + hashed_name + r'\g<2>', html)
+    return html
+
+def load_inline_assets():
+    """
+    Return {name: content} for the site the frontend Lambda serves inline.
+    
+    The root index.html and script.js are a static mock-up (no image URLs, a
+    simulated form submit), so the build compiles the Lambda's copy instead.
+    The bucket is only known at deploy time; the page keeps a placeholder that
+    the Lambda and app.py fill in when they load dist/.
+    """
+    
+    if LAMBDA_DIR not in sys.path:
+        sys.path.insert(0, LAMBDA_DIR)
+    import frontend
+    
+    return {
+        'styles.css': frontend.CSS_CONTENT,
+        'script.js': frontend.JS_CONTENT,
+        'index.html': frontend.render_html_page(S3_BUCKET_PLACEHOLDER)
+    }
+
+def compile_site(assets=None, dist_dir=DIST_DIR):
+    """Compile the site assets (default: the Lambda's inline copy) into dist_dir and return the manifest"""
+    
+    if assets is None:
+        assets = load_inline_assets()
+    os.makedirs(dist_dir, exist_ok=True)
+    
+    manifest = {'files': {}}
+    renamed = {}
+    
+    for name, content_type in SITE_ASSETS.items():
+        content = MINIFIERS[content_type](assets[name])
+        
+        if content_type == 'text/html':
+            # The page itself keeps a stable name and must be revalidated
+            content = rewrite_references(content, renamed)
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            output_name = name
+        else:
+            output_name, digest = fingerprint(name, content)
+            renamed[name] = output_name
+        
+        with open(os.path.join(dist_dir, output_name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        
+        manifest['files'][name] = {
+            'path': output_name,
+            'contentType': content_type,
+            'sha256': digest,
+            'immutable': output_name != name
+        }
+        print(f"✓ Compiled {name} -> dist/{output_name} ({len(content.encode('utf-8'))} bytes)")
+        
+        # The page only gets its bucket name at cold start, where it is gzipped instead
+        if brotli is not None and S3_BUCKET_PLACEHOLDER not in content:
+            compressed_name = output_name + PRECOMPRESSED_SUFFIX
+            compressed = brotli.compress(content.encode('utf-8'), quality=11)
+            with open(os.path.join(dist_dir, compressed_name), 'w', encoding='ascii') as f:
+                f.write(base64.b64encode(compressed).decode('ascii'))
+            manifest['files'][name]['precompressed'] = {'br': compressed_name}
+            print(f"  ↳ dist/{compressed_name} ({len(compressed)} bytes brotli)")
+    
+    if brotli is None:
+        print("⚠️  brotli is not installed (pip install brotli); Brotli variants were not precompressed")
+    
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    return manifest
+
+def load_manifest(dist_dir=DIST_DIR):
+    """Load a previously compiled manifest, or None if the site was not built"""
+    
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def remove_stale_files(manifest, dist_dir=DIST_DIR):
+    """Remove fingerprinted files left over from earlier builds"""
+    
+    current = {entry['path'] for entry in manifest['files'].values()}
+    for entry in manifest['files'].values():
+        current.update(entry.get('precompressed', {}).values())
+    current.add(MANIFEST_NAME)
+    for name in os.listdir(dist_dir):
+        if name not in current:
+            os.remove(os.path.join(dist_dir, name))
+
+def main():
+    """Main function to compile the site"""
+    
+    print("🔨 Compiling Poli Notary site assets...")
+    
+    manifest = compile_site()
+    remove_stale_files(manifest)
+    
+    print(f"\n✅ Wrote dist/{MANIFEST_NAME} with {len(manifest['files'])} files")
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,10 @@ echo "  • Region: $AWS_REGION"
 echo "  • Environment: $ENVIRONMENT"
 echo ""
 
+# Compile the site assets bundled into the frontend Lambda
+echo "🔨 Compiling site assets..."
+python3 build_static.py
+
 # Initialize Terraform
 echo "🔧 Initializing Terraform..."
 terraform init
@@ -4,89 +4,121 @@
 #!/usr/bin/env python3
 """
 Script to generate and upload professional images for Poli Notary website
-This script creates placeholder images and uploads them to S3
+This script renders placeholder images on a pool of worker processes and
+uploads each one to S3 as soon as it is ready, several uploads at a time
 """
 
+import argparse
 import boto3
+import json
 import os
+import threading
+import time
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from PIL import Image, ImageDraw, ImageFont
 import io
 import requests
 
-def create_professional_images():
-    """Create professional placeholder images for the website"""
-    
-    images = {}
-    
-    # Define image specifications
-    image_specs = {
-        'notary-professional.jpg': {
-            'size': (600, 400),
-            'color': '#2563eb',
-            'text': 'Professional\nNotary Public',
-            'description': 'Hero section professional image'
-        },
-        'document-signing.jpg': {
-            'size': (400, 300),
-            'color': '#1f2937',
-            'text': 'Document\nSigning',
-            'description': 'Document notarization service'
-        },
-        'real-estate.jpg': {
-            'size': (400, 300),
-            'color': '#059669',
-            'text': 'Real Estate\nServices',
-            'description': 'Real estate signing services'
-        },
-        'mobile-service.jpg': {
-            'size': (400, 300),
-            'color': '#dc2626',
-            'text': 'Mobile\nNotary',
-            'description': 'Mobile notary services'
-        },
-        'business-documents.jpg': {
-            'size': (400, 300),
-            'color': '#7c3aed',
-            'text': 'Business\nDocuments',
-            'description': 'Business notary services'
-        },
-        'notary-portrait.jpg': {
-            'size': (400, 500),
-            'color': '#374151',
-            'text': 'Poli\nNotary',
-            'description': 'Professional portrait for about section'
-        },
-        'client-1.jpg': {
-            'size': (150, 150),
-            'color': '#f59e0b',
-            'text': 'SJ',
-            'description': 'Client testimonial photo'
-        },
-        'client-2.jpg': {
-            'size': (150, 150),
-            'color': '#10b981',
-            'text': 'MC',
-            'description': 'Client testimonial photo'
-        },
-        'client-3.jpg': {
-            'size': (150, 150),
-            'color': '#8b5cf6',
-            'text': 'ER',
-            'description': 'Client testimonial photo'
-        }
+# Rendering is CPU-bound and runs on a process pool; uploads are I/O-bound
+# and run on a thread pool sharing one S3 client
+RENDER_WORKERS = os.cpu_count() or 1
+UPLOAD_WORKERS = 8
+JPEG_QUALITY = 95
+IMAGE_KEY_PREFIX = 'assets/images/'
+IMAGE_CACHE_CONTROL = 'max-age=31536000'  # Cache for 1 year
+
+# Files above the threshold are sent as concurrent multipart chunks
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+MULTIPART_CONCURRENCY = 4
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=MULTIPART_CHUNKSIZE,
+    max_concurrency=MULTIPART_CONCURRENCY
+)
+
+# Image specifications; more can be added with --specs
+IMAGE_SPECS = {
+    'notary-professional.jpg': {
+        'size': (600, 400),
+        'color': '#2563eb',
+        'text': 'Professional\nNotary Public',
+        'description': 'Hero section professional image'
+    },
+    'document-signing.jpg': {
+        'size': (400, 300),
+        'color': '#1f2937',
+        'text': 'Document\nSigning',
+        'description': 'Document notarization service'
+    },
+    'real-estate.jpg': {
+        'size': (400, 300),
+        'color': '#059669',
+        'text': 'Real Estate\nServices',
+        'description': 'Real estate signing services'
+    },
+    'mobile-service.jpg': {
+        'size': (400, 300),
+        'color': '#dc2626',
+        'text': 'Mobile\nNotary',
+        'description': 'Mobile notary services'
+    },
+    'business-documents.jpg': {
+        'size': (400, 300),
+        'color': '#7c3aed',
+        'text': 'Business\nDocuments',
+        'description': 'Business notary services'
+    },
+    'notary-portrait.jpg': {
+        'size': (400, 500),
+        'color': '#374151',
+        'text': 'Poli\nNotary',
+        'description': 'Professional portrait for about section'
+    },
+    'client-1.jpg': {
+        'size': (150, 150),
+        'color': '#f59e0b',
+        'text': 'SJ',
+        'description': 'Client testimonial photo'
+    },
+    'client-2.jpg': {
+        'size': (150, 150),
+        'color': '#10b981',
+        'text': 'MC',
+        'description': 'Client testimonial photo'
+    },
+    'client-3.jpg': {
+        'size': (150, 150),
+        'color': '#8b5cf6',
+        'text': 'ER',
+        'description': 'Client testimonial photo'
     }
+}
+
+def load_image_specs(path):
+    """Read extra image specifications from a JSON file of {filename: spec}"""
     
-    for filename, spec in image_specs.items():
-        print(f"Creating {filename}...")
-        image = create_placeholder_image(
-            size=spec['size'],
-            background_color=spec['color'],
-            text=spec['text'],
-            is_circular=(filename.startswith('client-'))
-        )
-        images[filename] = image
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+    for spec in specs.values():
+        spec['size'] = tuple(spec['size'])
+    return specs
+
+def render_image(filename, spec):
+    """Render one image and encode it as JPEG; runs in a worker process"""
+    
+    image = create_placeholder_image(
+        size=spec['size'],
+        background_color=spec['color'],
+        text=spec['text'],
+        is_circular=(filename.startswith('client-'))
+    )
     
-    return images
+    img_byte_arr = io.BytesIO()
+    image.save(img_byte_arr, format='JPEG', quality=JPEG_QUALITY)
+    return img_byte_arr.getvalue()
 
 def create_placeholder_image(size, background_color, text, is_circular=False):
     """Create a professional placeholder image"""
@@ -135,64 +167,122 @@ def create_placeholder_image(size, background_color, text, is_circular=False):
     
     return img.convert('RGB')
 
-def upload_images_to_s3(images, bucket_name):
-    """Upload images to S3 bucket"""
+class Progress:
+    """Counts rendered and stored images across the pools and prints each step"""
     
-    s3_client = boto3.client('s3')
+    def __init__(self, total):
+        self.total = total
+        self.rendered = 0
+        self.stored = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
     
-    uploaded_urls = {}
+    def report(self, symbol, message):
+        elapsed = time.monotonic() - self.started
+        print(f"{symbol} [{elapsed:5.1f}s] rendered {self.rendered}/{self.total}, "
+              f"stored {self.stored}/{self.total} - {message}", flush=True)
     
-    for filename, image in images.items():
-        print(f"Uploading {filename} to S3...")
-        
-        # Convert PIL image to bytes
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='JPEG', quality=95)
-        img_byte_arr.seek(0)
-        
-        # Upload to S3
-        key = f"assets/images/{filename}"
-        
+    def image_rendered(self, filename, size):
+        with self.lock:
+            self.rendered += 1
+            self.bytes += size
+            self.report('🖌️ ', f"{filename} ({size / 1024:.1f} KiB)")
+    
+    def image_stored(self, filename, location):
+        with self.lock:
+            self.stored += 1
+            self.report('✓', f"{filename}: {location}")
+    
+    def image_failed(self, filename, stage, error):
+        with self.lock:
+            self.failed += 1
+            self.report('✗', f"Failed to {stage} {filename}: {str(error)}")
+
+def create_s3_client(upload_workers=UPLOAD_WORKERS):
+    """One client for every upload thread, with a connection for each concurrent part"""
+    
+    return boto3.client('s3', config=Config(max_pool_connections=upload_workers * MULTIPART_CONCURRENCY))
+
+def upload_asset(s3_client, bucket_name, key, data, content_type, cache_control=None):
+    """Upload bytes to S3, as a multipart upload when larger than MULTIPART_THRESHOLD"""
+    
+    extra_args = {'ContentType': content_type, 'ACL': 'public-read'}
+    if cache_control:
+        extra_args['CacheControl'] = cache_control
+    s3_client.upload_fileobj(io.BytesIO(data), bucket_name, key, ExtraArgs=extra_args, Config=TRANSFER_CONFIG)
+    return f"https://{bucket_name}.s3.amazonaws.com/{key}"
+
+def save_asset_locally(output_dir, filename, data):
+    local_path = os.path.join(output_dir, filename)
+    with open(local_path, 'wb') as f:
+        f.write(data)
+    return local_path
+
+def generate_and_upload_images(image_specs, s3_client=None, bucket_name=None, output_dir='generated_images',
+                               render_workers=RENDER_WORKERS, upload_workers=UPLOAD_WORKERS):
+    """
+    Render every image on a process pool and store each one as soon as it is done.
+    
+    Images go to S3 through the shared client when one is given, otherwise
+    into output_dir. Returns {filename: url or local path} for the images stored.
+    """
+    
+    progress = Progress(len(image_specs))
+    if s3_client is None:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    def store_image(filename, data):
         try:
-            s3_client.put_object(
-                Bucket=bucket_name,
-                Key=key,
-                Body=img_byte_arr.getvalue(),
-                ContentType='image/jpeg',
-                CacheControl='max-age=31536000',  # Cache for 1 year
-                ACL='public-read'
-            )
-            
-            url = f"https://{bucket_name}.s3.amazonaws.com/{key}"
-            uploaded_urls[filename] = url
-            print(f"✓ Uploaded {filename}: {url}")
-            
+            if s3_client is not None:
+                location = upload_asset(s3_client, bucket_name, IMAGE_KEY_PREFIX + filename, data,
+                                        'image/jpeg', IMAGE_CACHE_CONTROL)
+            else:
+                location = save_asset_locally(output_dir, filename, data)
         except Exception as e:
-            print(f"✗ Failed to upload {filename}: {str(e)}")
+            progress.image_failed(filename, 'store', e)
+            return None
+        progress.image_stored(filename, location)
+        return location
     
-    return uploaded_urls
+    with ProcessPoolExecutor(max_workers=render_workers) as render_pool, \
+            ThreadPoolExecutor(max_workers=upload_workers) as upload_pool:
+        renders = {
+            render_pool.submit(render_image, filename, spec): filename
+            for filename, spec in image_specs.items()
+        }
+        uploads = {}
+        
+        # Hand each image to the upload pool in the order they finish rendering
+        for future in as_completed(renders):
+            filename = renders.pop(future)
+            try:
+                data = future.result()
+            except Exception as e:
+                progress.image_failed(filename, 'render', e)
+                continue
+            progress.image_rendered(filename, len(data))
+            uploads[upload_pool.submit(store_image, filename, data)] = filename
+    
+    stored = {}
+    for future, filename in uploads.items():
+        if future.result():
+            stored[filename] = future.result()
+    return stored
 
-def create_additional_assets(bucket_name):
+def create_additional_assets(s3_client, bucket_name):
     """Create additional assets like favicon, logos, etc."""
     
-    s3_client = boto3.client('s3')
-    
     # Create a simple favicon
     favicon = create_favicon()
     
     # Upload favicon
     favicon_bytes = io.BytesIO()
     favicon.save(favicon_bytes, format='PNG')
-    favicon_bytes.seek(0)
     
     try:
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key='assets/favicon.ico',
-            Body=favicon_bytes.getvalue(),
-            ContentType='image/x-icon',
-            ACL='public-read'
-        )
+        upload_asset(s3_client, bucket_name, 'assets/favicon.ico', favicon_bytes.getvalue(), 'image/x-icon')
         print("✓ Uploaded favicon.ico")
     except Exception as e:
         print(f"✗ Failed to upload favicon: {str(e)}")
@@ -214,38 +304,49 @@ def create_favicon():
 def main():
     """Main function to generate and upload all images"""
     
-    print("🎨 Generating professional images for Poli Notary website...")
+    parser = argparse.ArgumentParser(description='Generate and upload images for the Poli Notary website')
+    parser.add_argument('--bucket', default=os.environ.get('S3_BUCKET', 'poli-notary-static-assets'),
+                        help="Target S3 bucket (empty string saves to --output-dir instead)")
+    parser.add_argument('--specs', help='JSON file of extra {filename: {size, color, text}} image specifications')
+    parser.add_argument('--render-workers', type=int, default=RENDER_WORKERS, help='Processes rendering images')
+    parser.add_argument('--upload-workers', type=int, default=UPLOAD_WORKERS, help='Concurrent uploads')
+    parser.add_argument('--output-dir', default='generated_images', help='Where images are saved without a bucket')
+    args = parser.parse_args()
     
-    # Get S3 bucket name from environment or use default
-    bucket_name = os.environ.get('S3_BUCKET', 'poli-notary-static-assets')
-    
-    print(f"📦 Target S3 bucket: {bucket_name}")
+    print("🎨 Generating professional images for Poli Notary website...")
     
-    # Create images
-    images = create_professional_images()
+    image_specs = dict(IMAGE_SPECS)
+    if args.specs:
+        image_specs.update(load_image_specs(args.specs))
+    render_workers = max(args.render_workers, 1)
+    upload_workers = max(args.upload_workers, 1)
     
-    # Upload to S3
-    if bucket_name:
-        uploaded_urls = upload_images_to_s3(images, bucket_name)
-        create_additional_assets(bucket_name)
+    if args.bucket:
+        print(f"📦 Target S3 bucket: {args.bucket}")
+        print(f"⚙️  {len(image_specs)} images, {render_workers} render processes, {upload_workers} uploads at a time")
+        
+        s3_client = create_s3_client(upload_workers)
+        uploaded_urls = generate_and_upload_images(
+            image_specs, s3_client=s3_client, bucket_name=args.bucket,
+            render_workers=render_workers, upload_workers=upload_workers
+        )
+        create_additional_assets(s3_client, args.bucket)
         
-        print("\n✅ Image generation and upload complete!")
+        print(f"\n✅ Image generation and upload complete! ({len(uploaded_urls)}/{len(image_specs)} images)")
         print("\n📋 Uploaded images:")
-        for filename, url in uploaded_urls.items():
+        for filename, url in sorted(uploaded_urls.items()):
             print(f"  • {filename}: {url}")
     else:
-        print("❌ No S3 bucket specified. Set S3_BUCKET environment variable.")
+        print("❌ No S3 bucket specified. Set S3_BUCKET or pass --bucket.")
         
         # Save images locally for testing
         print("💾 Saving images locally...")
-        os.makedirs('generated_images', exist_ok=True)
-        
-        for filename, image in images.items():
-            local_path = f"generated_images/{filename}"
-            image.save(local_path, 'JPEG', quality=95)
+        saved_paths = generate_and_upload_images(
+            image_specs, output_dir=args.output_dir,
+            render_workers=render_workers, upload_workers=upload_workers
+        )
+        for filename, local_path in sorted(saved_paths.items()):
             print(f"  • Saved: {local_path}")
 
 if __name__ == "__main__":
     main()
-
-
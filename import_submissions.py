@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Script to bulk-import appointment records from partner booking systems
+This script validates each record with the contact form rules and batch-writes
+them to the contact submissions table with several concurrent writers
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lambda_functions'))
+
+import backend
+
+def read_records(path):
+    """Read records from a .csv, .ndjson/.jsonl or .json (array) file"""
+    
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(f))
+        if path.endswith(('.ndjson', '.jsonl')):
+            return [json.loads(line) for line in f if line.strip()]
+        records = json.load(f)
+        return records.get('records', []) if isinstance(records, dict) else records
+
+def main():
+    """Main function to import a partner export"""
+    
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='CSV, NDJSON or JSON file of appointment records')
+    parser.add_argument('--source', required=True, help='Partner name, stored as import:<source>')
+    parser.add_argument('--table', default=os.environ.get('DYNAMODB_TABLE'), help='Contact submissions table')
+    parser.add_argument('--writers', type=int, default=backend.IMPORT_WRITERS, help='Concurrent batch writers')
+    args = parser.parse_args()
+    
+    if not args.table:
+        print("❌ No table specified. Use --table or set DYNAMODB_TABLE.")
+        sys.exit(1)
+    
+    records = read_records(args.path)
+    print(f"📥 Importing {len(records)} records from {args.path} into {args.table}...")
+    
+    writers = min(max(args.writers, 1), backend.MAX_SCAN_SEGMENTS)
+    result = backend.import_submissions(args.table, records, args.source, writers=writers)
+    
+    print(f"\n✅ Imported {result['imported']} records")
+    if result['rejected']:
+        print(f"\n⚠️  Rejected {len(result['rejected'])} records:")
+        for rejection in result['rejected']:
+            print(f"  • Record {rejection['index']}: {'; '.join(rejection['errors'].values())}")
+    if result['failed']:
+        print(f"\n❌ {len(result['failed'])} records were still unprocessed after retries:")
+        for submission_id in result['failed']:
+            print(f"  • {submission_id}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,221 @@
 
 
 
+import time
+
+# Cold-start phases are timed from here (see init_report)
+MODULE_LOAD_STARTED = time.perf_counter()
+
 import json
 import boto3
 import os
+import base64
+import csv
+import hashlib
+import hmac
+import io
+import tempfile
 import uuid
-from datetime import datetime
-from decimal import Decimal
+import heapq
+import random
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from email_templates import render_email, ses_template
+import item_json
+import metrics
+import scan_engine
+from routing import Router
+from validation import validate_contact, validate_email, validate_import_record
+
+# Phase name -> milliseconds, filled in during module load and first client use
+init_phases = OrderedDict()
+init_phases_reported = 0
+
+def record_init_phase(name, started):
+    """Record how long an init phase took since a perf_counter() start"""
+    
+    init_phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+def init_report():
+    """Return the cold-start phase timings recorded so far for this container"""
+    
+    return dict(init_phases)
+
+record_init_phase('imports', MODULE_LOAD_STARTED)
+
+# SES calls: a warm keep-alive pool sized for concurrent sends, and per-call
+# timeouts so one slow send cannot hold up the other
+EMAIL_SEND_WORKERS = 4
+EMAIL_SEND_TIMEOUT = float(os.environ.get('EMAIL_SEND_TIMEOUT', 10))
+ses_config = Config(
+    max_pool_connections=EMAIL_SEND_WORKERS,
+    connect_timeout=2,
+    read_timeout=5,
+    tcp_keepalive=True,
+    retries={'max_attempts': 2, 'mode': 'standard'}
+)
+
+# Bulk work (parallel scans, batch imports) gets its own client with a
+# connection per worker; throttling is paced by our own backoff
+MAX_SCAN_SEGMENTS = 32
+scan_config = Config(
+    max_pool_connections=MAX_SCAN_SEGMENTS,
+    retries={'max_attempts': 3, 'mode': 'standard'}
+)
+
+# AWS services are created on first use, so OPTIONS preflights and 404s never
+# pay for them. Hot paths use low-level clients; the heavier resource layer is
+# only loaded for admin queries that need its condition builders.
+AWS_FACTORIES = {
+    'dynamodb': lambda: boto3.client('dynamodb'),
+    'dynamodb_resource': lambda: boto3.resource('dynamodb'),
+    'dynamodb_scan': lambda: boto3.client('dynamodb', config=scan_config),
+    'ses': lambda: boto3.client('ses', config=ses_config),
+    's3': lambda: boto3.client('s3')
+}
+aws_clients = {}
+aws_clients_lock = threading.Lock()
+item_serializer = TypeSerializer()
+item_deserializer = TypeDeserializer()
+
+def get_aws(name):
+    """Return a cached AWS client or resource, creating it on first use"""
+    
+    client = aws_clients.get(name)
+    if client is None:
+        with aws_clients_lock:
+            client = aws_clients.get(name)
+            if client is None:
+                started = time.perf_counter()
+                client = aws_clients[name] = AWS_FACTORIES[name]()
+                record_init_phase(f"client:{name}", started)
+    return client
+
+def to_attribute_values(item):
+    """Convert a plain item into low-level DynamoDB attribute values"""
+    
+    return {key: item_serializer.serialize(value) for key, value in item.items()}
+
+def from_attribute_values(item):
+    """Convert low-level DynamoDB attribute values into a plain item"""
+    
+    return {key: item_deserializer.deserialize(value) for key, value in item.items()}
+
+# Time-ordered index used for admin listings
+STATUS_INDEX = 'status-timestamp-index'
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# Attributes of a LastEvaluatedKey (table key plus index keys) for each index;
+# page tokens must hold exactly these before they reach DynamoDB
+STATUS_PAGE_KEY = ('id', 'status', 'timestamp')
+BUCKET_PAGE_KEY = ('id', 'timeBucket', 'timestamp')
+
+# Write-sharded day buckets ("YYYY-MM-DD#shard") for recent-activity queries
+TIME_BUCKET_INDEX = 'time-bucket-index'
+TIME_BUCKET_SHARDS = int(os.environ.get('TIME_BUCKET_SHARDS', 4))
+MAX_RECENT_DAYS = 31
+
+# Reused across warm invocations for shard fan-out queries
+query_executor = ThreadPoolExecutor(max_workers=TIME_BUCKET_SHARDS)
+
+# How submission emails leave the request path:
+#   stream - the DynamoDB stream worker (email_stream_handler) sends them
+#   memory - queued in-process for tests and local runs (drain_local_email_queue)
+#   inline - sent before the API responds
+EMAIL_DISPATCH_MODE = os.environ.get('EMAIL_DISPATCH', 'inline')
+local_email_queue = deque()
+
+# Reused across warm invocations so both submission emails go out concurrently
+email_executor = ThreadPoolExecutor(max_workers=EMAIL_SEND_WORKERS)
+
+# Bulk templated sends (SES accepts at most 50 destinations per call), paced
+# against the account's maximum send rate in emails per second
+BULK_EMAIL_BATCH_SIZE = 50
+SES_MAX_SEND_RATE = float(os.environ.get('SES_MAX_SEND_RATE', 14))
+SES_TEMPLATE_PREFIX = os.environ.get('SES_TEMPLATE_PREFIX', 'poli-notary-')
+synced_ses_templates = set()
+
+# Duplicate-submission suppression: keyed on the Idempotency-Key header, or a
+# hash of the request body when the client does not send one
+IDEMPOTENCY_TABLE = os.environ.get('IDEMPOTENCY_TABLE')
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 3600))
+# An IN_PROGRESS claim whose Lambda timed out or crashed can be reclaimed
+# once its lease runs out; longer than the backend's 30s timeout
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', 35))
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
 
-# Initialize AWS services
-dynamodb = boto3.resource('dynamodb')
-ses = boto3.client('ses')
+# Per-client limits on POST /api/contact: (scope, max requests, window seconds).
+# Counters live in RATE_LIMIT_TABLE; each container also keeps token buckets
+# for hot keys so obvious floods are rejected without a DynamoDB call.
+RATE_LIMIT_TABLE = os.environ.get('RATE_LIMIT_TABLE')
+RATE_LIMITS = (
+    ('ip', int(os.environ.get('RATE_LIMIT_IP_MAX', 10)), int(os.environ.get('RATE_LIMIT_IP_WINDOW', 60))),
+    ('email', int(os.environ.get('RATE_LIMIT_EMAIL_MAX', 5)), int(os.environ.get('RATE_LIMIT_EMAIL_WINDOW', 3600)))
+)
+MAX_LOCAL_RATE_BUCKETS = 1024
+local_rate_buckets = OrderedDict()
 
+# Request bodies larger than this are rejected before they are parsed
+MAX_CONTACT_BODY_BYTES = 16 * 1024
+MAX_IMPORT_BODY_BYTES = 5 * 1024 * 1024
+
+# Bulk imports from partner booking systems: BatchWriteItem takes at most 25
+# puts, and several batches are written at once. Imported items are tagged with
+# IMPORT_SOURCE_PREFIX so the email worker does not email historical clients.
+IMPORT_BATCH_SIZE = 25
+IMPORT_WRITERS = int(os.environ.get('IMPORT_WRITERS', 8))
+IMPORT_MAX_RECORDS = 5000
+IMPORT_MAX_RETRIES = 8
+IMPORT_BACKOFF_BASE = 0.05
+IMPORT_BACKOFF_MAX = 5.0
+IMPORT_SOURCE_PREFIX = 'import:'
+IMPORT_NAMESPACE = uuid.UUID('6f1d3c52-8a4e-4f8b-9d2a-5c7e1b0a9f34')
+import_executor = ThreadPoolExecutor(max_workers=IMPORT_WRITERS)
+
+# Admin endpoints (export, import) require "Authorization: Bearer <token>".
+# Only the token's SHA-256 is configured; they are disabled when it is unset.
+ADMIN_TOKEN_SHA256 = os.environ.get('ADMIN_TOKEN_SHA256', '').lower()
+
+# CloudFront sends this secret in X-Origin-Verify on every origin request.
+# Viewer IP headers are only trusted when it matches; anyone calling the
+# execute-api URL directly can set them to anything.
+ORIGIN_VERIFY_SECRET = os.environ.get('ORIGIN_VERIFY_SECRET', '')
+
+# Full-table exports: parallel segment scans written out page by page. Results
+# that would not fit under the 6 MB Lambda response cap are spilled to
+# EXPORT_BUCKET and returned as a pre-signed link instead. The cap applies to
+# the JSON-encoded response, where quotes, backslashes and non-ASCII text are
+# escaped, so the inline limit is checked against the encoded body.
+EXPORT_BUCKET = os.environ.get('EXPORT_BUCKET')
+EXPORT_SCAN_SEGMENTS = int(os.environ.get('EXPORT_SCAN_SEGMENTS', 4))
+EXPORT_PAGE_SIZE = 500
+EXPORT_INLINE_MAX_BYTES = 5 * 1024 * 1024
+EXPORT_LINK_EXPIRES = 3600
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+EXPORT_CSV_FIELDS = (
+    'id', 'timestamp', 'status', 'fullName', 'email', 'phone', 'serviceType',
+    'preferredDate', 'preferredTime', 'additionalDetails', 'source'
+)
+# Cells starting with these are formulas to spreadsheet apps; they are exported
+# with a leading apostrophe so submitted text can never run as one
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Bulk maintenance passes over the contact table (see maintenance_handler).
+# A run stops this many seconds before the Lambda timeout to hand back its checkpoint.
+MAINTENANCE_SEGMENTS = int(os.environ.get('MAINTENANCE_SEGMENTS', 16))
+MAINTENANCE_DEADLINE_MARGIN = 30
+
+@metrics.instrument('backend')
 def lambda_handler(event, context):
     """
     Backend Lambda function to handle API requests for Poli Notary website
@@ -20,7 +224,7 @@ def lambda_handler(event, context):
     # CORS headers
     cors_headers = {
         'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key',
         'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
     }
     
@@ -31,6 +235,7 @@ def lambda_handler(event, context):
         
         # Handle OPTIONS requests for CORS
         if http_method == 'OPTIONS':
+            metrics.current().set_route('options')
             return {
                 'statusCode': 200,
                 'headers': cors_headers,
@@ -38,10 +243,16 @@ def lambda_handler(event, context):
             }
         
         # Route requests
-        if path == '/api/contact' and http_method == 'POST':
-            return handle_contact_submission(event, cors_headers)
-        elif path == '/api/contact' and http_method == 'GET':
-            return get_contact_submissions(event, cors_headers)
+        match = ROUTER.resolve(http_method, path)
+        if match.handler:
+            metrics.current().set_route(match.handler.__name__)
+            return match.handler(event, cors_headers, **match.params)
+        elif match.allowed:
+            return {
+                'statusCode': 405,
+                'headers': {**cors_headers, 'Allow': ','.join(match.allowed)},
+                'body': json.dumps({'error': 'Method not allowed'})
+            }
         else:
             return {
                 'statusCode': 404,
@@ -56,62 +267,95 @@ def lambda_handler(event, context):
             'headers': cors_headers,
             'body': json.dumps({'error': 'Internal server error'})
         }
+    finally:
+        report_init_phases()
+
+def report_init_phases():
+    """Log the cold-start report whenever new init phases (e.g. first client use) were recorded"""
+    
+    global init_phases_reported
+    if len(init_phases) > init_phases_reported:
+        init_phases_reported = len(init_phases)
+        print(json.dumps({'initReport': init_report()}))
 
 def handle_contact_submission(event, cors_headers):
     """Handle contact form submission"""
     
+    idempotency_key = None
     try:
-        # Parse request body
-        body = json.loads(event.get('body', '{}'))
+        with metrics.phase('parse'):
+            raw_body = read_body(event, MAX_CONTACT_BODY_BYTES)
+            body = json.loads(raw_body) if raw_body is not None else None
+        if raw_body is None:
+            return {
+                'statusCode': 413,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Request body too large'})
+            }
         
-        # Validate required fields
-        required_fields = ['fullName', 'email', 'phone', 'serviceType']
-        for field in required_fields:
-            if not body.get(field):
-                return {
-                    'statusCode': 400,
-                    'headers': cors_headers,
-                    'body': json.dumps({'error': f'Missing required field: {field}'})
-                }
+        # Report every invalid field at once; error keeps the first for simple clients
+        with metrics.phase('validate'):
+            errors = validate_contact(body)
+        if errors:
+            return {
+                'statusCode': 400,
+                'headers': cors_headers,
+                'body': json.dumps({'error': next(iter(errors.values())), 'errors': errors})
+            }
         
-        # Generate unique ID and timestamp
-        submission_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().isoformat()
-        
-        # Prepare data for DynamoDB
-        submission_data = {
-            'id': submission_id,
-            'timestamp': timestamp,
-            'fullName': body.get('fullName'),
-            'email': body.get('email'),
-            'phone': body.get('phone'),
-            'serviceType': body.get('serviceType'),
-            'preferredDate': body.get('preferredDate', ''),
-            'preferredTime': body.get('preferredTime', ''),
-            'additionalDetails': body.get('additionalDetails', ''),
-            'status': 'new',
-            'source': 'website'
-        }
+        # Replay the original response for duplicates of an earlier submission;
+        # this comes first so a client retrying with its key never spends rate
+        # limit budget or gets a 429 instead of its stored response
+        idempotency_key = get_idempotency_key(event, body)
+        if idempotency_key:
+            with metrics.phase('idempotency'):
+                existing = claim_idempotency_key(idempotency_key)
+            if existing is not None:
+                return replay_idempotent_response(existing, cors_headers)
+        
+        # Throttle floods from one source IP or email address (new claims only)
+        with metrics.phase('rateLimit'):
+            retry_after = check_rate_limits(event, body)
+        if retry_after:
+            if idempotency_key:
+                release_idempotency_key(idempotency_key)
+            return {
+                'statusCode': 429,
+                'headers': {**cors_headers, 'Retry-After': str(retry_after)},
+                'body': json.dumps({'error': 'Too many requests, please try again later'})
+            }
+        
+        submission_data = build_submission(body, uuid.uuid4(), datetime.utcnow())
+        submission_id = submission_data['id']
         
         # Save to DynamoDB
         table_name = os.environ.get('DYNAMODB_TABLE')
         if table_name:
-            table = dynamodb.Table(table_name)
-            table.put_item(Item=submission_data)
+            with metrics.phase('dynamodbPut'):
+                get_aws('dynamodb').put_item(TableName=table_name, Item=to_attribute_values(submission_data))
         
-        # Send notification email
-        send_notification_email(submission_data)
+        # Hand the notification and confirmation emails off the request path
+        with metrics.phase('emailDispatch'):
+            dispatch_submission_emails(submission_data, durable=bool(table_name))
         
-        # Send confirmation email to client
-        send_confirmation_email(submission_data)
+        with metrics.phase('serialize'):
+            response_body = json.dumps({
+                'message': 'Appointment request submitted successfully',
+                'id': submission_id
+            })
+        if idempotency_key:
+            # The submission is stored and its emails are on their way; releasing
+            # the key now would let a retry store and email it a second time
+            try:
+                with metrics.phase('idempotency'):
+                    complete_idempotency_key(idempotency_key, 200, response_body)
+            except Exception as e:
+                print(f"Error completing idempotency key: {str(e)}")
         
         return {
             'statusCode': 200,
             'headers': cors_headers,
-            'body': json.dumps({
-                'message': 'Appointment request submitted successfully',
-                'id': submission_id
-            })
+            'body': response_body
         }
         
     except json.JSONDecodeError:
@@ -122,19 +366,55 @@ def handle_contact_submission(event, cors_headers):
         }
     except Exception as e:
         print(f"Error handling contact submission: {str(e)}")
+        # Let the client retry with the same key
+        if idempotency_key:
+            release_idempotency_key(idempotency_key)
         return {
             'statusCode': 500,
             'headers': cors_headers,
             'body': json.dumps({'error': 'Failed to process submission'})
         }
 
-def get_contact_submissions(event, cors_headers):
-    """Get contact form submissions (for admin use)"""
+def read_body(event, max_bytes):
+    """Return the raw request body, or None when it is larger than max_bytes"""
+    
+    raw_body = event.get('body') or '{}'
+    # API Gateway base64-encodes the body when binary media types match; the
+    # size is checked on the encoded form so huge payloads are never decoded
+    if event.get('isBase64Encoded'):
+        if len(raw_body) > (max_bytes + 2) // 3 * 4:
+            return None
+        raw_body = base64.b64decode(raw_body)
+    if len(raw_body) > max_bytes:
+        return None
+    return raw_body
+
+def build_submission(body, submission_uuid, now, status='new', source='website'):
+    """Build the DynamoDB item for a validated submission"""
+    
+    return {
+        'id': str(submission_uuid),
+        'timestamp': now.isoformat(),
+        'timeBucket': time_bucket(now, submission_uuid.int % TIME_BUCKET_SHARDS),
+        'fullName': body.get('fullName'),
+        'email': body.get('email'),
+        'phone': body.get('phone'),
+        'serviceType': body.get('serviceType'),
+        'preferredDate': body.get('preferredDate', ''),
+        'preferredTime': body.get('preferredTime', ''),
+        'additionalDetails': body.get('additionalDetails', ''),
+        'status': status,
+        'source': source
+    }
+
+def import_contact_submissions(event, cors_headers):
+    """Bulk-import submissions from a partner booking system (for admin use)"""
+    
+    denied = require_admin(event, cors_headers)
+    if denied:
+        return denied
     
     try:
-        # This would typically require authentication
-        # For demo purposes, we'll return a simple response
-        
         table_name = os.environ.get('DYNAMODB_TABLE')
         if not table_name:
             return {
@@ -143,231 +423,1144 @@ def get_contact_submissions(event, cors_headers):
                 'body': json.dumps({'error': 'Database not configured'})
             }
         
-        table = dynamodb.Table(table_name)
+        raw_body = read_body(event, MAX_IMPORT_BODY_BYTES)
+        if raw_body is None:
+            return {
+                'statusCode': 413,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Request body too large'})
+            }
+        body = json.loads(raw_body)
         
-        # Get query parameters
-        query_params = event.get('queryStringParameters') or {}
-        limit = int(query_params.get('limit', 10))
-        
-        # Scan table (in production, you'd want better querying)
-        response = table.scan(Limit=limit)
-        
-        # Convert Decimal to float for JSON serialization
-        items = []
-        for item in response.get('Items', []):
-            converted_item = {}
-            for key, value in item.items():
-                if isinstance(value, Decimal):
-                    converted_item[key] = float(value)
-                else:
-                    converted_item[key] = value
-            items.append(converted_item)
+        records = body.get('records') if isinstance(body, dict) else None
+        if not isinstance(records, list) or not body.get('source'):
+            return {
+                'statusCode': 400,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Expected {"source": ..., "records": [...]}'})
+            }
+        if len(records) > IMPORT_MAX_RECORDS:
+            return {
+                'statusCode': 413,
+                'headers': cors_headers,
+                'body': json.dumps({'error': f'At most {IMPORT_MAX_RECORDS} records per request'})
+            }
         
         return {
             'statusCode': 200,
             'headers': cors_headers,
-            'body': json.dumps({
-                'submissions': items,
-                'count': len(items)
-            })
+            'body': json.dumps(import_submissions(table_name, records, body['source']))
         }
         
+    except json.JSONDecodeError:
+        return {
+            'statusCode': 400,
+            'headers': cors_headers,
+            'body': json.dumps({'error': 'Invalid JSON in request body'})
+        }
     except Exception as e:
-        print(f"Error getting submissions: {str(e)}")
+        print(f"Error importing submissions: {str(e)}")
         return {
             'statusCode': 500,
             'headers': cors_headers,
-            'body': json.dumps({'error': 'Failed to retrieve submissions'})
+            'body': json.dumps({'error': 'Failed to import submissions'})
         }
 
-def send_notification_email(submission_data):
-    """Send notification email to Poli Notary"""
+def import_submissions(table_name, records, source, writers=None):
+    """
+    Validate and batch-write partner records, returning counts plus the rejected and failed records.
+    
+    Records carrying an externalId get a stable ID, so re-running an import
+    overwrites the earlier copy instead of duplicating it.
+    """
+    
+    items = OrderedDict()
+    rejected = []
+    for index, record in enumerate(records):
+        errors = validate_import_record(record)
+        if not errors:
+            try:
+                now = parse_import_timestamp(record['timestamp']) if record.get('timestamp') else datetime.utcnow()
+            except ValueError:
+                errors = {'timestamp': 'timestamp must be an ISO 8601 date and time'}
+        if errors:
+            rejected.append({'index': index, 'errors': errors})
+            continue
+        
+        if record.get('externalId'):
+            submission_uuid = uuid.uuid5(IMPORT_NAMESPACE, f"{source}:{record['externalId']}")
+        else:
+            submission_uuid = uuid.uuid4()
+        item = build_submission(
+            record, submission_uuid, now,
+            status=record.get('status') or 'new',
+            source=IMPORT_SOURCE_PREFIX + source
+        )
+        # A batch may not hold two writes to the same key; the last copy wins
+        items[item['id']] = {'PutRequest': {'Item': to_attribute_values(item)}}
+    
+    requests = list(items.values())
+    batches = [requests[start:start + IMPORT_BATCH_SIZE] for start in range(0, len(requests), IMPORT_BATCH_SIZE)]
+    if writers:
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            leftovers = list(executor.map(lambda batch: write_batch(table_name, batch), batches))
+    else:
+        leftovers = list(import_executor.map(lambda batch: write_batch(table_name, batch), batches))
+    failed = [request['PutRequest']['Item']['id']['S'] for leftover in leftovers for request in leftover]
+    
+    return {
+        'imported': len(requests) - len(failed),
+        'rejected': rejected,
+        'failed': failed
+    }
+
+def parse_import_timestamp(value):
+    """Parse an ISO 8601 timestamp, with or without a UTC offset, into naive UTC"""
+    
+    # fromisoformat on Python 3.9 takes neither 'Z' nor an offset without a colon
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    elif value[-5:-4] in ('+', '-') and value[-4:].isdigit():
+        value = value[:-2] + ':' + value[-2:]
+    
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def write_batch(table_name, requests):
+    """
+    Write up to 25 items, retrying unprocessed ones with exponential backoff; returns what never got written.
+    
+    Errors other than throttling are not retried and fail only this batch, so
+    one bad batch is reported in 'failed' instead of aborting the import.
+    """
+    
+    client = get_aws('dynamodb_scan')
+    for attempt in range(IMPORT_MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(min(IMPORT_BACKOFF_BASE * 2 ** attempt, IMPORT_BACKOFF_MAX) * random.uniform(0.5, 1))
+        try:
+            response = client.batch_write_item(RequestItems={table_name: requests})
+        except Exception as e:
+            if isinstance(e, ClientError) and e.response['Error']['Code'] in scan_engine.THROTTLE_ERRORS:
+                continue
+            print(f"Error writing import batch: {str(e)}")
+            return requests
+        requests = response.get('UnprocessedItems', {}).get(table_name, [])
+        if not requests:
+            break
+    return requests
+
+def get_contact_submission(event, cors_headers, submission_id):
+    """Get a single contact form submission by ID (for admin use)"""
+    
+    denied = require_admin(event, cors_headers)
+    if denied:
+        return denied
     
     try:
-        subject = f"New Appointment Request - {submission_data['serviceType']}"
-        
-        body_html = f"""
-        <html>
-        <head></head>
-        <body>
-            <h2>New Appointment Request</h2>
-            <p>You have received a new appointment request through your website.</p>
-            
-            <h3>Client Information:</h3>
-            <ul>
-                <li><strong>Name:</strong> {submission_data['fullName']}</li>
-                <li><strong>Email:</strong> {submission_data['email']}</li>
-                <li><strong>Phone:</strong> {submission_data['phone']}</li>
-                <li><strong>Service Type:</strong> {submission_data['serviceType']}</li>
-                <li><strong>Preferred Date:</strong> {submission_data.get('preferredDate', 'Not specified')}</li>
-                <li><strong>Preferred Time:</strong> {submission_data.get('preferredTime', 'Not specified')}</li>
-            </ul>
-            
-            <h3>Additional Details:</h3>
-            <p>{submission_data.get('additionalDetails', 'None provided')}</p>
-            
-            <h3>Submission Details:</h3>
-            <ul>
-                <li><strong>Submission ID:</strong> {submission_data['id']}</li>
-                <li><strong>Timestamp:</strong> {submission_data['timestamp']}</li>
-                <li><strong>Source:</strong> {submission_data['source']}</li>
-            </ul>
-            
-            <p>Please contact the client within 24 hours to confirm the appointment.</p>
-        </body>
-        </html>
-        """
+        table_name = os.environ.get('DYNAMODB_TABLE')
+        if not table_name:
+            return {
+                'statusCode': 500,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Database not configured'})
+            }
         
-        body_text = f"""
-        New Appointment Request
+        with metrics.phase('dynamodbGet'):
+            item = get_aws('dynamodb').get_item(TableName=table_name, Key={'id': {'S': submission_id}}).get('Item')
+        if not item:
+            return {
+                'statusCode': 404,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Submission not found'})
+            }
         
-        Client Information:
-        Name: {submission_data['fullName']}
-        Email: {submission_data['email']}
-        Phone: {submission_data['phone']}
-        Service Type: {submission_data['serviceType']}
-        Preferred Date: {submission_data.get('preferredDate', 'Not specified')}
-        Preferred Time: {submission_data.get('preferredTime', 'Not specified')}
+        with metrics.phase('serialize'):
+            response_body = item_json.dumps(from_attribute_values(item))
+        return {
+            'statusCode': 200,
+            'headers': cors_headers,
+            'body': response_body
+        }
         
-        Additional Details:
-        {submission_data.get('additionalDetails', 'None provided')}
+    except Exception as e:
+        print(f"Error getting submission: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': cors_headers,
+            'body': json.dumps({'error': 'Failed to retrieve submission'})
+        }
+
+def get_header(event, name):
+    """Look up a request header case-insensitively"""
+    
+    headers = event.get('headers') or {}
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def require_admin(event, cors_headers):
+    """Return an error response unless the request carries the admin bearer token"""
+    
+    if not ADMIN_TOKEN_SHA256:
+        return {
+            'statusCode': 403,
+            'headers': cors_headers,
+            'body': json.dumps({'error': 'Admin API is not enabled'})
+        }
+    
+    scheme, _, token = (get_header(event, 'Authorization') or '').partition(' ')
+    digest = hashlib.sha256(token.strip().encode('utf-8')).hexdigest()
+    if scheme.lower() != 'bearer' or not token.strip() or not hmac.compare_digest(digest, ADMIN_TOKEN_SHA256):
+        return {
+            'statusCode': 401,
+            'headers': {**cors_headers, 'WWW-Authenticate': 'Bearer'},
+            'body': json.dumps({'error': 'Unauthorized'})
+        }
+    return None
+
+def get_idempotency_key(event, body):
+    """Derive the idempotency key for a submission, or None if suppression is disabled"""
+    
+    if not IDEMPOTENCY_TABLE:
+        return None
+    
+    header_key = get_header(event, 'Idempotency-Key')
+    if header_key:
+        return 'contact#key#' + header_key.strip()[:MAX_IDEMPOTENCY_KEY_LENGTH]
+    
+    # Identical bodies within the TTL window are treated as the same submission
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+    return 'contact#body#' + digest
+
+def claim_idempotency_key(key):
+    """Claim a key with a conditional write; returns None if claimed, else the existing record"""
+    
+    client = get_aws('dynamodb')
+    now = int(time.time())
+    try:
+        client.put_item(
+            TableName=IDEMPOTENCY_TABLE,
+            Item={
+                'idempotencyKey': {'S': key},
+                'state': {'S': 'IN_PROGRESS'},
+                'leaseExpiresAt': {'N': str(now + IDEMPOTENCY_LEASE_SECONDS)},
+                'expiresAt': {'N': str(now + IDEMPOTENCY_TTL_SECONDS)}
+            },
+            # Expired records may linger until DynamoDB's TTL sweep removes them
+            ConditionExpression=(
+                'attribute_not_exists(idempotencyKey) OR expiresAt < :now'
+                ' OR (#state = :in_progress AND leaseExpiresAt < :now)'
+            ),
+            ExpressionAttributeNames={'#state': 'state'},
+            ExpressionAttributeValues={':now': {'N': str(now)}, ':in_progress': {'S': 'IN_PROGRESS'}}
+        )
+        return None
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+    
+    response = client.get_item(
+        TableName=IDEMPOTENCY_TABLE,
+        Key={'idempotencyKey': {'S': key}},
+        ConsistentRead=True
+    )
+    return from_attribute_values(response.get('Item') or {})
+
+def complete_idempotency_key(key, status_code, response_body):
+    """Store the response to replay for duplicates of this submission"""
+    
+    get_aws('dynamodb').update_item(
+        TableName=IDEMPOTENCY_TABLE,
+        Key={'idempotencyKey': {'S': key}},
+        UpdateExpression='SET #state = :state, responseStatus = :status, responseBody = :body',
+        ExpressionAttributeNames={'#state': 'state'},
+        ExpressionAttributeValues={
+            ':state': {'S': 'COMPLETED'},
+            ':status': {'N': str(status_code)},
+            ':body': {'S': response_body}
+        }
+    )
+
+def release_idempotency_key(key):
+    """Drop a claimed key after a failure so the submission can be retried"""
+    
+    try:
+        get_aws('dynamodb').delete_item(TableName=IDEMPOTENCY_TABLE, Key={'idempotencyKey': {'S': key}})
+    except Exception as e:
+        print(f"Error releasing idempotency key: {str(e)}")
+
+def replay_idempotent_response(record, cors_headers):
+    """Build the response for a duplicate submission"""
+    
+    if record.get('state') == 'COMPLETED':
+        return {
+            'statusCode': int(record['responseStatus']),
+            'headers': {**cors_headers, 'Idempotent-Replayed': 'true'},
+            'body': record['responseBody']
+        }
+    
+    # The original request is still being processed; its claim can be taken
+    # over once the lease runs out
+    retry_after = max(int(record.get('leaseExpiresAt', 0)) - int(time.time()), 1)
+    return {
+        'statusCode': 409,
+        'headers': {**cors_headers, 'Retry-After': str(retry_after)},
+        'body': json.dumps({'error': 'Submission already in progress'})
+    }
+
+def get_contact_submissions(event, cors_headers):
+    """Get contact form submissions (for admin use)"""
+    
+    denied = require_admin(event, cors_headers)
+    if denied:
+        return denied
+    
+    try:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+        if not table_name:
+            return {
+                'statusCode': 500,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Database not configured'})
+            }
         
-        Submission ID: {submission_data['id']}
-        Timestamp: {submission_data['timestamp']}
+        table = get_aws('dynamodb_resource').Table(table_name)
         
-        Please contact the client within 24 hours to confirm the appointment.
-        """
+        # Get query parameters
+        query_params = event.get('queryStringParameters') or {}
+        try:
+            limit = min(max(int(query_params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            start_key = decode_page_token(query_params.get('nextToken'))
+            days = min(max(int(query_params['days']), 1), MAX_RECENT_DAYS) if 'days' in query_params else None
+            if days and 'status' not in query_params and start_key:
+                start_key = parse_recent_cursor(start_key)
+            elif start_key and not (
+                is_page_key(start_key, STATUS_PAGE_KEY) and start_key['status'] == query_params.get('status', 'new')
+            ):
+                raise ValueError('Invalid pagination token')
+        except (ValueError, TypeError):
+            return {
+                'statusCode': 400,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Invalid limit, days or nextToken'})
+            }
         
-        # Send email (you'll need to verify the email address in SES first)
-        ses.send_email(
-            Source='noreply@polinotary.com',  # This needs to be verified in SES
-            Destination={
-                'ToAddresses': ['info@polinotary.com']  # This needs to be verified in SES
-            },
-            Message={
-                'Subject': {
-                    'Data': subject,
-                    'Charset': 'UTF-8'
-                },
-                'Body': {
-                    'Text': {
-                        'Data': body_text,
-                        'Charset': 'UTF-8'
-                    },
-                    'Html': {
-                        'Data': body_html,
-                        'Charset': 'UTF-8'
-                    }
-                }
+        # "Last N days" across every status uses the sharded day buckets
+        if days and 'status' not in query_params:
+            with metrics.phase('dynamodbQuery'):
+                items, cursor = query_recent_submissions(
+                    table_name, days, limit, query_params.get('serviceType'), start_key
+                )
+            with metrics.phase('serialize'):
+                response_body = item_json.dumps({
+                    'submissions': items,
+                    'count': len(items),
+                    'nextToken': encode_page_token(cursor)
+                })
+            return {
+                'statusCode': 200,
+                'headers': cors_headers,
+                'body': response_body
             }
-        )
+        
+        # Newest-first query over one status partition, bounded by the date range.
+        # Without ?status= only 'new' submissions are listed; ?days= (with no
+        # status) is the listing that spans every status.
+        key_condition = Key('status').eq(query_params.get('status', 'new'))
+        date_from = query_params.get('from')
+        date_to = query_params.get('to')
+        if date_to and 'T' not in date_to:
+            # A bare date covers that whole day, not just its first instant
+            date_to += 'T23:59:59.999999'
+        if date_from and date_to:
+            key_condition &= Key('timestamp').between(date_from, date_to)
+        elif date_from:
+            key_condition &= Key('timestamp').gte(date_from)
+        elif date_to:
+            key_condition &= Key('timestamp').lte(date_to)
+        
+        query_kwargs = {
+            'IndexName': STATUS_INDEX,
+            'KeyConditionExpression': key_condition,
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if query_params.get('serviceType'):
+            # Applied after the key condition, so a page may hold fewer than limit items
+            query_kwargs['FilterExpression'] = Attr('serviceType').eq(query_params['serviceType'])
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+        
+        with metrics.phase('dynamodbQuery'):
+            response = table.query(**query_kwargs)
+        
+        items = response.get('Items', [])
+        
+        with metrics.phase('serialize'):
+            response_body = item_json.dumps({
+                'submissions': items,
+                'count': len(items),
+                'nextToken': encode_page_token(response.get('LastEvaluatedKey'))
+            })
+        return {
+            'statusCode': 200,
+            'headers': cors_headers,
+            'body': response_body
+        }
         
     except Exception as e:
-        print(f"Error sending notification email: {str(e)}")
-        # Don't fail the request if email fails
+        print(f"Error getting submissions: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': cors_headers,
+            'body': json.dumps({'error': 'Failed to retrieve submissions'})
+        }
 
-def send_confirmation_email(submission_data):
-    """Send confirmation email to client"""
+def time_bucket(moment, shard):
+    """Build the sharded day bucket key for a moment in time"""
+    
+    return f"{moment.strftime('%Y-%m-%d')}#{shard}"
+
+def query_bucket(table_name, bucket, limit, service_type=None, start_key=None):
+    """Read up to limit items from one day bucket shard, newest first; returns (items, exhausted)"""
+    
+    query_kwargs = {
+        'TableName': table_name,
+        'IndexName': TIME_BUCKET_INDEX,
+        'KeyConditionExpression': Key('timeBucket').eq(bucket),
+        'ScanIndexForward': False,
+        'Limit': limit
+    }
+    if service_type:
+        query_kwargs['FilterExpression'] = Attr('serviceType').eq(service_type)
+    if start_key:
+        query_kwargs['ExclusiveStartKey'] = start_key
+    
+    # The low-level client is thread-safe, unlike Table resources
+    client = get_aws('dynamodb_resource').meta.client
+    items = []
+    while len(items) < limit:
+        response = client.query(**query_kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items[:limit], len(items) <= limit
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items[:limit], False
+
+def query_recent_submissions(table_name, days, limit, service_type=None, cursor=None):
+    """
+    Get the newest submissions from the last N days by fanning out across bucket shards.
+    
+    Returns the page plus a cursor for the next one (None once the window is
+    exhausted). The cursor pins the first day of the window and holds the day
+    offset being read with, per shard, the key of the last item returned and
+    whether that shard is finished for the day.
+    """
+    
+    if cursor:
+        today = datetime.strptime(cursor['day'], '%Y-%m-%d')
+        offset = cursor['offset']
+        start_keys = list(cursor['keys'])
+        done = set(cursor['done'])
+    else:
+        today = datetime.utcnow()
+        offset = 0
+        start_keys = [None] * TIME_BUCKET_SHARDS
+        done = set()
+    items = []
+    
+    # Walk back one day at a time, stopping as soon as newer days fill the page
+    while offset < days and len(items) < limit:
+        day = today - timedelta(days=offset)
+        need = limit - len(items)
+        shards = [shard for shard in range(TIME_BUCKET_SHARDS) if shard not in done]
+        shard_results = list(query_executor.map(
+            lambda shard: query_bucket(table_name, time_bucket(day, shard), need, service_type, start_keys[shard]),
+            shards
+        ))
+        
+        # Each shard is already newest-first, so a k-way merge keeps the order
+        tagged = [[(shard, item) for item in shard_items] for shard, (shard_items, _) in zip(shards, shard_results)]
+        merged = heapq.merge(*tagged, key=lambda entry: entry[1]['timestamp'], reverse=True)
+        taken = dict.fromkeys(shards, 0)
+        for _, (shard, item) in zip(range(need), merged):
+            items.append(item)
+            taken[shard] += 1
+            start_keys[shard] = {name: item[name] for name in ('id', 'timeBucket', 'timestamp')}
+        for shard, (shard_items, exhausted) in zip(shards, shard_results):
+            if exhausted and taken[shard] == len(shard_items):
+                done.add(shard)
+        
+        if len(done) == TIME_BUCKET_SHARDS:
+            offset += 1
+            start_keys = [None] * TIME_BUCKET_SHARDS
+            done = set()
+    
+    if offset >= days:
+        return items, None
+    return items, {
+        'day': today.strftime('%Y-%m-%d'),
+        'offset': offset,
+        'keys': start_keys,
+        'done': sorted(done)
+    }
+
+def parse_recent_cursor(key):
+    """Check that a decoded page token is a cursor from query_recent_submissions"""
     
     try:
-        subject = "Appointment Request Received - Poli Notary"
-        
-        body_html = f"""
-        <html>
-        <head></head>
-        <body>
-            <h2>Thank You for Your Appointment Request</h2>
-            <p>Dear {submission_data['fullName']},</p>
-            
-            <p>Thank you for choosing Poli Notary for your notarization needs. We have received your appointment request and will contact you within 24 hours to confirm your booking.</p>
-            
-            <h3>Your Request Details:</h3>
-            <ul>
-                <li><strong>Service Type:</strong> {submission_data['serviceType']}</li>
-                <li><strong>Preferred Date:</strong> {submission_data.get('preferredDate', 'Not specified')}</li>
-                <li><strong>Preferred Time:</strong> {submission_data.get('preferredTime', 'Not specified')}</li>
-                <li><strong>Reference ID:</strong> {submission_data['id']}</li>
-            </ul>
-            
-            <h3>What's Next?</h3>
-            <p>Our team will review your request and contact you at {submission_data['phone']} or {submission_data['email']} to:</p>
-            <ul>
-                <li>Confirm your appointment details</li>
-                <li>Discuss any specific requirements</li>
-                <li>Provide pricing information</li>
-                <li>Answer any questions you may have</li>
-            </ul>
+        datetime.strptime(key['day'], '%Y-%m-%d')
+        valid = (
+            isinstance(key['offset'], int) and key['offset'] >= 0
+            and len(key['keys']) == TIME_BUCKET_SHARDS
+            and all(start_key is None or is_page_key(start_key, BUCKET_PAGE_KEY) for start_key in key['keys'])
+            and all(shard in range(TIME_BUCKET_SHARDS) for shard in key['done'])
+        )
+    except (KeyError, TypeError):
+        valid = False
+    if not valid:
+        raise ValueError('Invalid pagination token')
+    return key
+
+def is_page_key(key, attributes):
+    """Whether a decoded token holds exactly the given key attributes, all strings"""
+    
+    return (
+        isinstance(key, dict) and set(key) == set(attributes)
+        and all(isinstance(value, str) for value in key.values())
+    )
+
+def encode_page_token(last_evaluated_key):
+    """Turn a DynamoDB LastEvaluatedKey into an opaque pagination token"""
+    
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode('utf-8')).decode('ascii')
+
+def decode_page_token(token):
+    """Turn a pagination token back into an ExclusiveStartKey"""
+    
+    if not token:
+        return None
+    key = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    if not isinstance(key, dict):
+        raise ValueError('Invalid pagination token')
+    return key
+
+def export_contact_submissions(event, cors_headers):
+    """Export every contact submission as NDJSON or CSV (for admin use)"""
+    
+    denied = require_admin(event, cors_headers)
+    if denied:
+        return denied
+    
+    # Never let CloudFront or a browser keep a copy of the export
+    cors_headers = {**cors_headers, 'Cache-Control': 'no-store'}
+    try:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+        if not table_name:
+            return {
+                'statusCode': 500,
+                'headers': cors_headers,
+                'body': json.dumps({'error': 'Database not configured'})
+            }
+        
+        query_params = event.get('queryStringParameters') or {}
+        export_format = query_params.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return {
+                'statusCode': 400,
+                'headers': cors_headers,
+                'body': json.dumps({'error': f"Unsupported format: {export_format}"})
+            }
+        
+        content_type = EXPORT_FORMATS[export_format]
+        filename = f"contact-submissions-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.{export_format}"
+        disposition = f'attachment; filename="{filename}"'
+        
+        # Held in memory up to the inline limit, then rolled over to /tmp
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_INLINE_MAX_BYTES) as output:
+            count = write_submissions_export(table_name, export_format, output)
+            size = output.tell()
+            output.seek(0)
             
-            <h3>Need Immediate Assistance?</h3>
-            <p>If you have an urgent request or need to speak with us immediately, please call us at (555) 123-4567.</p>
+            # Encoding only grows the body, so the raw size rules out most large exports cheaply
+            if size <= EXPORT_INLINE_MAX_BYTES:
+                body = output.read().decode('utf-8')
+                if len(json.dumps(body)) <= EXPORT_INLINE_MAX_BYTES:
+                    return {
+                        'statusCode': 200,
+                        'headers': {
+                            **cors_headers,
+                            'Content-Type': content_type,
+                            'Content-Disposition': disposition
+                        },
+                        'body': body
+                    }
+                output.seek(0)
             
-            <p>Thank you for choosing Poli Notary!</p>
+            if not EXPORT_BUCKET:
+                return {
+                    'statusCode': 413,
+                    'headers': cors_headers,
+                    'body': json.dumps({'error': 'Export too large to return inline'})
+                }
             
-            <p>Best regards,<br>
-            The Poli Notary Team<br>
-            (555) 123-4567<br>
-            info@polinotary.com</p>
-        </body>
-        </html>
-        """
+            # upload_fileobj switches to a multipart upload for large files
+            key = f"exports/{filename}"
+            s3 = get_aws('s3')
+            s3.upload_fileobj(output, EXPORT_BUCKET, key, ExtraArgs={
+                'ContentType': content_type,
+                'ContentDisposition': disposition
+            })
+            url = s3.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': EXPORT_BUCKET, 'Key': key},
+                ExpiresIn=EXPORT_LINK_EXPIRES
+            )
         
-        body_text = f"""
-        Thank You for Your Appointment Request
+        return {
+            'statusCode': 200,
+            'headers': cors_headers,
+            'body': json.dumps({
+                'url': url,
+                'format': export_format,
+                'count': count,
+                'bytes': size,
+                'expiresIn': EXPORT_LINK_EXPIRES
+            })
+        }
         
-        Dear {submission_data['fullName']},
+    except Exception as e:
+        print(f"Error exporting submissions: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': cors_headers,
+            'body': json.dumps({'error': 'Failed to export submissions'})
+        }
+
+def write_submissions_export(table_name, export_format, output):
+    """Write every submission to a binary stream as NDJSON or CSV and return the item count"""
+    
+    if export_format == 'csv':
+        header = io.StringIO()
+        csv.writer(header).writerow(EXPORT_CSV_FIELDS)
+        output.write(header.getvalue().encode('utf-8'))
+    
+    # Segments write whole pages under the lock, so memory stays bounded by the page size
+    lock = threading.Lock()
+    
+    def write_page(items, segment):
+        chunk = io.StringIO()
+        writer = csv.writer(chunk)
+        for raw_item in items:
+            item = from_attribute_values(raw_item)
+            if export_format == 'csv':
+                writer.writerow([csv_cell(item.get(field, '')) for field in EXPORT_CSV_FIELDS])
+            else:
+                item_json.dump(item, chunk)
+                chunk.write('\n')
+        data = chunk.getvalue().encode('utf-8')
+        with lock:
+            output.write(data)
+    
+    checkpoint = scan_engine.parallel_scan(
+        get_aws('dynamodb_scan'), table_name, write_page,
+        total_segments=EXPORT_SCAN_SEGMENTS,
+        scan_kwargs={'Limit': EXPORT_PAGE_SIZE}
+    )
+    return scan_engine.scanned_count(checkpoint)
+
+def csv_cell(value):
+    """Neutralise spreadsheet formulas in an exported CSV value"""
+    
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def dispatch_submission_emails(submission_data, durable):
+    """Queue or send the emails for a new submission according to EMAIL_DISPATCH_MODE"""
+    
+    if EMAIL_DISPATCH_MODE == 'stream' and durable:
+        # The INSERT on the table's stream triggers email_stream_handler
+        return
+    if EMAIL_DISPATCH_MODE == 'memory':
+        local_email_queue.append(submission_data)
+        return
+    send_submission_emails(submission_data)
+
+def send_submission_emails(submission_data, raise_errors=False):
+    """
+    Send the notification and confirmation emails for a submission.
+    
+    With raise_errors, a failed or timed-out send is raised instead of only
+    logged, so the stream worker can hand the record back for a retry.
+    """
+    
+    # Send the notification and client confirmation emails concurrently
+    futures = [
+        email_executor.submit(metrics.bind(send_notification_email), submission_data, raise_errors),
+        email_executor.submit(metrics.bind(send_confirmation_email), submission_data, raise_errors)
+    ]
+    
+    _, not_done = wait(futures, timeout=EMAIL_SEND_TIMEOUT)
+    if not_done:
+        message = f"Timed out waiting for {len(not_done)} email send(s) for submission {submission_data.get('id')}"
+        print(message)
+        if raise_errors:
+            raise TimeoutError(message)
+    if raise_errors:
+        for future in futures:
+            future.result()
+
+def drain_local_email_queue():
+    """Send every email queued in memory mode, returning how many submissions were processed"""
+    
+    processed = 0
+    while local_email_queue:
+        send_submission_emails(local_email_queue.popleft())
+        processed += 1
+    return processed
+
+@metrics.instrument('email_worker')
+def email_stream_handler(event, context):
+    """
+    Email worker Lambda triggered by the contact table's DynamoDB stream
+    """
+    
+    failures = []
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'INSERT':
+            continue
+        try:
+            new_image = record['dynamodb']['NewImage']
+            submission_data = {
+                key: item_deserializer.deserialize(value) for key, value in new_image.items()
+            }
+            if str(submission_data.get('source', '')).startswith(IMPORT_SOURCE_PREFIX):
+                continue
+            send_submission_emails(submission_data, raise_errors=True)
+        except Exception as e:
+            print(f"Error processing stream record: {str(e)}")
+            failures.append({'itemIdentifier': record['dynamodb'].get('SequenceNumber')})
+            # The stream is retried from this record onwards, so sending the
+            # later ones now would only duplicate their emails
+            break
+    
+    metrics.current().set(records=len(event.get('Records', [])), failures=len(failures))
+    # The event source mapping resumes the batch from the first failed record
+    return {'batchItemFailures': failures}
+
+class TokenBucket:
+    """Token bucket that paces sends against a per-second rate budget"""
+    
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """Take tokens, sleeping off any shortfall; returns the time spent waiting"""
         
-        Thank you for choosing Poli Notary for your notarization needs. We have received your appointment request and will contact you within 24 hours to confirm your booking.
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Requests larger than the bucket run into debt that later callers wait out
+            self.tokens -= tokens
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
         
-        Your Request Details:
-        Service Type: {submission_data['serviceType']}
-        Preferred Date: {submission_data.get('preferredDate', 'Not specified')}
-        Preferred Time: {submission_data.get('preferredTime', 'Not specified')}
-        Reference ID: {submission_data['id']}
+        if wait_time:
+            self.sleep(wait_time)
+        return wait_time
+    
+    def try_acquire(self, tokens=1):
+        """Take tokens only if they are available now; returns whether they were taken"""
         
-        What's Next?
-        Our team will review your request and contact you at {submission_data['phone']} or {submission_data['email']} to:
-        - Confirm your appointment details
-        - Discuss any specific requirements
-        - Provide pricing information
-        - Answer any questions you may have
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < tokens:
+                return False
+            self.tokens -= tokens
+            return True
+
+def client_ip(event):
+    """
+    Return the viewer's IP address.
+    
+    Behind CloudFront, requestContext.identity.sourceIp is the edge server
+    shared by every visitor it serves. For requests proven to come through
+    CloudFront, CloudFront-Viewer-Address is used when forwarded; otherwise
+    the X-Forwarded-For entry CloudFront appended: the last one that is not
+    the connecting address, since earlier entries are whatever the client
+    sent. Any other request is keyed on sourceIp.
+    """
+    
+    source_ip = ((event.get('requestContext') or {}).get('identity') or {}).get('sourceIp')
+    if not is_from_cloudfront(event):
+        return source_ip
+    
+    viewer_address = get_header(event, 'CloudFront-Viewer-Address')
+    if viewer_address:
+        # "ip:port", with IPv6 addresses unbracketed
+        return viewer_address.rsplit(':', 1)[0].strip('[]')
+    
+    forwarded = [part.strip() for part in (get_header(event, 'X-Forwarded-For') or '').split(',') if part.strip()]
+    while forwarded and forwarded[-1] == source_ip:
+        forwarded.pop()
+    return forwarded[-1] if forwarded else source_ip
+
+def is_from_cloudfront(event):
+    """Whether the request carries the origin secret CloudFront adds"""
+    
+    supplied = get_header(event, 'X-Origin-Verify')
+    return bool(ORIGIN_VERIFY_SECRET and supplied) and hmac.compare_digest(
+        supplied.encode('utf-8'), ORIGIN_VERIFY_SECRET.encode('utf-8')
+    )
+
+def rate_limit_subjects(event, body):
+    """Yield (scope, value) pairs identifying the client of a submission"""
+    
+    source_ip = client_ip(event)
+    if source_ip:
+        yield 'ip', source_ip
+    email = body.get('email')
+    if isinstance(email, str) and email:
+        yield 'email', email.strip().lower()
+
+def check_local_rate_limit(key, limit, window):
+    """In-process token bucket per key; False once this container alone has seen too many requests"""
+    
+    bucket = local_rate_buckets.get(key)
+    if bucket is None:
+        bucket = local_rate_buckets[key] = TokenBucket(limit / window, capacity=limit)
+        if len(local_rate_buckets) > MAX_LOCAL_RATE_BUCKETS:
+            local_rate_buckets.popitem(last=False)
+    else:
+        local_rate_buckets.move_to_end(key)
+    return bucket.try_acquire()
+
+def check_rate_limits(event, body):
+    """Count a submission against every per-client limit; returns Retry-After seconds if throttled"""
+    
+    if not RATE_LIMIT_TABLE:
+        return 0
+    
+    now = int(time.time())
+    for scope, value in rate_limit_subjects(event, body):
+        for limit_scope, limit, window in RATE_LIMITS:
+            if limit_scope != scope:
+                continue
+            window_start = now - now % window
+            retry_after = window_start + window - now
+            key = f"{scope}#{value}"
+            
+            if not check_local_rate_limit(key, limit, window):
+                return retry_after
+            
+            # Atomic fixed-window counter shared by every container
+            try:
+                response = get_aws('dynamodb').update_item(
+                    TableName=RATE_LIMIT_TABLE,
+                    Key={'limitKey': {'S': f"{key}#{window_start}"}},
+                    UpdateExpression='ADD hits :one SET expiresAt = if_not_exists(expiresAt, :expires)',
+                    ExpressionAttributeValues={
+                        ':one': {'N': '1'},
+                        ':expires': {'N': str(window_start + window * 2)}
+                    },
+                    ReturnValues='UPDATED_NEW'
+                )
+            except Exception as e:
+                # Fail open: throttling must never block legitimate submissions
+                print(f"Error checking rate limit: {str(e)}")
+                continue
+            
+            if int(response['Attributes']['hits']['N']) > limit:
+                return retry_after
+    
+    return 0
+
+def sync_ses_template(name):
+    """Create or update the SES copy of a registered template once per container"""
+    
+    ses_name = SES_TEMPLATE_PREFIX + name
+    if ses_name in synced_ses_templates:
+        return ses_name
+    
+    template = ses_template(name, ses_name)
+    try:
+        get_aws('ses').update_template(Template=template)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'TemplateDoesNotExist':
+            raise
+        get_aws('ses').create_template(Template=template)
+    
+    synced_ses_templates.add(ses_name)
+    return ses_name
+
+def send_bulk_templated_emails(template_name, recipients, default_data=None, rate_limiter=None):
+    """
+    Send a registered template to many recipients with SES bulk templated sends.
+    
+    Each recipient is a dict with an 'email' and optional per-recipient 'data'.
+    Returns per-recipient results in the same order as the recipients.
+    """
+    
+    ses_name = sync_ses_template(template_name)
+    rate_limiter = rate_limiter or TokenBucket(SES_MAX_SEND_RATE)
+    default_data = json.dumps(default_data or {})
+    results = []
+    
+    for start in range(0, len(recipients), BULK_EMAIL_BATCH_SIZE):
+        batch = recipients[start:start + BULK_EMAIL_BATCH_SIZE]
+        rate_limiter.acquire(len(batch))
         
-        Need Immediate Assistance?
-        If you have an urgent request or need to speak with us immediately, please call us at (555) 123-4567.
+        try:
+            response = get_aws('ses').send_bulk_templated_email(
+                Source='noreply@polinotary.com',  # This needs to be verified in SES
+                Template=ses_name,
+                DefaultTemplateData=default_data,
+                Destinations=[
+                    {
+                        'Destination': {'ToAddresses': [recipient['email']]},
+                        'ReplacementTemplateData': json.dumps(recipient.get('data') or {})
+                    }
+                    for recipient in batch
+                ]
+            )
+            statuses = response.get('Status', [])
+        except Exception as e:
+            print(f"Error sending bulk email batch: {str(e)}")
+            statuses = [{'Status': 'Failed', 'Error': str(e)}] * len(batch)
         
-        Thank you for choosing Poli Notary!
+        for recipient, status in zip(batch, statuses):
+            results.append({
+                'email': recipient['email'],
+                'status': status.get('Status'),
+                'messageId': status.get('MessageId'),
+                'error': status.get('Error')
+            })
+    
+    return results
+
+def broadcast_handler(event, context):
+    """
+    Admin broadcast Lambda: sends one template to many clients, e.g. daily reminders.
+    
+    Expects {"template": "reminder", "recipients": [{"email": ..., "data": {...}}], "defaultData": {...}}
+    Recipients whose address the contact form would reject are skipped and
+    listed under 'invalid' instead of failing their whole SES batch.
+    """
+    
+    recipients = []
+    invalid = []
+    for index, recipient in enumerate(event.get('recipients') or []):
+        if not isinstance(recipient, dict):
+            invalid.append({'index': index, 'email': None, 'error': 'Recipient must be an object'})
+            continue
+        error = validate_email(recipient.get('email'))
+        if error:
+            invalid.append({'index': index, 'email': recipient.get('email'), 'error': error})
+        else:
+            recipients.append(recipient)
+    
+    results = send_bulk_templated_emails(
+        event.get('template', 'reminder'), recipients, event.get('defaultData')
+    ) if recipients else []
+    sent = sum(1 for result in results if result['status'] == 'Success')
+    
+    return {
+        'sent': sent,
+        'failed': len(results) - sent,
+        'invalid': invalid,
+        'results': results
+    }
+
+def backfill_time_buckets_job(table_name, params):
+    """Maintenance job: add the timeBucket key to submissions written before it existed"""
+    
+    client = get_aws('dynamodb_scan')
+    
+    def process(items, segment):
+        for item in items:
+            try:
+                shard = uuid.UUID(item['id']['S']).int % TIME_BUCKET_SHARDS
+            except ValueError:
+                shard = 0
+            bucket = time_bucket(datetime.fromisoformat(item['timestamp']['S']), shard)
+            try:
+                client.update_item(
+                    TableName=table_name,
+                    Key={'id': item['id']},
+                    UpdateExpression='SET timeBucket = :bucket',
+                    ConditionExpression='attribute_not_exists(timeBucket)',
+                    ExpressionAttributeValues={':bucket': {'S': bucket}}
+                )
+            except ClientError as e:
+                # Already backfilled by an earlier, replayed page
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+    
+    scan_kwargs = {
+        'FilterExpression': 'attribute_not_exists(timeBucket)',
+        'ProjectionExpression': 'id, #ts',
+        'ExpressionAttributeNames': {'#ts': 'timestamp'}
+    }
+    return process, scan_kwargs
+
+def migrate_status_job(table_name, params):
+    """Maintenance job: move every submission in one status to another"""
+    
+    from_status, to_status = params['from'], params['to']
+    client = get_aws('dynamodb_scan')
+    
+    def process(items, segment):
+        for item in items:
+            try:
+                client.update_item(
+                    TableName=table_name,
+                    Key={'id': item['id']},
+                    UpdateExpression='SET #status = :to',
+                    ConditionExpression='#status = :from',
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={':from': {'S': from_status}, ':to': {'S': to_status}}
+                )
+            except ClientError as e:
+                # Changed by someone else since the scan read it
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+    
+    scan_kwargs = {
+        'FilterExpression': '#status = :from',
+        'ProjectionExpression': 'id',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':from': {'S': from_status}}
+    }
+    return process, scan_kwargs
+
+# Job name -> factory returning (page callback, extra scan arguments). Callbacks
+# must be idempotent: pages after the last saved checkpoint are replayed on resume.
+MAINTENANCE_JOBS = {
+    'backfill-time-buckets': backfill_time_buckets_job,
+    'migrate-status': migrate_status_job
+}
+
+def maintenance_handler(event, context):
+    """
+    Maintenance Lambda: runs a bulk job over the contact table with a parallel scan.
+    
+    Expects {"job": "migrate-status", "params": {"from": "new", "to": "open"}}. A run
+    stops shortly before the Lambda timeout; invoke again with the returned
+    checkpoint ({"job": ..., "params": ..., "checkpoint": {...}}) until complete is true.
+    """
+    
+    job_name = event.get('job')
+    if job_name not in MAINTENANCE_JOBS:
+        raise ValueError(f"Unknown maintenance job: {job_name}")
+    table_name = os.environ['DYNAMODB_TABLE']
+    process, scan_kwargs = MAINTENANCE_JOBS[job_name](table_name, event.get('params') or {})
+    
+    deadline = None
+    if context is not None:
+        remaining = context.get_remaining_time_in_millis() / 1000
+        deadline = time.monotonic() + remaining - MAINTENANCE_DEADLINE_MARGIN
+    
+    def log_checkpoint(checkpoint):
+        # Logged so a crashed run can still be resumed from CloudWatch
+        print(json.dumps({'job': job_name, 'scanned': scan_engine.scanned_count(checkpoint), 'checkpoint': checkpoint}))
+    
+    checkpoint = scan_engine.parallel_scan(
+        get_aws('dynamodb_scan'), table_name, process,
+        total_segments=min(int(event.get('segments', MAINTENANCE_SEGMENTS)), MAX_SCAN_SEGMENTS),
+        checkpoint=event.get('checkpoint'),
+        scan_kwargs=scan_kwargs,
+        deadline=deadline,
+        on_checkpoint=log_checkpoint
+    )
+    
+    return {
+        'job': job_name,
+        'params': event.get('params') or {},
+        'complete': scan_engine.scan_complete(checkpoint),
+        'scanned': scan_engine.scanned_count(checkpoint),
+        'checkpoint': checkpoint
+    }
+
+def send_notification_email(submission_data, raise_errors=False):
+    """Send notification email to Poli Notary"""
+    
+    try:
+        email = render_email('notification', submission_data)
         
-        Best regards,
-        The Poli Notary Team
-        (555) 123-4567
-        info@polinotary.com
-        """
+        # Send email (you'll need to verify the email address in SES first)
+        with metrics.phase('sesNotification'):
+            send_email('info@polinotary.com', email)  # This needs to be verified in SES
+            
+    except Exception as e:
+        print(f"Error sending notification email: {str(e)}")
+        # Don't fail the request if email fails; the stream worker retries instead
+        if raise_errors:
+            raise
+
+def send_confirmation_email(submission_data, raise_errors=False):
+    """Send confirmation email to client"""
+    
+    try:
+        email = render_email('confirmation', submission_data)
         
         # Send confirmation email to client
-        ses.send_email(
-            Source='noreply@polinotary.com',  # This needs to be verified in SES
-            Destination={
-                'ToAddresses': [submission_data['email']]
+        with metrics.phase('sesConfirmation'):
+            send_email(submission_data['email'], email)
+            
+    except Exception as e:
+        print(f"Error sending confirmation email: {str(e)}")
+        # Don't fail the request if email fails; the stream worker retries instead
+        if raise_errors:
+            raise
+
+def send_email(to_address, email):
+    """Send a rendered email through SES"""
+    
+    get_aws('ses').send_email(
+        Source='noreply@polinotary.com',  # This needs to be verified in SES
+        Destination={
+            'ToAddresses': [to_address]
+        },
+        Message={
+            'Subject': {
+                'Data': email['subject'],
+                'Charset': 'UTF-8'
             },
-            Message={
-                'Subject': {
-                    'Data': subject,
+            'Body': {
+                'Text': {
+                    'Data': email['text'],
                     'Charset': 'UTF-8'
                 },
-                'Body': {
-                    'Text': {
-                        'Data': body_text,
-                        'Charset': 'UTF-8'
-                    },
-                    'Html': {
-                        'Data': body_html,
-                        'Charset': 'UTF-8'
-                    }
+                'Html': {
+                    'Data': email['html'],
+                    'Charset': 'UTF-8'
                 }
             }
-        )
-        
-    except Exception as e:
-        print(f"Error sending confirmation email: {str(e)}")
-        # Don't fail the request if email fails
+        }
+    )
 
+# Route table, compiled once per container
+ROUTER = Router()
+ROUTER.add('POST', '/api/contact', handle_contact_submission)
+ROUTER.add('GET', '/api/contact', get_contact_submissions)
+ROUTER.add('GET', '/api/contact/export', export_contact_submissions)
+ROUTER.add('POST', '/api/contact/import', import_contact_submissions)
+ROUTER.add('GET', '/api/contact/{submission_id}', get_contact_submission)
 
+record_init_phase('module', MODULE_LOAD_STARTED)
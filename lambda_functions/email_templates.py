@@ -0,0 +1,246 @@
+import html
+import re
+from collections import namedtuple
+from textwrap import dedent
+
+# {{ field }} or {{ field | fallback text }}; the fallback is used when the value is empty
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*(?:\|\s*([^}]*?)\s*)?\}\}')
+
+EmailTemplate = namedtuple('EmailTemplate', ['subject', 'html', 'text', 'sources'])
+
+def compile_template(source, escape=False):
+    """Parse a template once into a render function over precomputed fragments"""
+    
+    literals = []
+    fields = []
+    position = 0
+    for match in PLACEHOLDER.finditer(source):
+        literals.append(source[position:match.start()])
+        fields.append((match.group(1), match.group(2) or ''))
+        position = match.end()
+    literals.append(source[position:])
+    
+    head = literals[0]
+    steps = list(zip(fields, literals[1:]))
+    convert = html.escape if escape else str
+    
+    def render(context):
+        parts = [head]
+        for (field, fallback), literal in steps:
+            value = context.get(field)
+            parts.append(convert(str(value)) if value else fallback)
+            parts.append(literal)
+        return ''.join(parts)
+    
+    return render
+
+def compile_email(subject, body_html, body_text):
+    """Compile the subject, HTML and text parts of an email template"""
+    
+    sources = {
+        'subject': subject,
+        'html': HTML_LAYOUT_HEAD + body_html + HTML_LAYOUT_FOOT,
+        'text': dedent(body_text).strip() + '\n'
+    }
+    return EmailTemplate(
+        subject=compile_template(sources['subject']),
+        html=compile_template(sources['html'], escape=True),
+        text=compile_template(sources['text']),
+        sources=sources
+    )
+
+def render_email(name, context):
+    """Render a registered email template into its subject, HTML and text bodies"""
+    
+    template = TEMPLATES[name]
+    return {
+        'subject': template.subject(context),
+        'html': template.html(context),
+        'text': template.text(context)
+    }
+
+def to_ses_syntax(source):
+    """Translate a template into SES (Handlebars) syntax, mapping fallbacks to if/else blocks"""
+    
+    def replace(match):
+        field, fallback = match.group(1), match.group(2)
+        if fallback:
+            return '{{#if ' + field + '}}{{' + field + '}}{{else}}' + fallback + '{{/if}}'
+        return '{{' + field + '}}'
+    
+    return PLACEHOLDER.sub(replace, source)
+
+def ses_template(name, ses_name):
+    """Build the SES Template definition for a registered template"""
+    
+    sources = TEMPLATES[name].sources
+    return {
+        'TemplateName': ses_name,
+        'SubjectPart': to_ses_syntax(sources['subject']),
+        'HtmlPart': to_ses_syntax(sources['html']),
+        'TextPart': to_ses_syntax(sources['text'])
+    }
+
+# Shared layout pieces
+HTML_LAYOUT_HEAD = """<html>
+<head></head>
+<body>
+"""
+
+HTML_LAYOUT_FOOT = """
+</body>
+</html>
+"""
+
+HTML_SIGNATURE = """
+<p>Best regards,<br>
+The Poli Notary Team<br>
+(555) 123-4567<br>
+info@polinotary.com</p>
+"""
+
+TEXT_SIGNATURE = """
+        Best regards,
+        The Poli Notary Team
+        (555) 123-4567
+        info@polinotary.com
+"""
+
+HTML_APPOINTMENT_DETAILS = """
+    <li><strong>Service Type:</strong> {{ serviceType }}</li>
+    <li><strong>Preferred Date:</strong> {{ preferredDate | Not specified }}</li>
+    <li><strong>Preferred Time:</strong> {{ preferredTime | Not specified }}</li>"""
+
+TEXT_APPOINTMENT_DETAILS = """
+        Service Type: {{ serviceType }}
+        Preferred Date: {{ preferredDate | Not specified }}
+        Preferred Time: {{ preferredTime | Not specified }}"""
+
+NOTIFICATION = compile_email(
+    subject="New Appointment Request - {{ serviceType }}",
+    body_html="""
+<h2>New Appointment Request</h2>
+<p>You have received a new appointment request through your website.</p>
+
+<h3>Client Information:</h3>
+<ul>
+    <li><strong>Name:</strong> {{ fullName }}</li>
+    <li><strong>Email:</strong> {{ email }}</li>
+    <li><strong>Phone:</strong> {{ phone }}</li>""" + HTML_APPOINTMENT_DETAILS + """
+</ul>
+
+<h3>Additional Details:</h3>
+<p>{{ additionalDetails | None provided }}</p>
+
+<h3>Submission Details:</h3>
+<ul>
+    <li><strong>Submission ID:</strong> {{ id }}</li>
+    <li><strong>Timestamp:</strong> {{ timestamp }}</li>
+    <li><strong>Source:</strong> {{ source }}</li>
+</ul>
+
+<p>Please contact the client within 24 hours to confirm the appointment.</p>""",
+    body_text="""
+        New Appointment Request
+        
+        Client Information:
+        Name: {{ fullName }}
+        Email: {{ email }}
+        Phone: {{ phone }}""" + TEXT_APPOINTMENT_DETAILS + """
+        
+        Additional Details:
+        {{ additionalDetails | None provided }}
+        
+        Submission ID: {{ id }}
+        Timestamp: {{ timestamp }}
+        
+        Please contact the client within 24 hours to confirm the appointment.
+        """
+)
+
+CONFIRMATION = compile_email(
+    subject="Appointment Request Received - Poli Notary",
+    body_html="""
+<h2>Thank You for Your Appointment Request</h2>
+<p>Dear {{ fullName }},</p>
+
+<p>Thank you for choosing Poli Notary for your notarization needs. We have received your appointment request and will contact you within 24 hours to confirm your booking.</p>
+
+<h3>Your Request Details:</h3>
+<ul>""" + HTML_APPOINTMENT_DETAILS + """
+    <li><strong>Reference ID:</strong> {{ id }}</li>
+</ul>
+
+<h3>What's Next?</h3>
+<p>Our team will review your request and contact you at {{ phone }} or {{ email }} to:</p>
+<ul>
+    <li>Confirm your appointment details</li>
+    <li>Discuss any specific requirements</li>
+    <li>Provide pricing information</li>
+    <li>Answer any questions you may have</li>
+</ul>
+
+<h3>Need Immediate Assistance?</h3>
+<p>If you have an urgent request or need to speak with us immediately, please call us at (555) 123-4567.</p>
+
+<p>Thank you for choosing Poli Notary!</p>
+""" + HTML_SIGNATURE,
+    body_text="""
+        Thank You for Your Appointment Request
+        
+        Dear {{ fullName }},
+        
+        Thank you for choosing Poli Notary for your notarization needs. We have received your appointment request and will contact you within 24 hours to confirm your booking.
+        
+        Your Request Details:""" + TEXT_APPOINTMENT_DETAILS + """
+        Reference ID: {{ id }}
+        
+        What's Next?
+        Our team will review your request and contact you at {{ phone }} or {{ email }} to:
+        - Confirm your appointment details
+        - Discuss any specific requirements
+        - Provide pricing information
+        - Answer any questions you may have
+        
+        Need Immediate Assistance?
+        If you have an urgent request or need to speak with us immediately, please call us at (555) 123-4567.
+        
+        Thank you for choosing Poli Notary!
+        """ + TEXT_SIGNATURE
+)
+
+REMINDER = compile_email(
+    subject="Appointment Reminder - Poli Notary",
+    body_html="""
+<h2>Your Upcoming Appointment</h2>
+<p>Dear {{ fullName }},</p>
+
+<p>This is a friendly reminder of your upcoming appointment with Poli Notary.</p>
+
+<h3>Appointment Details:</h3>
+<ul>""" + HTML_APPOINTMENT_DETAILS + """
+    <li><strong>Reference ID:</strong> {{ id | Not available }}</li>
+</ul>
+
+<p>Please bring a valid government-issued photo ID and leave your documents unsigned until we meet. If you need to reschedule, call us at (555) 123-4567.</p>
+""" + HTML_SIGNATURE,
+    body_text="""
+        Your Upcoming Appointment
+        
+        Dear {{ fullName }},
+        
+        This is a friendly reminder of your upcoming appointment with Poli Notary.
+        
+        Appointment Details:""" + TEXT_APPOINTMENT_DETAILS + """
+        Reference ID: {{ id | Not available }}
+        
+        Please bring a valid government-issued photo ID and leave your documents unsigned until we meet. If you need to reschedule, call us at (555) 123-4567.
+        """ + TEXT_SIGNATURE
+)
+
+# Compiled once per container; add new templates here
+TEMPLATES = {
+    'notification': NOTIFICATION,
+    'confirmation': CONFIRMATION,
+    'reminder': REMINDER
+}
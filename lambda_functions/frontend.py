@@ -3,7 +3,31 @@
 import json
 import os
 import base64
-
+import gzip
+import hashlib
+import mimetypes
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from urllib.parse import quote
+
+import metrics
+from routing import Router
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# CORS headers
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+
+@metrics.instrument('frontend')
 def lambda_handler(event, context):
     """
     Frontend Lambda function to serve the Poli Notary website
@@ -13,40 +37,124 @@ def lambda_handler(event, context):
     path = event.get('path', '/')
     http_method = event.get('httpMethod', 'GET')
     
-    # CORS headers
-    cors_headers = {
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-        'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-    }
-    
     # Handle OPTIONS requests for CORS
     if http_method == 'OPTIONS':
+        metrics.current().set_route('options')
         return {
             'statusCode': 200,
-            'headers': cors_headers,
+            'headers': CORS_HEADERS,
             'body': ''
         }
     
     # Serve static files based on path
-    if path == '/' or path == '/index.html':
-        return serve_html_page(cors_headers)
-    elif path == '/styles.css':
-        return serve_css(cors_headers)
-    elif path == '/script.js':
-        return serve_js(cors_headers)
-    elif path.startswith('/assets/'):
-        return serve_asset(path, cors_headers)
+    match = ROUTER.resolve(http_method, path)
+    if match.handler:
+        metrics.current().set_route(match.handler.__name__)
+        return match.handler(event, path, **match.params)
+    elif match.allowed:
+        return {
+            'statusCode': 405,
+            'headers': {**CORS_HEADERS, 'Allow': ','.join(match.allowed)},
+            'body': json.dumps({'error': 'Method not allowed'})
+        }
     else:
-        # Default to serving the main page for SPA routing
-        return serve_html_page(cors_headers)
+        # Unknown paths get a cheap 404 instead of the full page
+        return NOT_FOUND_RESPONSE
 
-def serve_html_page(cors_headers):
-    """Serve the main HTML page"""
+def serve_cached(event, path):
+    """Serve a precomputed response from the container cache"""
     
-    s3_bucket = os.environ.get('S3_BUCKET', 'poli-notary-assets')
+    entry = RESPONSE_CACHE[path]
+    variants = entry['variants']
+    variant = variants['identity']
+    for coding in accepted_encodings(get_header(event, 'Accept-Encoding') or ''):
+        if coding in variants:
+            variant = variants[coding]
+            break
+    
+    # Revalidations get an empty 304 instead of the full body
+    if is_not_modified(event, entry):
+        return {
+            'statusCode': 304,
+            'headers': variant['not_modified_headers'],
+            'body': ''
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': variant['headers'],
+        'body': variant['body'],
+        'isBase64Encoded': variant['isBase64Encoded']
+    }
+
+@lru_cache(maxsize=128)
+def accepted_encodings(accept_encoding):
+    """Content codings an Accept-Encoding header allows, best first"""
     
-    html_content = f"""
+    qualities = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+    
+    # Ties keep CONTENT_ENCODINGS' order of preference
+    ranked = []
+    for coding in CONTENT_ENCODINGS:
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > 0:
+            ranked.append((quality, coding))
+    ranked.sort(key=lambda item: -item[0])
+    return tuple(coding for _, coding in ranked)
+
+def get_header(event, name):
+    """Look up a request header case-insensitively"""
+    
+    headers = event.get('headers') or {}
+    value = headers.get(name)
+    if value is None:
+        name = name.lower()
+        for key, header_value in headers.items():
+            if key.lower() == name:
+                return header_value
+    return value
+
+def is_not_modified(event, entry):
+    """Check the conditional request headers against a cache entry"""
+    
+    # If-None-Match takes precedence over If-Modified-Since (RFC 7232)
+    if_none_match = get_header(event, 'If-None-Match')
+    if if_none_match:
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == '*' or tag in entry['etags']:
+                return True
+        return False
+    
+    if_modified_since = get_header(event, 'If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return entry['last_modified'] <= since
+    
+    return False
+
+def render_html_page(s3_bucket):
+    """Render the main HTML page for the given assets bucket"""
+    
+    return f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -409,20 +517,9 @@ def serve_html_page(cors_headers):
 </body>
 </html>
     """
-    
-    return {
-        'statusCode': 200,
-        'headers': {
-            **cors_headers,
-            'Content-Type': 'text/html'
-        },
-        'body': html_content
-    }
 
-def serve_css(cors_headers):
-    """Serve CSS styles"""
-    
-    css_content = """
+# CSS styles
+CSS_CONTENT = """
 /* Reset and Base Styles */
 * {
     margin: 0;
@@ -1050,20 +1147,9 @@ body {
     }
 }
     """
-    
-    return {
-        'statusCode': 200,
-        'headers': {
-            **cors_headers,
-            'Content-Type': 'text/css'
-        },
-        'body': css_content
-    }
 
-def serve_js(cors_headers):
-    """Serve JavaScript functionality"""
-    
-    js_content = """
+# JavaScript functionality
+JS_CONTENT = """
 // Mobile Navigation Toggle
 const hamburger = document.querySelector('.hamburger');
 const navMenu = document.querySelector('.nav-menu');
@@ -1101,17 +1187,26 @@ if (contactForm) {
             formObject[key] = value;
         });
         
+        // Reuse one key for every retry of this form fill so the API can drop duplicates
+        if (!this.dataset.idempotencyKey) {
+            this.dataset.idempotencyKey = (window.crypto && crypto.randomUUID)
+                ? crypto.randomUUID()
+                : Date.now() + '-' + Math.random().toString(36).slice(2);
+        }
+        
         try {
             const response = await fetch('/api/contact', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Idempotency-Key': this.dataset.idempotencyKey,
                 },
                 body: JSON.stringify(formObject)
             });
             
             if (response.ok) {
                 alert('Thank you for your appointment request! We will contact you within 24 hours to confirm your booking.');
+                delete this.dataset.idempotencyKey;
                 this.reset();
             } else {
                 alert('There was an error submitting your request. Please try again or call us directly.');
@@ -1179,24 +1274,411 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
     """
+
+class AssetCache:
+    """Byte-bounded LRU cache of S3 objects kept in the warm container"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.items = OrderedDict()
+    
+    def get(self, key):
+        item = self.items.get(key)
+        if item is not None:
+            self.items.move_to_end(key)
+        return item
+    
+    def put(self, key, item):
+        size = len(item['body'])
+        if size > self.max_bytes:
+            return
+        
+        previous = self.items.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= len(previous['body'])
+        
+        self.items[key] = item
+        self.current_bytes += size
+        
+        # Evict least recently used objects until we fit the budget
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self.items.popitem(last=False)
+            self.current_bytes -= len(evicted['body'])
+
+class AssetMissCache:
+    """Count-bounded cache of asset lookups with nothing to inline, each kept for a short TTL"""
+    
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.items = OrderedDict()
+    
+    def get(self, key):
+        entry = self.items.get(key)
+        if entry is None:
+            return None
+        expires_at, item = entry
+        if expires_at <= time.monotonic():
+            self.items.pop(key, None)
+            return None
+        return item
+    
+    def put(self, key, item):
+        self.items.pop(key, None)
+        self.items[key] = (time.monotonic() + self.ttl, item)
+        while len(self.items) > self.max_entries:
+            self.items.popitem(last=False)
+
+_s3_client = None
+
+def get_s3_client():
+    """Create the S3 client on first use so page requests never pay for it (or for importing boto3)"""
+    
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+def s3_error_code(error):
+    """The AWS error code of a botocore ClientError, or None for other failures"""
+    
+    return (getattr(error, 'response', None) or {}).get('Error', {}).get('Code')
+
+def asset_url(bucket, key):
+    """Public URL of an asset, used to redirect requests for objects too large to inline"""
+    
+    base = ASSET_REDIRECT_BASE or f"https://{bucket}.s3.amazonaws.com"
+    return f"{base.rstrip('/')}/{quote(key)}"
+
+def fetch_asset(bucket, key):
+    """Fetch an asset from S3, returning None if it does not exist or {'location': url} if it is too large to inline"""
+    
+    try:
+        with metrics.phase('s3Get'):
+            response = get_s3_client().get_object(Bucket=bucket, Key=key)
+    except Exception as e:
+        if s3_error_code(e) in ASSET_MISSING_ERRORS:
+            return None
+        raise
     
+    if response.get('ContentLength', 0) > ASSET_MAX_OBJECT_BYTES:
+        response['Body'].close()
+        return {'location': asset_url(bucket, key)}
+    
+    with metrics.phase('s3Read'):
+        body = response['Body'].read()
+    last_modified = response.get('LastModified')
     return {
-        'statusCode': 200,
-        'headers': {
-            **cors_headers,
-            'Content-Type': 'application/javascript'
-        },
-        'body': js_content
+        'body': body,
+        'content_type': response.get('ContentType') or mimetypes.guess_type(key)[0] or 'application/octet-stream',
+        'etag': response.get('ETag'),
+        'etags': frozenset([response.get('ETag')]),
+        'last_modified': int(last_modified.timestamp()) if last_modified else get_last_modified()
     }
 
-def serve_asset(path, cors_headers):
-    """Serve static assets from S3"""
+def parse_range(range_header, length):
+    """Parse a single-range 'bytes=' header into (start, end), None, or 'unsatisfiable'"""
+    
+    if not range_header or not range_header.startswith('bytes=') or ',' in range_header:
+        return None
+    
+    start, _, end = range_header[6:].strip().partition('-')
+    try:
+        if not start:
+            # Suffix range: the last N bytes
+            suffix = int(end)
+            if suffix <= 0:
+                return 'unsatisfiable'
+            return max(length - suffix, 0), length - 1
+        start = int(start)
+        end = int(end) if end else length - 1
+    except ValueError:
+        return None
+    
+    if start >= length or end < start:
+        return 'unsatisfiable'
+    return start, min(end, length - 1)
+
+def serve_asset(event, path):
+    """Serve static assets from S3 through the in-container cache"""
+    
+    bucket = os.environ.get('S3_BUCKET')
+    key = path.lstrip('/')
+    
+    # Misses and redirects are remembered briefly so repeated requests skip S3;
+    # fetch errors are not, since they are usually transient
+    asset = ASSET_CACHE.get(key) or ASSET_MISSES.get(key)
+    if asset is None and bucket:
+        try:
+            asset = fetch_asset(bucket, key) or ASSET_NOT_FOUND
+        except Exception as e:
+            print(f"Error fetching asset {key}: {str(e)}")
+            # Not a missing file, so neither CloudFront nor the browser may keep it
+            code = s3_error_code(e)
+            return {
+                'statusCode': 503 if code is None or code in ASSET_RETRYABLE_ERRORS else 502,
+                'headers': {**CORS_HEADERS, 'Cache-Control': 'no-store'},
+                'body': json.dumps({'error': 'Asset temporarily unavailable'})
+            }
+        if 'body' in asset:
+            ASSET_CACHE.put(key, asset)
+        else:
+            ASSET_MISSES.put(key, asset)
+    
+    if not asset:
+        return {
+            'statusCode': 404,
+            'headers': CORS_HEADERS,
+            'body': json.dumps({'error': 'Asset not found'})
+        }
+    
+    # Too large for a Lambda response; send the client straight to the object
+    if 'location' in asset:
+        return {
+            'statusCode': 302,
+            'headers': {**CORS_HEADERS, 'Location': asset['location'], 'Cache-Control': ASSET_CACHE_CONTROL},
+            'body': ''
+        }
+    
+    headers = {
+        **CORS_HEADERS,
+        'ETag': asset['etag'],
+        'Last-Modified': formatdate(asset['last_modified'], usegmt=True),
+        'Cache-Control': ASSET_CACHE_CONTROL,
+        'Accept-Ranges': 'bytes'
+    }
+    
+    if is_not_modified(event, asset):
+        return {
+            'statusCode': 304,
+            'headers': headers,
+            'body': ''
+        }
+    
+    body = asset['body']
+    length = len(body)
+    headers['Content-Type'] = asset['content_type']
+    
+    # Ranges only apply if the client's copy is still current (If-Range)
+    byte_range = None
+    if_range = get_header(event, 'If-Range')
+    if not if_range or if_range == asset['etag']:
+        byte_range = parse_range(get_header(event, 'Range'), length)
+    
+    if byte_range == 'unsatisfiable':
+        headers['Content-Range'] = f"bytes */{length}"
+        return {
+            'statusCode': 416,
+            'headers': headers,
+            'body': ''
+        }
+    
+    status_code = 200
+    if byte_range:
+        start, end = byte_range
+        body = body[start:end + 1]
+        headers['Content-Range'] = f"bytes {start}-{end}/{length}"
+        status_code = 206
     
-    # For now, return a placeholder response
-    # In production, this would fetch from S3
     return {
-        'statusCode': 404,
-        'headers': cors_headers,
-        'body': json.dumps({'error': 'Asset not found'})
+        'statusCode': status_code,
+        'headers': headers,
+        'body': base64.b64encode(body).decode('ascii'),
+        'isBase64Encoded': True
     }
 
+def get_last_modified():
+    """Use the deployed module's mtime as the content modification time"""
+    
+    now = time.time()
+    try:
+        mtime = os.path.getmtime(__file__)
+    except OSError:
+        return int(now)
+    # Never advertise a modification time in the future
+    return int(min(mtime, now))
+
+def compress(data, encoding):
+    """Compress a payload with the given content coding"""
+    
+    if encoding == 'br':
+        return brotli.compress(data, quality=RUNTIME_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def build_variant(body, is_base64, etag, content_type, last_modified, encoding, cache_control=None):
+    """Precompute the response pieces for one encoding of a static resource"""
+    
+    validators = {
+        'ETag': etag,
+        'Last-Modified': formatdate(last_modified, usegmt=True),
+        'Vary': 'Accept-Encoding'
+    }
+    if cache_control:
+        validators['Cache-Control'] = cache_control
+    headers = {
+        **CORS_HEADERS,
+        'Content-Type': content_type,
+        **validators
+    }
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return {
+        'body': body,
+        'isBase64Encoded': is_base64,
+        'headers': headers,
+        'not_modified_headers': {
+            **CORS_HEADERS,
+            **validators
+        }
+    }
+
+def build_cache_entry(body, content_type, last_modified, cache_control=None, precompressed=None):
+    """
+    Precompute the body variants, headers, byte length and ETags for a static response.
+    
+    precompressed maps content codings to bodies compressed at build time
+    (base64), which covers Brotli when the module is not in the package.
+    """
+    
+    encoded = body.encode('utf-8')
+    digest = hashlib.sha256(encoded).hexdigest()[:32]
+    etag = '"' + digest + '"'
+    variants = {
+        'identity': build_variant(body, False, etag, content_type, last_modified, 'identity', cache_control)
+    }
+    
+    precompressed = precompressed or {}
+    for encoding in CONTENT_ENCODINGS:
+        if encoding in precompressed:
+            compressed = base64.b64decode(precompressed[encoding])
+        elif encoding in COMPRESSED_ENCODINGS:
+            compressed = compress(encoded, encoding)
+        else:
+            continue
+        # Only keep variants that actually save bytes
+        if len(compressed) < len(encoded):
+            variants[encoding] = build_variant(
+                base64.b64encode(compressed).decode('ascii'), True,
+                '"' + digest + '-' + encoding + '"', content_type, last_modified, encoding, cache_control
+            )
+    
+    return {
+        'length': len(encoded),
+        'etag': etag,
+        'etags': frozenset(variant['headers']['ETag'] for variant in variants.values()),
+        'last_modified': last_modified,
+        'variants': variants
+    }
+
+def load_site_manifest():
+    """Load the compiled site manifest bundled with the deployment, if any"""
+    
+    try:
+        with open(os.path.join(SITE_DIR, 'manifest.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_site_cache(manifest, last_modified, s3_bucket):
+    """Build responses for the compiled site described by a manifest"""
+    
+    cache = {}
+    for name, asset in manifest['files'].items():
+        with open(os.path.join(SITE_DIR, asset['path']), 'r', encoding='utf-8') as f:
+            body = f.read()
+        if asset['contentType'] == 'text/html':
+            body = body.replace(S3_BUCKET_PLACEHOLDER, s3_bucket)
+        
+        precompressed = {}
+        for encoding, path in asset.get('precompressed', {}).items():
+            with open(os.path.join(SITE_DIR, path), 'r', encoding='ascii') as f:
+                precompressed[encoding] = f.read()
+        
+        # Fingerprinted files never change, so they can be cached for a year
+        if asset['immutable']:
+            cache['/' + asset['path']] = build_cache_entry(
+                body, asset['contentType'], last_modified, IMMUTABLE_CACHE_CONTROL, precompressed
+            )
+        cache['/' + name] = build_cache_entry(body, asset['contentType'], last_modified, precompressed=precompressed)
+    
+    if '/index.html' in cache:
+        cache['/'] = cache['/index.html']
+    return cache
+
+def build_response_cache():
+    """Build the static page responses once per container"""
+    
+    s3_bucket = os.environ.get('S3_BUCKET', 'poli-notary-assets')
+    last_modified = get_last_modified()
+    
+    # Prefer the compiled site when the build step bundled one
+    manifest = load_site_manifest()
+    if manifest:
+        return build_site_cache(manifest, last_modified, s3_bucket)
+    
+    html_entry = build_cache_entry(render_html_page(s3_bucket), 'text/html', last_modified)
+    return {
+        '/': html_entry,
+        '/index.html': html_entry,
+        '/styles.css': build_cache_entry(CSS_CONTENT, 'text/css', last_modified),
+        '/script.js': build_cache_entry(JS_CONTENT, 'application/javascript', last_modified)
+    }
+
+# Compiled site produced by build_static.py from render_html_page and the
+# inline CSS/JS; image URLs name this placeholder instead of the bucket
+SITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dist')
+S3_BUCKET_PLACEHOLDER = '__S3_BUCKET__'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Warm-container cache for /assets/* objects fetched from S3
+ASSET_CACHE_CONTROL = 'public, max-age=86400'
+ASSET_MAX_OBJECT_BYTES = int(os.environ.get('ASSET_MAX_OBJECT_BYTES', 4 * 1024 * 1024))
+ASSET_CACHE = AssetCache(int(os.environ.get('ASSET_CACHE_MAX_BYTES', 32 * 1024 * 1024)))
+
+# Objects over ASSET_MAX_OBJECT_BYTES are redirected to the bucket (or to
+# ASSET_REDIRECT_BASE, e.g. a CloudFront domain); missing keys and redirects
+# are cached for ASSET_MISS_TTL seconds
+ASSET_REDIRECT_BASE = os.environ.get('ASSET_REDIRECT_BASE', '')
+ASSET_MISS_TTL = int(os.environ.get('ASSET_MISS_TTL', 60))
+ASSET_MISSES = AssetMissCache(int(os.environ.get('ASSET_MISS_MAX_ENTRIES', 1024)), ASSET_MISS_TTL)
+ASSET_NOT_FOUND = {}
+
+# S3 error codes answered with 404, and those answered with 503 (retry later)
+# rather than 502; timeouts and connection errors count as retryable. The
+# role has s3:ListBucket, so a missing key is NoSuchKey rather than AccessDenied.
+ASSET_MISSING_ERRORS = ('NoSuchKey', '404')
+ASSET_RETRYABLE_ERRORS = ('SlowDown', 'ServiceUnavailable', 'Throttling', 'RequestTimeout', 'InternalError', '500', '503')
+
+# Content codings we can serve, in order of preference, and those this
+# container can compress itself; Brotli otherwise comes precompressed from
+# build_static.py (brotli is not bundled in the Lambda package)
+CONTENT_ENCODINGS = ('br', 'gzip')
+COMPRESSED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# Build-time copies use quality 11; at cold start (only for bodies without a
+# precompressed copy, such as the page) a mid quality keeps most of the
+# saving for a fraction of the time
+RUNTIME_BROTLI_QUALITY = 5
+
+# Built at cold start so warm invocations are a dict lookup
+RESPONSE_CACHE = build_response_cache()
+
+def build_router():
+    """Build the route table for the cached pages and S3 assets"""
+    
+    router = Router()
+    for path in RESPONSE_CACHE:
+        router.add('GET', path, serve_cached)
+    router.add('GET', '/assets/*', serve_asset)
+    return router
+
+# Route table, compiled once per container
+ROUTER = build_router()
+
+NOT_FOUND_RESPONSE = {
+    'statusCode': 404,
+    'headers': CORS_HEADERS,
+    'body': json.dumps({'error': 'Not found'})
+}
@@ -0,0 +1,49 @@
+import base64
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def default(value):
+    """Convert the non-JSON types found in DynamoDB items"""
+    
+    if isinstance(value, Decimal):
+        # Integral numbers stay ints so IDs and counters don't gain a ".0"
+        if value == value.to_integral_value():
+            return int(value)
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        try:
+            return sorted(value)
+        except TypeError:
+            return list(value)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    # boto3.dynamodb.types.Binary wraps the raw bytes in .value
+    raw = getattr(value, 'value', None)
+    if isinstance(raw, (bytes, bytearray)):
+        return base64.b64encode(bytes(raw)).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Nested maps and lists are walked by the encoder itself; only the leaf
+# Decimals, sets and binaries reach default()
+encoder = json.JSONEncoder(default=default, separators=(',', ':'))
+
+def dumps(obj):
+    """Serialize an object containing DynamoDB items to a JSON string"""
+    
+    if orjson is not None:
+        return orjson.dumps(obj, default=default).decode('utf-8')
+    return encoder.encode(obj)
+
+def dump(obj, stream):
+    """Serialize an object containing DynamoDB items straight into a text stream"""
+    
+    if orjson is not None:
+        stream.write(orjson.dumps(obj, default=default).decode('utf-8'))
+        return
+    for chunk in encoder.iterencode(obj):
+        stream.write(chunk)
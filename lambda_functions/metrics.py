@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+# Per-request phase timings, logged as CloudWatch Embedded Metric Format lines.
+# Off unless METRICS_ENABLED is set, in which case handlers are not even wrapped.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'PoliNotary')
+
+# Route is the matched handler's name, so the dimension stays low-cardinality
+METRIC_DIMENSIONS = [['Function'], ['Function', 'Route']]
+
+class RequestMetrics:
+    """Phase timings and properties for one invocation"""
+    
+    def __init__(self, function_name, request_id, cold_start):
+        self.function_name = function_name
+        self.request_id = request_id
+        self.cold_start = cold_start
+        self.route = 'unmatched'
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.properties = {}
+        self.lock = threading.Lock()
+    
+    def phase(self, name):
+        """Context manager adding the time spent inside it to the named phase"""
+        
+        return _Phase(self, name)
+    
+    def add(self, name, milliseconds):
+        with self.lock:
+            self.timings[name] = self.timings.get(name, 0.0) + milliseconds
+    
+    def set(self, **properties):
+        self.properties.update(properties)
+    
+    def set_route(self, route):
+        self.route = route
+    
+    def document(self):
+        """Build the EMF log document; every phase becomes a metric in milliseconds"""
+        
+        with self.lock:
+            timings = {name: round(value, 3) for name, value in self.timings.items()}
+        timings['duration'] = round((time.perf_counter() - self.started) * 1000, 3)
+        return {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': METRIC_DIMENSIONS,
+                    'Metrics': [{'Name': name, 'Unit': 'Milliseconds'} for name in timings]
+                }]
+            },
+            'Function': self.function_name,
+            'Route': self.route,
+            'requestId': self.request_id,
+            'coldStart': self.cold_start,
+            **self.properties,
+            **timings
+        }
+    
+    def emit(self):
+        print(json.dumps(self.document(), default=str))
+
+class _Phase:
+    """Times one block and adds it to its RequestMetrics on exit"""
+    
+    __slots__ = ('metrics', 'name', 'started')
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.add(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+class _NullPhase:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+class _NullMetrics:
+    """Stand-in used outside instrumented invocations; every call is a no-op"""
+    
+    __slots__ = ()
+    
+    def phase(self, name):
+        return NULL_PHASE
+    
+    def add(self, name, milliseconds):
+        pass
+    
+    def set(self, **properties):
+        pass
+    
+    def set_route(self, route):
+        pass
+
+NULL_PHASE = _NullPhase()
+NULL_METRICS = _NullMetrics()
+
+# Each thread sees its own current request; worker threads see NULL_METRICS
+# unless the task is submitted with bind()
+_current = ContextVar('request_metrics', default=NULL_METRICS)
+_warm_functions = set()
+
+def current():
+    """Return the metrics of the invocation running on this thread"""
+    
+    return _current.get()
+
+def phase(name):
+    """Time a block against the current invocation, e.g. with metrics.phase('parse'):"""
+    
+    return _current.get().phase(name)
+
+def bind(fn):
+    """Wrap fn so it records into the current invocation when run on another thread"""
+    
+    request = _current.get()
+    if request is NULL_METRICS:
+        return fn
+    
+    @wraps(fn)
+    def bound(*args, **kwargs):
+        token = _current.set(request)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    
+    return bound
+
+def instrument(function_name):
+    """
+    Decorate a Lambda handler to emit one EMF line per invocation.
+    
+    The line carries the request ID, cold start flag, status code (for proxy
+    responses) and every phase recorded during the call. When metrics are
+    disabled the handler is returned unwrapped.
+    """
+    
+    def decorate(handler):
+        if not METRICS_ENABLED:
+            return handler
+        
+        @wraps(handler)
+        def instrumented(event, context):
+            request_id = getattr(context, 'aws_request_id', None)
+            if request_id is None and isinstance(event, dict):
+                request_id = (event.get('requestContext') or {}).get('requestId')
+            request = RequestMetrics(function_name, request_id, function_name not in _warm_functions)
+            _warm_functions.add(function_name)
+            token = _current.set(request)
+            try:
+                result = handler(event, context)
+                if isinstance(result, dict) and 'statusCode' in result:
+                    request.set(statusCode=result['statusCode'])
+                return result
+            finally:
+                _current.reset(token)
+                request.emit()
+        
+        return instrumented
+    
+    return decorate
@@ -0,0 +1,105 @@
+from collections import namedtuple
+
+# handler is None when nothing matched; allowed then tells 404 (empty) from 405
+RouteMatch = namedtuple('RouteMatch', ['handler', 'params', 'allowed'])
+
+NO_MATCH = RouteMatch(None, {}, ())
+
+class _Node:
+    """One path segment in the pattern trie"""
+    
+    __slots__ = ('children', 'param_name', 'param_child', 'wildcard', 'methods')
+    
+    def __init__(self):
+        self.children = {}
+        self.param_name = None
+        self.param_child = None
+        self.wildcard = None
+        self.methods = None
+
+class Router:
+    """
+    Route table compiled once at import time.
+    
+    Literal paths live in a dict for O(1) lookup; patterns with {param}
+    segments or a trailing /* are matched segment by segment through a trie.
+    """
+    
+    def __init__(self):
+        self.exact = {}
+        self.root = _Node()
+    
+    def add(self, method, pattern, handler):
+        """Register a handler for an HTTP method and path pattern"""
+        
+        if '{' not in pattern and '*' not in pattern:
+            self.exact.setdefault(pattern, {})[method] = handler
+            return
+        
+        node = self.root
+        segments = pattern.strip('/').split('/')
+        for index, segment in enumerate(segments):
+            if segment == '*':
+                if index != len(segments) - 1:
+                    raise ValueError(f"Wildcard must be the last segment: {pattern}")
+                if node.wildcard is None:
+                    node.wildcard = {}
+                node.wildcard[method] = handler
+                return
+            if segment.startswith('{') and segment.endswith('}'):
+                name = segment[1:-1]
+                if node.param_child is None:
+                    node.param_name, node.param_child = name, _Node()
+                elif node.param_name != name:
+                    raise ValueError(f"Conflicting parameter names at {pattern}")
+                node = node.param_child
+            else:
+                node = node.children.setdefault(segment, _Node())
+        
+        if node.methods is None:
+            node.methods = {}
+        node.methods[method] = handler
+    
+    def resolve(self, method, path):
+        """Find the handler and path parameters for a request"""
+        
+        methods = self.exact.get(path)
+        params = {}
+        if methods is None:
+            found = self._match(self.root, path.strip('/').split('/'), 0, params)
+            if found is None:
+                return NO_MATCH
+            methods = found
+        
+        handler = methods.get(method)
+        if handler is None and method == 'HEAD':
+            handler = methods.get('GET')
+        if handler is None:
+            return RouteMatch(None, {}, tuple(sorted(methods)))
+        return RouteMatch(handler, params, tuple(sorted(methods)))
+    
+    def _match(self, node, segments, index, params):
+        """Walk the trie, preferring literal segments over parameters over wildcards"""
+        
+        if index == len(segments):
+            if node.methods is not None:
+                return node.methods
+            return None
+        
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, params)
+            if found is not None:
+                return found
+        
+        if node.param_child is not None and segment:
+            params[node.param_name] = segment
+            found = self._match(node.param_child, segments, index + 1, params)
+            if found is not None:
+                return found
+            del params[node.param_name]
+        
+        if node.wildcard is not None:
+            return node.wildcard
+        return None
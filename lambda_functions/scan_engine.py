@@ -0,0 +1,153 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+# Error codes that mean "slow down" rather than "give up"
+THROTTLE_ERRORS = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded'
+}
+MAX_THROTTLE_RETRIES = 10
+
+# Checkpoints are saved at most this often (and always when a scan stops)
+CHECKPOINT_INTERVAL = 5.0
+
+class AdaptiveBackoff:
+    """
+    Delay shared by every segment of a scan.
+    
+    Each throttled call doubles it and each successful call halves it, so the
+    workers settle just under the table's available read capacity.
+    """
+    
+    def __init__(self, base=0.05, maximum=5.0, sleep=time.sleep):
+        self.base = base
+        self.maximum = maximum
+        self.sleep = sleep
+        self.delay = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """Sleep for the current delay, with jitter so segments don't retry in lockstep"""
+        
+        delay = self.delay
+        if delay:
+            self.sleep(random.uniform(delay / 2, delay))
+    
+    def throttled(self):
+        """Grow the delay after a throttled call"""
+        
+        with self.lock:
+            self.delay = min(max(self.delay * 2, self.base), self.maximum)
+    
+    def succeeded(self):
+        """Shrink the delay after a successful call"""
+        
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > self.base else 0.0
+
+def new_checkpoint(total_segments):
+    """Build the checkpoint for a scan that has not started yet"""
+    
+    return {
+        'totalSegments': total_segments,
+        'segments': [
+            {'startKey': None, 'done': False, 'scanned': 0}
+            for _ in range(total_segments)
+        ]
+    }
+
+def scan_complete(checkpoint):
+    """Whether every segment of a checkpointed scan has finished"""
+    
+    return all(segment['done'] for segment in checkpoint['segments'])
+
+def scanned_count(checkpoint):
+    """Total items scanned so far across all segments"""
+    
+    return sum(segment['scanned'] for segment in checkpoint['segments'])
+
+def parallel_scan(client, table_name, process, total_segments=8, max_workers=None,
+                  checkpoint=None, on_checkpoint=None, scan_kwargs=None, deadline=None,
+                  backoff=None):
+    """
+    Scan a DynamoDB table in parallel segments and feed every page to a callback.
+    
+    client is a low-level DynamoDB client (they are thread-safe; Table resources
+    are not). process(items, segment) runs on the worker threads, so it must be
+    thread-safe, and it should be idempotent: a page whose checkpoint was not
+    saved before a crash is processed again on resume.
+    
+    Pass a checkpoint from an earlier run to resume it. on_checkpoint(checkpoint)
+    is called periodically and when the scan stops; deadline is a time.monotonic()
+    value after which no new pages are started. Returns the final checkpoint,
+    which scan_complete() reports on.
+    """
+    
+    if checkpoint is None:
+        checkpoint = new_checkpoint(total_segments)
+    total_segments = checkpoint['totalSegments']
+    backoff = backoff or AdaptiveBackoff()
+    stop = threading.Event()
+    lock = threading.Lock()
+    last_saved = [time.monotonic()]
+    
+    def save(force=False):
+        if on_checkpoint is None:
+            return
+        with lock:
+            now = time.monotonic()
+            if force or now - last_saved[0] >= CHECKPOINT_INTERVAL:
+                last_saved[0] = now
+                on_checkpoint(json.loads(json.dumps(checkpoint)))
+    
+    def scan_page(request):
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            backoff.wait()
+            try:
+                response = client.scan(**request)
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') not in THROTTLE_ERRORS or attempt == MAX_THROTTLE_RETRIES:
+                    raise
+                backoff.throttled()
+                continue
+            backoff.succeeded()
+            return response
+    
+    def run_segment(segment):
+        state = checkpoint['segments'][segment]
+        request = dict(scan_kwargs or {}, TableName=table_name, Segment=segment, TotalSegments=total_segments)
+        try:
+            while not state['done'] and not stop.is_set():
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                if state['startKey']:
+                    request['ExclusiveStartKey'] = state['startKey']
+                response = scan_page(request)
+                items = response.get('Items', [])
+                if items:
+                    process(items, segment)
+                with lock:
+                    state['scanned'] += len(items)
+                    state['startKey'] = response.get('LastEvaluatedKey')
+                    state['done'] = state['startKey'] is None
+                save()
+        except Exception:
+            # Stop the other segments at their next page; progress so far is kept
+            stop.set()
+            raise
+    
+    pending = [index for index, segment in enumerate(checkpoint['segments']) if not segment['done']]
+    with ThreadPoolExecutor(max_workers=max_workers or len(pending) or 1) as executor:
+        futures = [executor.submit(run_segment, segment) for segment in pending]
+    
+    save(force=True)
+    
+    # Re-raise the first segment error, if any
+    for future in futures:
+        future.result()
+    return checkpoint
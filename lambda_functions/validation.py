@@ -0,0 +1,107 @@
+import re
+from collections import namedtuple
+
+# Declared constraints for one field of a request body; every check except
+# required is skipped when the field is absent or empty
+Field = namedtuple(
+    'Field',
+    ['required', 'max_length', 'pattern', 'choices', 'message'],
+    defaults=(False, None, None, None, None)
+)
+
+def compile_field(name, field):
+    """Turn a Field declaration into a check(value) returning an error message or None"""
+    
+    missing = f"Missing required field: {name}" if field.required else None
+    too_long = f"{name} must be at most {field.max_length} characters"
+    invalid = field.message or f"Invalid {name}"
+    pattern = re.compile(field.pattern) if field.pattern else None
+    choices = frozenset(field.choices) if field.choices else None
+    
+    def check(value):
+        if value is None or value == '':
+            return missing
+        if not isinstance(value, str):
+            return f"{name} must be a string"
+        if field.max_length is not None and len(value) > field.max_length:
+            return too_long
+        if field.required and not value.strip():
+            return missing
+        if choices is not None and value not in choices:
+            return invalid
+        if pattern is not None and pattern.fullmatch(value) is None:
+            return invalid
+        return None
+    
+    return check
+
+def compile_schema(fields):
+    """
+    Compile a {name: Field} schema once into a validate(body) function.
+    
+    validate returns every failing field at once as {name: message}, in
+    declaration order; an empty dict means the body is valid.
+    """
+    
+    checks = [(name, compile_field(name, field)) for name, field in fields.items()]
+    
+    def validate(body):
+        if not isinstance(body, dict):
+            return {'body': 'Request body must be a JSON object'}
+        errors = {}
+        for name, check in checks:
+            error = check(body.get(name))
+            if error:
+                errors[name] = error
+        return errors
+    
+    return validate
+
+# Values offered by the booking form's <select> menus
+SERVICE_TYPES = ('standard', 'mobile', 'real-estate', 'business', 'other')
+PREFERRED_TIMES = ('morning', 'afternoon', 'evening')
+
+CONTACT_FIELDS = {
+    'fullName': Field(required=True, max_length=100),
+    'email': Field(
+        required=True, max_length=254,
+        pattern=r'[^@\s]{1,64}@[^@\s]+\.[^@\s.]{2,}',
+        message='Invalid email address'
+    ),
+    'phone': Field(
+        required=True, max_length=32,
+        pattern=r'\+?(?:[ ().\-]*[0-9]){7,15}[ ().\-]*',
+        message='Invalid phone number'
+    ),
+    'serviceType': Field(
+        required=True, choices=SERVICE_TYPES,
+        message='serviceType must be one of: ' + ', '.join(SERVICE_TYPES)
+    ),
+    'preferredDate': Field(
+        max_length=10, pattern=r'\d{4}-\d{2}-\d{2}',
+        message='preferredDate must be YYYY-MM-DD'
+    ),
+    'preferredTime': Field(
+        choices=PREFERRED_TIMES,
+        message='preferredTime must be one of: ' + ', '.join(PREFERRED_TIMES)
+    ),
+    'additionalDetails': Field(max_length=2000)
+}
+
+# Compiled once per container
+validate_contact = compile_schema(CONTACT_FIELDS)
+
+# A single address checked exactly as the contact form checks it
+validate_email = compile_field('email', CONTACT_FIELDS['email'])
+
+# Partner records may also carry their own ID, creation time and status
+validate_import_record = compile_schema({
+    **CONTACT_FIELDS,
+    'externalId': Field(max_length=128),
+    'timestamp': Field(
+        max_length=32,
+        pattern=r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d{3}(\d{3})?)?)?(Z|[+-]\d{2}:?\d{2})?',
+        message='timestamp must be an ISO 8601 date and time'
+    ),
+    'status': Field(max_length=32, pattern=r'[a-z][a-z_-]*')
+})
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-ins for the AWS services used by the Poli Notary Lambdas
+These implement just the DynamoDB, SES and S3 calls the handlers make, so
+app.py's emulator mode and the benchmarks can run them without an AWS account
+"""
+
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+from types import SimpleNamespace
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+def client_error(code, operation, message=''):
+    """Build the ClientError botocore would raise for an error code"""
+    
+    return ClientError({'Error': {'Code': code, 'Message': message or code}}, operation)
+
+# Expression grammar --------------------------------------------------------
+# Enough of DynamoDB's condition and update expression syntax for the
+# handlers: comparisons, BETWEEN, AND/OR/NOT, attribute_(not_)exists,
+# begins_with, SET with if_not_exists and +/-, ADD and REMOVE.
+
+TOKEN = re.compile(r'\s*(<>|<=|>=|=|<|>|\(|\)|,|\+|-|[#:]?[A-Za-z_][A-Za-z0-9_]*)')
+COMPARATORS = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b
+}
+
+def tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = TOKEN.match(expression, position)
+        if not match:
+            raise ValueError(f"Unsupported expression syntax: {expression[position:]}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+def plain(value):
+    """Turn an attribute value into something Python can compare"""
+    
+    if value is None:
+        return None
+    (kind, data), = value.items()
+    if kind == 'N':
+        return Decimal(data)
+    if kind in ('S', 'B', 'BOOL'):
+        return data
+    return repr(data)
+
+class Parser:
+    """Recursive-descent parser producing closures over (item, names, values)"""
+    
+    def __init__(self, expression):
+        self.tokens = tokenize(expression)
+        self.position = 0
+    
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+    
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected and token.upper() != expected):
+            raise ValueError(f"Expected {expected or 'a token'}, found {token}")
+        self.position += 1
+        return token
+    
+    def done(self):
+        return self.position == len(self.tokens)
+    
+    def path(self):
+        token = self.take()
+        if token.startswith(':'):
+            raise ValueError(f"Expected an attribute name, found {token}")
+        if token.startswith('#'):
+            return lambda names: names[token]
+        return lambda names: token
+    
+    def operand(self):
+        if self.peek().startswith(':'):
+            token = self.take()
+            return lambda item, names, values: values[token]
+        path = self.path()
+        return lambda item, names, values: item.get(path(names))
+    
+    def condition(self):
+        left = self.conjunction()
+        while self.peek() and self.peek().upper() == 'OR':
+            self.take()
+            left = (lambda a, b: lambda *args: a(*args) or b(*args))(left, self.conjunction())
+        return left
+    
+    def conjunction(self):
+        left = self.negation()
+        while self.peek() and self.peek().upper() == 'AND':
+            self.take()
+            left = (lambda a, b: lambda *args: a(*args) and b(*args))(left, self.negation())
+        return left
+    
+    def negation(self):
+        if self.peek().upper() == 'NOT':
+            self.take()
+            inner = self.negation()
+            return lambda *args: not inner(*args)
+        return self.predicate()
+    
+    def predicate(self):
+        if self.peek() == '(':
+            self.take()
+            inner = self.condition()
+            self.take(')')
+            return inner
+        
+        function = self.peek().lower()
+        if self.peek(1) == '(' and function in ('attribute_exists', 'attribute_not_exists', 'begins_with'):
+            self.take()
+            self.take('(')
+            path = self.path()
+            if function == 'begins_with':
+                self.take(',')
+                prefix = self.operand()
+                self.take(')')
+                def begins_with(item, names, values):
+                    value = plain(item.get(path(names)))
+                    return isinstance(value, str) and value.startswith(plain(prefix(item, names, values)))
+                return begins_with
+            self.take(')')
+            exists = function == 'attribute_exists'
+            return lambda item, names, values: (path(names) in item) == exists
+        
+        left = self.operand()
+        operator = self.take()
+        if operator.upper() == 'BETWEEN':
+            low = self.operand()
+            self.take('AND')
+            high = self.operand()
+            def between(item, names, values):
+                value = plain(left(item, names, values))
+                return value is not None and plain(low(item, names, values)) <= value <= plain(high(item, names, values))
+            return between
+        if operator not in COMPARATORS:
+            raise ValueError(f"Unsupported operator: {operator}")
+        right = self.operand()
+        compare = COMPARATORS[operator]
+        def comparison(item, names, values):
+            a, b = plain(left(item, names, values)), plain(right(item, names, values))
+            if a is None or b is None:
+                return operator == '<>' and a != b
+            try:
+                return compare(a, b)
+            except TypeError:
+                return False
+        return comparison
+    
+    def update(self):
+        actions = []
+        while not self.done():
+            clause = self.take().upper()
+            while True:
+                if clause == 'SET':
+                    path = self.path()
+                    self.take('=')
+                    actions.append(('SET', path, self.update_value()))
+                elif clause == 'ADD':
+                    actions.append(('ADD', self.path(), self.operand()))
+                elif clause == 'REMOVE':
+                    actions.append(('REMOVE', self.path(), None))
+                else:
+                    raise ValueError(f"Unsupported update clause: {clause}")
+                if self.peek() != ',':
+                    break
+                self.take(',')
+        return actions
+    
+    def update_value(self):
+        term = self.update_term()
+        if self.peek() in ('+', '-'):
+            sign = 1 if self.take() == '+' else -1
+            other = self.update_term()
+            return lambda item, names, values: {
+                'N': str(plain(term(item, names, values)) + sign * plain(other(item, names, values)))
+            }
+        return term
+    
+    def update_term(self):
+        if self.peek().lower() == 'if_not_exists' and self.peek(1) == '(':
+            self.take()
+            self.take('(')
+            path = self.path()
+            self.take(',')
+            fallback = self.operand()
+            self.take(')')
+            return lambda item, names, values: item.get(path(names)) or fallback(item, names, values)
+        return self.operand()
+
+@lru_cache(maxsize=256)
+def compile_condition(expression):
+    parser = Parser(expression)
+    condition = parser.condition()
+    if not parser.done():
+        raise ValueError(f"Unexpected trailing tokens in: {expression}")
+    return condition
+
+@lru_cache(maxsize=256)
+def compile_update(expression):
+    return Parser(expression).update()
+
+@lru_cache(maxsize=256)
+def compile_projection(expression):
+    return [Parser(part).path() for part in expression.split(',')]
+
+# DynamoDB --------------------------------------------------------------------
+
+class LocalTable:
+    """One in-memory table: items by hash key, plus its GSIs as (hash, range) attribute pairs"""
+    
+    def __init__(self, key, indexes=None):
+        self.key = key
+        self.indexes = indexes or {}
+        self.items = {}
+
+class LocalDynamoDB:
+    """In-memory stand-in for the low-level DynamoDB client (attribute-value dicts in and out)"""
+    
+    def __init__(self, tables):
+        self.tables = {name: LocalTable(**schema) for name, schema in tables.items()}
+        self.lock = threading.RLock()
+    
+    def table(self, name, operation):
+        table = self.tables.get(name)
+        if table is None:
+            raise client_error('ResourceNotFoundException', operation, f"Table not found: {name}")
+        return table
+    
+    def check(self, expression, item, kwargs, operation):
+        if expression and not compile_condition(expression)(
+            item or {}, kwargs.get('ExpressionAttributeNames') or {}, kwargs.get('ExpressionAttributeValues') or {}
+        ):
+            raise client_error('ConditionalCheckFailedException', operation, 'The conditional request failed')
+    
+    def put_item(self, TableName, Item, ConditionExpression=None, **kwargs):
+        with self.lock:
+            table = self.table(TableName, 'PutItem')
+            key = Item[table.key]['S']
+            self.check(ConditionExpression, table.items.get(key), kwargs, 'PutItem')
+            table.items[key] = dict(Item)
+        return {}
+    
+    def get_item(self, TableName, Key, **kwargs):
+        with self.lock:
+            item = self.table(TableName, 'GetItem').items.get(next(iter(Key.values()))['S'])
+        return {'Item': dict(item)} if item is not None else {}
+    
+    def delete_item(self, TableName, Key, ConditionExpression=None, **kwargs):
+        with self.lock:
+            table = self.table(TableName, 'DeleteItem')
+            key = next(iter(Key.values()))['S']
+            self.check(ConditionExpression, table.items.get(key), kwargs, 'DeleteItem')
+            table.items.pop(key, None)
+        return {}
+    
+    def update_item(self, TableName, Key, UpdateExpression, ConditionExpression=None, ReturnValues='NONE', **kwargs):
+        names = kwargs.get('ExpressionAttributeNames') or {}
+        values = kwargs.get('ExpressionAttributeValues') or {}
+        with self.lock:
+            table = self.table(TableName, 'UpdateItem')
+            key = next(iter(Key.values()))['S']
+            old = table.items.get(key)
+            self.check(ConditionExpression, old, kwargs, 'UpdateItem')
+            
+            item = dict(old or Key)
+            updated = {}
+            for action, path, value in compile_update(UpdateExpression):
+                name = path(names)
+                if action == 'SET':
+                    item[name] = updated[name] = value(old or {}, names, values)
+                elif action == 'ADD':
+                    increment = value(item, names, values)
+                    current = item.get(name)
+                    if current is None:
+                        item[name] = increment
+                    elif 'N' in current:
+                        item[name] = {'N': str(Decimal(current['N']) + Decimal(increment['N']))}
+                    else:
+                        (kind, members), = current.items()
+                        item[name] = {kind: sorted(set(members) | set(increment[kind]))}
+                    updated[name] = item[name]
+                else:
+                    item.pop(name, None)
+            table.items[key] = item
+        
+        if ReturnValues == 'ALL_NEW':
+            return {'Attributes': dict(item)}
+        if ReturnValues == 'UPDATED_NEW':
+            return {'Attributes': updated}
+        if ReturnValues == 'ALL_OLD' and old:
+            return {'Attributes': dict(old)}
+        return {}
+    
+    def batch_write_item(self, RequestItems, **kwargs):
+        with self.lock:
+            for table_name, requests in RequestItems.items():
+                if len(requests) > 25:
+                    raise client_error('ValidationException', 'BatchWriteItem', 'Too many items requested')
+                for request in requests:
+                    if 'PutRequest' in request:
+                        self.put_item(table_name, request['PutRequest']['Item'])
+                    else:
+                        self.delete_item(table_name, request['DeleteRequest']['Key'])
+        return {'UnprocessedItems': {}}
+    
+    def query(self, TableName, KeyConditionExpression, IndexName=None, ScanIndexForward=True, **kwargs):
+        names = kwargs.get('ExpressionAttributeNames') or {}
+        values = kwargs.get('ExpressionAttributeValues') or {}
+        key_condition = compile_condition(KeyConditionExpression)
+        with self.lock:
+            table = self.table(TableName, 'Query')
+            index_keys = table.indexes[IndexName] if IndexName else (table.key, None)
+            matches = [
+                item for item in table.items.values()
+                if all(attribute in item for attribute in index_keys if attribute)
+                and key_condition(item, names, values)
+            ]
+        range_key = index_keys[1]
+        if range_key:
+            matches.sort(key=lambda item: plain(item[range_key]), reverse=not ScanIndexForward)
+        return self.page(table, matches, index_keys, kwargs)
+    
+    def scan(self, TableName, Segment=None, TotalSegments=None, **kwargs):
+        with self.lock:
+            table = self.table(TableName, 'Scan')
+            items = list(table.items.values())
+        if TotalSegments:
+            items = [
+                item for item in items
+                if zlib.crc32(item[table.key]['S'].encode('utf-8')) % TotalSegments == Segment
+            ]
+        return self.page(table, items, (table.key, None), kwargs)
+    
+    def page(self, table, items, index_keys, kwargs):
+        """Apply ExclusiveStartKey, Limit, FilterExpression and ProjectionExpression like DynamoDB does"""
+        
+        start_key = kwargs.get('ExclusiveStartKey')
+        if start_key:
+            position = next(
+                (index for index, item in enumerate(items) if item[table.key] == start_key[table.key]),
+                len(items)
+            )
+            items = items[position + 1:]
+        
+        limit = kwargs.get('Limit')
+        evaluated = items[:limit] if limit else items
+        names = kwargs.get('ExpressionAttributeNames') or {}
+        values = kwargs.get('ExpressionAttributeValues') or {}
+        if kwargs.get('FilterExpression'):
+            condition = compile_condition(kwargs['FilterExpression'])
+            matched = [item for item in evaluated if condition(item, names, values)]
+        else:
+            matched = evaluated
+        if kwargs.get('ProjectionExpression'):
+            attributes = [path(names) for path in compile_projection(kwargs['ProjectionExpression'])]
+            matched = [{name: item[name] for name in attributes if name in item} for item in matched]
+        
+        response = {'Items': [dict(item) for item in matched], 'Count': len(matched), 'ScannedCount': len(evaluated)}
+        if limit and len(items) > limit:
+            last = evaluated[-1]
+            response['LastEvaluatedKey'] = {
+                attribute: last[attribute] for attribute in (table.key,) + tuple(index_keys) if attribute
+            }
+        return response
+
+class ResourceClient:
+    """The resource layer's client: boto3 condition objects and plain Python values in and out"""
+    
+    def __init__(self, client):
+        self.client = client
+    
+    def query(self, **kwargs):
+        builder = ConditionExpressionBuilder()
+        names = dict(kwargs.pop('ExpressionAttributeNames', None) or {})
+        values = {
+            key: serializer.serialize(value)
+            for key, value in (kwargs.pop('ExpressionAttributeValues', None) or {}).items()
+        }
+        for parameter in ('KeyConditionExpression', 'FilterExpression'):
+            condition = kwargs.get(parameter)
+            if isinstance(condition, ConditionBase):
+                built = builder.build_expression(condition, is_key_condition=parameter == 'KeyConditionExpression')
+                kwargs[parameter] = built.condition_expression
+                names.update(built.attribute_name_placeholders)
+                values.update({key: serializer.serialize(value) for key, value in built.attribute_value_placeholders.items()})
+        if kwargs.get('ExclusiveStartKey'):
+            kwargs['ExclusiveStartKey'] = {key: serializer.serialize(value) for key, value in kwargs['ExclusiveStartKey'].items()}
+        
+        response = self.client.query(ExpressionAttributeNames=names, ExpressionAttributeValues=values, **kwargs)
+        response['Items'] = [
+            {key: deserializer.deserialize(value) for key, value in item.items()} for item in response['Items']
+        ]
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = {
+                key: deserializer.deserialize(value) for key, value in response['LastEvaluatedKey'].items()
+            }
+        return response
+
+class LocalTableResource:
+    """Stand-in for a boto3 Table resource"""
+    
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+    
+    def query(self, **kwargs):
+        return self.client.query(TableName=self.name, **kwargs)
+
+class LocalDynamoDBResource:
+    """Stand-in for boto3.resource('dynamodb') sharing a LocalDynamoDB's tables"""
+    
+    def __init__(self, client):
+        self.meta = SimpleNamespace(client=ResourceClient(client))
+    
+    def Table(self, name):
+        return LocalTableResource(self.meta.client, name)
+
+# SES -------------------------------------------------------------------------
+
+class LocalSES:
+    """Stand-in for the SES client that keeps the most recent messages in an outbox"""
+    
+    def __init__(self, echo=False, outbox_size=1000):
+        self.echo = echo
+        self.outbox = deque(maxlen=outbox_size)
+        self.templates = {}
+        self.lock = threading.Lock()
+    
+    def deliver(self, to_addresses, subject):
+        message_id = str(uuid.uuid4())
+        with self.lock:
+            self.outbox.append({'messageId': message_id, 'to': to_addresses, 'subject': subject})
+        if self.echo:
+            print(f"📧 {subject} -> {', '.join(to_addresses)}")
+        return message_id
+    
+    def send_email(self, Source, Destination, Message, **kwargs):
+        return {'MessageId': self.deliver(Destination['ToAddresses'], Message['Subject']['Data'])}
+    
+    def create_template(self, Template):
+        with self.lock:
+            if Template['TemplateName'] in self.templates:
+                raise client_error('AlreadyExists', 'CreateTemplate')
+            self.templates[Template['TemplateName']] = Template
+        return {}
+    
+    def update_template(self, Template):
+        with self.lock:
+            if Template['TemplateName'] not in self.templates:
+                raise client_error('TemplateDoesNotExist', 'UpdateTemplate')
+            self.templates[Template['TemplateName']] = Template
+        return {}
+    
+    def send_bulk_templated_email(self, Source, Template, Destinations, **kwargs):
+        if Template not in self.templates:
+            raise client_error('TemplateDoesNotExist', 'SendBulkTemplatedEmail')
+        subject = self.templates[Template]['SubjectPart']
+        return {'Status': [
+            {'Status': 'Success', 'MessageId': self.deliver(destination['Destination']['ToAddresses'], subject)}
+            for destination in Destinations
+        ]}
+
+# S3 --------------------------------------------------------------------------
+
+class LocalS3:
+    """Stand-in for the S3 client that maps each bucket onto a local directory"""
+    
+    def __init__(self, buckets):
+        self.buckets = {name: os.path.abspath(directory) for name, directory in buckets.items()}
+    
+    def path(self, bucket, key, operation):
+        root = self.buckets.get(bucket)
+        if root is None:
+            raise client_error('NoSuchBucket', operation)
+        path = os.path.normpath(os.path.join(root, key))
+        # Keys like "../secret" must not escape the bucket directory
+        if not path.startswith(root + os.sep):
+            raise client_error('AccessDenied', operation)
+        return path
+    
+    def get_object(self, Bucket, Key, **kwargs):
+        path = self.path(Bucket, Key, 'GetObject')
+        try:
+            stat = os.stat(path)
+            body = open(path, 'rb')
+        except (FileNotFoundError, IsADirectoryError):
+            raise client_error('NoSuchKey', 'GetObject')
+        return {
+            'Body': body,
+            'ContentLength': stat.st_size,
+            'ContentType': mimetypes.guess_type(Key)[0] or 'binary/octet-stream',
+            'ETag': f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            'LastModified': datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        }
+    
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        path = self.path(Bucket, Key, 'PutObject')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(Body if isinstance(Body, bytes) else Body.read())
+        return {}
+    
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, **kwargs):
+        self.put_object(Bucket, Key, Fileobj)
+    
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600, **kwargs):
+        return 'file://' + self.path(Params['Bucket'], Params['Key'], 'GetObject')
+
+# Lambda runtime --------------------------------------------------------------
+
+class LambdaContext:
+    """The parts of the Lambda context object the handlers use"""
+    
+    def __init__(self, function_name, timeout_ms=30000):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self.deadline = time.monotonic() + timeout_ms / 1000
+    
+    def get_remaining_time_in_millis(self):
+        return max(int((self.deadline - time.monotonic()) * 1000), 0)
+
+# Wiring ----------------------------------------------------------------------
+
+def contact_tables(contact_table, idempotency_table, rate_limit_table):
+    """Table schemas matching main.tf"""
+    
+    return {
+        contact_table: {
+            'key': 'id',
+            'indexes': {
+                'status-timestamp-index': ('status', 'timestamp'),
+                'time-bucket-index': ('timeBucket', 'timestamp')
+            }
+        },
+        idempotency_table: {'key': 'idempotencyKey'},
+        rate_limit_table: {'key': 'limitKey'}
+    }
+
+def install(backend, frontend=None, buckets=None, echo_email=False):
+    """
+    Point already-imported backend/frontend modules at fresh in-memory services.
+    
+    Table names come from the backend's environment (DYNAMODB_TABLE,
+    IDEMPOTENCY_TABLE, RATE_LIMIT_TABLE); buckets maps bucket names to
+    directories. Returns the stand-ins by client name.
+    """
+    
+    dynamodb = LocalDynamoDB(contact_tables(
+        os.environ.get('DYNAMODB_TABLE', 'contact-submissions'),
+        backend.IDEMPOTENCY_TABLE or 'idempotency-keys',
+        backend.RATE_LIMIT_TABLE or 'rate-limits'
+    ))
+    services = {
+        'dynamodb': dynamodb,
+        'dynamodb_scan': dynamodb,
+        'dynamodb_resource': LocalDynamoDBResource(dynamodb),
+        'ses': LocalSES(echo=echo_email),
+        's3': LocalS3(buckets or {})
+    }
+    with backend.aws_clients_lock:
+        backend.aws_clients.clear()
+        backend.aws_clients.update(services)
+    if frontend is not None:
+        frontend._s3_client = services['s3']
+    return services
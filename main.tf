@@ -39,6 +39,13 @@ resource "random_string" "resource_suffix" {
   upper   = false
 }
 
+# Shared secret CloudFront adds to every origin request; the backend only
+# trusts the viewer IP headers on requests that carry it
+resource "random_password" "origin_verify" {
+  length  = 32
+  special = false
+}
+
 resource "aws_s3_bucket_public_access_block" "static_assets" {
   bucket = aws_s3_bucket.static_assets.id
 
@@ -79,12 +86,52 @@ resource "aws_s3_bucket_website_configuration" "static_assets" {
   }
 }
 
+# Private bucket for contact submission exports too large to return inline;
+# the backend hands out short-lived pre-signed links to these objects
+resource "aws_s3_bucket" "exports" {
+  bucket = "${var.project_name}-exports-${random_string.bucket_suffix.result}"
+}
+
+resource "aws_s3_bucket_public_access_block" "exports" {
+  bucket = aws_s3_bucket.exports.id
+
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+resource "aws_s3_bucket_lifecycle_configuration" "exports" {
+  bucket = aws_s3_bucket.exports.id
+
+  rule {
+    id     = "expire-exports"
+    status = "Enabled"
+
+    filter {
+      prefix = "exports/"
+    }
+
+    expiration {
+      days = 1
+    }
+
+    abort_incomplete_multipart_upload {
+      days_after_initiation = 1
+    }
+  }
+}
+
 # DynamoDB table for storing contact form submissions
 resource "aws_dynamodb_table" "contact_submissions" {
   name           = "${var.project_name}-contact-submissions-${random_string.resource_suffix.result}"
   billing_mode   = "PAY_PER_REQUEST"
   hash_key       = "id"
 
+  # New submissions are picked up by the email worker Lambda
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   attribute {
     name = "id"
     type = "S"
@@ -95,9 +142,30 @@ resource "aws_dynamodb_table" "contact_submissions" {
     type = "S"
   }
 
+  attribute {
+    name = "status"
+    type = "S"
+  }
+
+  attribute {
+    name = "timeBucket"
+    type = "S"
+  }
+
+  # "Last N days" listings: write-sharded day buckets ("YYYY-MM-DD#shard"),
+  # newest first within each bucket
+  global_secondary_index {
+    name            = "time-bucket-index"
+    hash_key        = "timeBucket"
+    range_key       = "timestamp"
+    projection_type = "ALL"
+  }
+
+  # Newest-first admin listings per status
   global_secondary_index {
-    name            = "timestamp-index"
-    hash_key        = "timestamp"
+    name            = "status-timestamp-index"
+    hash_key        = "status"
+    range_key       = "timestamp"
     projection_type = "ALL"
   }
 
@@ -107,6 +175,50 @@ resource "aws_dynamodb_table" "contact_submissions" {
   }
 }
 
+# Idempotency records for POST /api/contact; expired keys are removed by TTL
+resource "aws_dynamodb_table" "idempotency_keys" {
+  name         = "${var.project_name}-idempotency-keys-${random_string.resource_suffix.result}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "idempotencyKey"
+
+  attribute {
+    name = "idempotencyKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Name        = "${var.project_name}-idempotency-keys"
+    Environment = var.environment
+  }
+}
+
+# Fixed-window request counters for per-client rate limiting of POST /api/contact
+resource "aws_dynamodb_table" "rate_limits" {
+  name         = "${var.project_name}-rate-limits-${random_string.resource_suffix.result}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "limitKey"
+
+  attribute {
+    name = "limitKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Name        = "${var.project_name}-rate-limits"
+    Environment = var.environment
+  }
+}
+
 # IAM role for Lambda functions
 resource "aws_iam_role" "lambda_role" {
   name = "${var.project_name}-lambda-role-${random_string.resource_suffix.result}"
@@ -152,10 +264,44 @@ resource "aws_iam_role_policy" "lambda_policy" {
         Action = [
           "dynamodb:PutItem",
           "dynamodb:GetItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:Query",
           "dynamodb:Scan"
         ]
-        Resource = aws_dynamodb_table.contact_submissions.arn
+        Resource = [
+          aws_dynamodb_table.contact_submissions.arn,
+          "${aws_dynamodb_table.contact_submissions.arn}/index/*"
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:GetItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem"
+        ]
+        Resource = [
+          aws_dynamodb_table.idempotency_keys.arn,
+          aws_dynamodb_table.rate_limits.arn
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Resource = aws_dynamodb_table.contact_submissions.stream_arn
+      },
+      {
+        # On-failure destination of the email worker's stream mapping
+        Effect   = "Allow"
+        Action   = ["sqs:SendMessage"]
+        Resource = aws_sqs_queue.email_worker_failures.arn
       },
       {
         Effect = "Allow"
@@ -165,11 +311,29 @@ resource "aws_iam_role_policy" "lambda_policy" {
         ]
         Resource = "${aws_s3_bucket.static_assets.arn}/*"
       },
+      {
+        # Without it S3 reports a missing key as AccessDenied, not NoSuchKey
+        Effect   = "Allow"
+        Action   = ["s3:ListBucket"]
+        Resource = aws_s3_bucket.static_assets.arn
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:GetObject",
+          "s3:PutObject",
+          "s3:AbortMultipartUpload"
+        ]
+        Resource = "${aws_s3_bucket.exports.arn}/exports/*"
+      },
       {
         Effect = "Allow"
         Action = [
           "ses:SendEmail",
-          "ses:SendRawEmail"
+          "ses:SendRawEmail",
+          "ses:SendBulkTemplatedEmail",
+          "ses:CreateTemplate",
+          "ses:UpdateTemplate"
         ]
         Resource = "*"
       }
@@ -187,6 +351,25 @@ data "archive_file" "frontend_lambda_zip" {
     })
     filename = "lambda_function.py"
   }
+
+  source {
+    content  = file("${path.module}/lambda_functions/routing.py")
+    filename = "routing.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/metrics.py")
+    filename = "metrics.py"
+  }
+
+  # Compiled site from build_static.py (served instead of the inline copy when present)
+  dynamic "source" {
+    for_each = fileset("${path.module}/dist", "*")
+    content {
+      content  = file("${path.module}/dist/${source.value}")
+      filename = "dist/${source.value}"
+    }
+  }
 }
 
 data "archive_file" "backend_lambda_zip" {
@@ -198,6 +381,36 @@ data "archive_file" "backend_lambda_zip" {
     })
     filename = "lambda_function.py"
   }
+
+  source {
+    content  = file("${path.module}/lambda_functions/email_templates.py")
+    filename = "email_templates.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/item_json.py")
+    filename = "item_json.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/routing.py")
+    filename = "routing.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/metrics.py")
+    filename = "metrics.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/scan_engine.py")
+    filename = "scan_engine.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/validation.py")
+    filename = "validation.py"
+  }
 }
 
 # Frontend Lambda function
@@ -213,7 +426,8 @@ resource "aws_lambda_function" "frontend" {
 
   environment {
     variables = {
-      S3_BUCKET = aws_s3_bucket.static_assets.bucket
+      S3_BUCKET       = aws_s3_bucket.static_assets.bucket
+      METRICS_ENABLED = var.enable_request_metrics ? "true" : "false"
     }
   }
 
@@ -236,7 +450,14 @@ resource "aws_lambda_function" "backend" {
 
   environment {
     variables = {
-      DYNAMODB_TABLE = aws_dynamodb_table.contact_submissions.name
+      DYNAMODB_TABLE       = aws_dynamodb_table.contact_submissions.name
+      EMAIL_DISPATCH       = "stream"
+      IDEMPOTENCY_TABLE    = aws_dynamodb_table.idempotency_keys.name
+      RATE_LIMIT_TABLE     = aws_dynamodb_table.rate_limits.name
+      EXPORT_BUCKET        = aws_s3_bucket.exports.bucket
+      ADMIN_TOKEN_SHA256   = var.admin_api_token == "" ? "" : sha256(var.admin_api_token)
+      ORIGIN_VERIFY_SECRET = random_password.origin_verify.result
+      METRICS_ENABLED      = var.enable_request_metrics ? "true" : "false"
     }
   }
 
@@ -246,11 +467,155 @@ resource "aws_lambda_function" "backend" {
   }
 }
 
+# Email worker Lambda: sends submission emails from the table's stream,
+# keeping SES off the /api/contact request path
+resource "aws_lambda_function" "email_worker" {
+  filename         = data.archive_file.backend_lambda_zip.output_path
+  function_name    = "${var.project_name}-email-worker-${random_string.resource_suffix.result}"
+  role            = aws_iam_role.lambda_role.arn
+  handler         = "lambda_function.email_stream_handler"
+  runtime         = "python3.9"
+  timeout         = 30
+
+  source_code_hash = data.archive_file.backend_lambda_zip.output_base64sha256
+
+  environment {
+    variables = {
+      DYNAMODB_TABLE  = aws_dynamodb_table.contact_submissions.name
+      METRICS_ENABLED = var.enable_request_metrics ? "true" : "false"
+    }
+  }
+
+  tags = {
+    Name        = "${var.project_name}-email-worker"
+    Environment = var.environment
+  }
+}
+
+# Broadcast Lambda: bulk templated sends (e.g. daily appointment reminders),
+# invoked directly or on a schedule rather than through API Gateway
+resource "aws_lambda_function" "broadcast" {
+  filename         = data.archive_file.backend_lambda_zip.output_path
+  function_name    = "${var.project_name}-broadcast-${random_string.resource_suffix.result}"
+  role            = aws_iam_role.lambda_role.arn
+  handler         = "lambda_function.broadcast_handler"
+  runtime         = "python3.9"
+  timeout         = 300
+
+  source_code_hash = data.archive_file.backend_lambda_zip.output_base64sha256
+
+  environment {
+    variables = {
+      SES_MAX_SEND_RATE = "14"
+    }
+  }
+
+  tags = {
+    Name        = "${var.project_name}-broadcast"
+    Environment = var.environment
+  }
+}
+
+# Maintenance Lambda: bulk jobs over the contact table (backfills, status
+# migrations), run as parallel scans that hand back a checkpoint to resume from
+resource "aws_lambda_function" "maintenance" {
+  filename         = data.archive_file.backend_lambda_zip.output_path
+  function_name    = "${var.project_name}-maintenance-${random_string.resource_suffix.result}"
+  role            = aws_iam_role.lambda_role.arn
+  handler         = "lambda_function.maintenance_handler"
+  runtime         = "python3.9"
+  timeout         = 900
+  memory_size     = 512
+
+  source_code_hash = data.archive_file.backend_lambda_zip.output_base64sha256
+
+  environment {
+    variables = {
+      DYNAMODB_TABLE       = aws_dynamodb_table.contact_submissions.name
+      MAINTENANCE_SEGMENTS = "16"
+    }
+  }
+
+  tags = {
+    Name        = "${var.project_name}-maintenance"
+    Environment = var.environment
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "email_worker" {
+  event_source_arn        = aws_dynamodb_table.contact_submissions.stream_arn
+  function_name           = aws_lambda_function.email_worker.arn
+  starting_position       = "LATEST"
+  batch_size              = 10
+  maximum_retry_attempts  = 3
+  function_response_types = ["ReportBatchItemFailures"]
+
+  # Records still failing after the retries are recorded here instead of
+  # being dropped silently
+  destination_config {
+    on_failure {
+      destination_arn = aws_sqs_queue.email_worker_failures.arn
+    }
+  }
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ eventName = ["INSERT"] })
+    }
+  }
+}
+
+# Failed stream batches: each message names the shard and sequence numbers of
+# records whose emails were never sent; kept for the queue's maximum 14 days
+resource "aws_sqs_queue" "email_worker_failures" {
+  name                      = "${var.project_name}-email-failures-${random_string.resource_suffix.result}"
+  message_retention_seconds = 1209600
+
+  tags = {
+    Name        = "${var.project_name}-email-failures"
+    Environment = var.environment
+  }
+}
+
+resource "aws_sns_topic" "alarms" {
+  name = "${var.project_name}-alarms-${random_string.resource_suffix.result}"
+}
+
+resource "aws_sns_topic_subscription" "alarms_email" {
+  count     = var.alarm_email == "" ? 0 : 1
+  topic_arn = aws_sns_topic.alarms.arn
+  protocol  = "email"
+  endpoint  = var.alarm_email
+}
+
+# Any message on the failure queue means a notification or confirmation
+# email was lost
+resource "aws_cloudwatch_metric_alarm" "email_worker_failures" {
+  alarm_name          = "${var.project_name}-email-failures-${random_string.resource_suffix.result}"
+  alarm_description   = "Contact submission emails failed after all stream retries; see the ${aws_sqs_queue.email_worker_failures.name} queue"
+  namespace           = "AWS/SQS"
+  metric_name         = "ApproximateNumberOfMessagesVisible"
+  statistic           = "Maximum"
+  period              = 300
+  evaluation_periods  = 1
+  threshold           = 0
+  comparison_operator = "GreaterThanThreshold"
+  treat_missing_data  = "notBreaching"
+  alarm_actions       = [aws_sns_topic.alarms.arn]
+
+  dimensions = {
+    QueueName = aws_sqs_queue.email_worker_failures.name
+  }
+}
+
 # API Gateway
 resource "aws_api_gateway_rest_api" "poli_notary_api" {
   name        = "${var.project_name}-api-${random_string.resource_suffix.result}"
   description = "API for Poli Notary website"
 
+  # Lets the frontend Lambda return pre-compressed (base64) bodies
+  binary_media_types = ["*/*"]
+
   endpoint_configuration {
     types = ["REGIONAL"]
   }
@@ -311,6 +676,128 @@ resource "aws_api_gateway_resource" "contact" {
   path_part   = "contact"
 }
 
+# Admin export; the backend checks the bearer token (var.admin_api_token)
+resource "aws_api_gateway_resource" "contact_export" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  parent_id   = aws_api_gateway_resource.contact.id
+  path_part   = "export"
+}
+
+resource "aws_api_gateway_method" "contact_export" {
+  rest_api_id   = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id   = aws_api_gateway_resource.contact_export.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "contact_export" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id = aws_api_gateway_resource.contact_export.id
+  http_method = aws_api_gateway_method.contact_export.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.backend.invoke_arn
+}
+
+# Admin bulk import from partner booking systems; the backend checks the
+# bearer token
+resource "aws_api_gateway_resource" "contact_import" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  parent_id   = aws_api_gateway_resource.contact.id
+  path_part   = "import"
+}
+
+resource "aws_api_gateway_method" "contact_import_post" {
+  rest_api_id   = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id   = aws_api_gateway_resource.contact_import.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "contact_import_options" {
+  rest_api_id   = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id   = aws_api_gateway_resource.contact_import.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "contact_import_post" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id = aws_api_gateway_resource.contact_import.id
+  http_method = aws_api_gateway_method.contact_import_post.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.backend.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "contact_import_options" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id = aws_api_gateway_resource.contact_import.id
+  http_method = aws_api_gateway_method.contact_import_options.http_method
+
+  type             = "MOCK"
+  content_handling = "CONVERT_TO_TEXT"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "contact_import_options" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id = aws_api_gateway_resource.contact_import.id
+  http_method = aws_api_gateway_method.contact_import_options.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "contact_import_options" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id = aws_api_gateway_resource.contact_import.id
+  http_method = aws_api_gateway_method.contact_import_options.http_method
+  status_code = aws_api_gateway_method_response.contact_import_options.status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'OPTIONS,POST'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+# Admin lookup of one submission; the backend checks the bearer token
+resource "aws_api_gateway_resource" "contact_submission" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  parent_id   = aws_api_gateway_resource.contact.id
+  path_part   = "{submission_id}"
+}
+
+resource "aws_api_gateway_method" "contact_submission" {
+  rest_api_id   = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id   = aws_api_gateway_resource.contact_submission.id
+  http_method   = "GET"
+  authorization = "NONE"
+
+  request_parameters = {
+    "method.request.path.submission_id" = true
+  }
+}
+
+resource "aws_api_gateway_integration" "contact_submission" {
+  rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
+  resource_id = aws_api_gateway_resource.contact_submission.id
+  http_method = aws_api_gateway_method.contact_submission.http_method
+
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = aws_lambda_function.backend.invoke_arn
+}
+
 resource "aws_api_gateway_method" "contact_post" {
   rest_api_id   = aws_api_gateway_rest_api.poli_notary_api.id
   resource_id   = aws_api_gateway_resource.contact.id
@@ -342,6 +829,9 @@ resource "aws_api_gateway_integration" "contact_options" {
   http_method = aws_api_gateway_method.contact_options.http_method
 
   type = "MOCK"
+  # binary_media_types = */* would otherwise pass the body through as
+  # binary and skip this template
+  content_handling = "CONVERT_TO_TEXT"
   request_templates = {
     "application/json" = "{\"statusCode\": 200}"
   }
@@ -367,7 +857,7 @@ resource "aws_api_gateway_integration_response" "contact_options" {
   status_code = aws_api_gateway_method_response.contact_options.status_code
 
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key'"
     "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS,POST,PUT'"
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
@@ -397,6 +887,11 @@ resource "aws_api_gateway_deployment" "poli_notary_deployment" {
     aws_api_gateway_integration.frontend_root,
     aws_api_gateway_integration.contact_post,
     aws_api_gateway_integration.contact_options,
+    aws_api_gateway_integration.contact_export,
+    aws_api_gateway_integration.contact_submission,
+    aws_api_gateway_integration.contact_import_post,
+    aws_api_gateway_integration.contact_import_options,
+    aws_api_gateway_integration_response.contact_import_options,
   ]
 
   rest_api_id = aws_api_gateway_rest_api.poli_notary_api.id
@@ -414,6 +909,11 @@ resource "aws_cloudfront_distribution" "poli_notary_cdn" {
     origin_id   = "APIGateway"
     origin_path = "/${var.environment}"
 
+    custom_header {
+      name  = "X-Origin-Verify"
+      value = random_password.origin_verify.result
+    }
+
     custom_origin_config {
       http_port              = 80
       https_port             = 443
@@ -444,7 +944,7 @@ resource "aws_cloudfront_distribution" "poli_notary_cdn" {
 
     forwarded_values {
       query_string = true
-      headers      = ["Origin", "Access-Control-Request-Headers", "Access-Control-Request-Method"]
+      headers      = ["Origin", "Access-Control-Request-Headers", "Access-Control-Request-Method", "Idempotency-Key", "Authorization"]
       cookies {
         forward = "none"
       }
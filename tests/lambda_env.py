@@ -0,0 +1,59 @@
+"""
+Shared setup for the tests of the Lambda code
+Imports backend and frontend with the environment main.tf gives them (emails
+queued in memory instead of sent) and points them at fresh in-memory AWS
+services from local_aws
+"""
+
+import hashlib
+import os
+import sys
+
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(SOURCE_DIR, 'lambda_functions')
+
+ADMIN_TOKEN = 'test-admin'
+ADMIN_HEADERS = {'Authorization': f"Bearer {ADMIN_TOKEN}"}
+
+ENVIRONMENT = {
+    'DYNAMODB_TABLE': 'contact-submissions',
+    'IDEMPOTENCY_TABLE': 'idempotency-keys',
+    'RATE_LIMIT_TABLE': 'rate-limits',
+    'EMAIL_DISPATCH': 'memory',
+    'S3_BUCKET': 'test-assets',
+    'ADMIN_TOKEN_SHA256': hashlib.sha256(ADMIN_TOKEN.encode('utf-8')).hexdigest()
+}
+
+for name, value in ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
+for path in (SOURCE_DIR, LAMBDA_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import backend
+import frontend
+import local_aws
+
+def reset(buckets=None):
+    """Fresh in-memory services and per-container state; returns the stand-ins by client name"""
+    
+    backend.local_rate_buckets.clear()
+    backend.local_email_queue.clear()
+    backend.synced_ses_templates.clear()
+    frontend.ASSET_CACHE.items.clear()
+    frontend.ASSET_CACHE.current_bytes = 0
+    frontend.ASSET_MISSES.items.clear()
+    return local_aws.install(backend, frontend, buckets=buckets)
+
+def api_event(method, path, headers=None, query=None, body=None, source_ip='203.0.113.10'):
+    """Build an API Gateway REST proxy event"""
+    
+    return {
+        'httpMethod': method,
+        'path': path,
+        'headers': dict(headers or {}),
+        'queryStringParameters': query,
+        'body': body,
+        'isBase64Encoded': False,
+        'requestContext': {'identity': {'sourceIp': source_ip}}
+    }
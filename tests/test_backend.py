@@ -0,0 +1,236 @@
+"""
+Tests for the backend's submission path (idempotency, rate limits) and the
+admin listings' fan-out, merge and pagination
+"""
+
+import base64
+import json
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from lambda_env import ADMIN_HEADERS, ENVIRONMENT, api_event, backend, reset
+
+CONTACT = {
+    'fullName': 'Ada Lovelace',
+    'email': 'ada@example.com',
+    'phone': '555-123-4567',
+    'serviceType': 'mobile'
+}
+
+def submit(body=None, key=None, source_ip='203.0.113.10'):
+    headers = {'Content-Type': 'application/json'}
+    if key:
+        headers['Idempotency-Key'] = key
+    event = api_event('POST', '/api/contact', headers, body=json.dumps(body or CONTACT), source_ip=source_ip)
+    return backend.lambda_handler(event, None)
+
+def page_token(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+class BackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.services = reset()
+        self.dynamodb = self.services['dynamodb']
+    
+    def stored(self, table):
+        return self.dynamodb.tables[ENVIRONMENT[table]].items
+
+class IdempotencyTest(BackendTestCase):
+    def test_retry_with_the_same_key_replays_the_first_response(self):
+        first = submit(key='retry-1')
+        second = submit(key='retry-1')
+        self.assertEqual(first['statusCode'], 200)
+        self.assertEqual(second['statusCode'], 200)
+        self.assertEqual(second['body'], first['body'])
+        self.assertEqual(second['headers'].get('Idempotent-Replayed'), 'true')
+        self.assertEqual(len(self.stored('DYNAMODB_TABLE')), 1)
+        self.assertEqual(len(backend.local_email_queue), 1)
+    
+    def test_identical_bodies_without_a_key_are_deduplicated(self):
+        submit()
+        self.assertEqual(submit()['headers'].get('Idempotent-Replayed'), 'true')
+        self.assertEqual(len(self.stored('DYNAMODB_TABLE')), 1)
+    
+    def test_claim_in_progress_is_409_until_its_lease_expires(self):
+        self.assertIsNone(backend.claim_idempotency_key('contact#key#busy'))
+        response = submit(key='busy')
+        self.assertEqual(response['statusCode'], 409)
+        self.assertLessEqual(int(response['headers']['Retry-After']), backend.IDEMPOTENCY_LEASE_SECONDS)
+        
+        record = self.stored('IDEMPOTENCY_TABLE')['contact#key#busy']
+        record['leaseExpiresAt'] = {'N': '0'}
+        self.assertEqual(submit(key='busy')['statusCode'], 200)
+    
+    def test_failed_completion_still_returns_200_and_keeps_the_claim(self):
+        with mock.patch.object(backend, 'complete_idempotency_key', side_effect=RuntimeError('throttled')):
+            response = submit(key='flaky')
+        self.assertEqual(response['statusCode'], 200)
+        self.assertIn('contact#key#flaky', self.stored('IDEMPOTENCY_TABLE'))
+        self.assertEqual(submit(key='flaky')['statusCode'], 409)
+        self.assertEqual(len(self.stored('DYNAMODB_TABLE')), 1)
+    
+    def test_failed_store_releases_the_key_for_a_retry(self):
+        with mock.patch.object(self.dynamodb, 'put_item', wraps=self.dynamodb.put_item) as put_item:
+            def fail_submissions(TableName, **kwargs):
+                if TableName == ENVIRONMENT['DYNAMODB_TABLE']:
+                    raise RuntimeError('unavailable')
+                return self.dynamodb.put_item.__wrapped__(TableName=TableName, **kwargs)
+            put_item.side_effect = fail_submissions
+            self.assertEqual(submit(key='retry-later')['statusCode'], 500)
+        self.assertNotIn('contact#key#retry-later', self.stored('IDEMPOTENCY_TABLE'))
+        self.assertEqual(submit(key='retry-later')['statusCode'], 200)
+
+class RateLimitTest(BackendTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(backend, 'RATE_LIMITS', (('ip', 3, 60), ('email', 100, 3600)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def distinct(self, index):
+        return {**CONTACT, 'additionalDetails': f"request {index}"}
+    
+    def test_limit_per_ip_within_a_window(self):
+        codes = [submit(self.distinct(index))['statusCode'] for index in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+        self.assertEqual(submit(self.distinct(9), source_ip='198.51.100.1')['statusCode'], 200)
+    
+    def test_retry_after_points_at_the_next_window(self):
+        with mock.patch.object(backend.time, 'time', return_value=1_000_070):
+            for index in range(3):
+                submit(self.distinct(index))
+            response = submit(self.distinct(3))
+        self.assertEqual(response['statusCode'], 429)
+        self.assertEqual(response['headers']['Retry-After'], '10')
+    
+    def test_counters_reset_in_the_next_window(self):
+        with mock.patch.object(backend.time, 'time', return_value=1_000_020):
+            for index in range(3):
+                submit(self.distinct(index))
+            self.assertEqual(submit(self.distinct(3))['statusCode'], 429)
+        # A new container, so only the shared fixed-window counters apply
+        backend.local_rate_buckets.clear()
+        with mock.patch.object(backend.time, 'time', return_value=1_000_080):
+            self.assertEqual(submit(self.distinct(4))['statusCode'], 200)
+    
+    def test_replays_do_not_count_against_the_limit(self):
+        submit(key='same')
+        codes = [submit(key='same')['statusCode'] for _ in range(5)]
+        self.assertEqual(codes, [200] * 5)
+        self.assertEqual(submit(self.distinct(1))['statusCode'], 200)
+    
+    def test_rate_limited_claims_are_released(self):
+        for index in range(3):
+            submit(self.distinct(index))
+        self.assertEqual(submit(self.distinct(3), key='later')['statusCode'], 429)
+        self.assertNotIn('contact#key#later', self.stored('IDEMPOTENCY_TABLE'))
+
+class RecentSubmissionsTest(BackendTestCase):
+    def setUp(self):
+        super().setUp()
+        now = datetime.utcnow()
+        self.timestamps = []
+        for index in range(60):
+            moment = now - timedelta(hours=index * 1.7)
+            item = backend.build_submission(
+                {**CONTACT, 'serviceType': 'business' if index % 4 == 0 else 'mobile'},
+                uuid.uuid4(), moment
+            )
+            self.dynamodb.put_item(TableName=ENVIRONMENT['DYNAMODB_TABLE'], Item=backend.to_attribute_values(item))
+            self.timestamps.append((item['timestamp'], item['serviceType']))
+        self.window_start = (now - timedelta(days=2)).strftime('%Y-%m-%d')
+    
+    def expected(self, service_type=None):
+        return sorted(
+            (timestamp for timestamp, kind in self.timestamps
+             if timestamp >= self.window_start and (service_type is None or kind == service_type)),
+            reverse=True
+        )
+    
+    def read_all(self, limit, service_type=None):
+        pages = []
+        cursor = None
+        while True:
+            items, cursor = backend.query_recent_submissions(
+                ENVIRONMENT['DYNAMODB_TABLE'], 3, limit, service_type, cursor
+            )
+            pages.append(items)
+            if cursor is None:
+                return pages
+            # Cursors travel through the page token between requests
+            cursor = backend.parse_recent_cursor(json.loads(json.dumps(cursor)))
+    
+    def test_merged_pages_are_newest_first_without_gaps_or_repeats(self):
+        for limit in (1, 4, 7, 100):
+            with self.subTest(limit=limit):
+                pages = self.read_all(limit)
+                self.assertTrue(all(len(page) == limit for page in pages[:-1]))
+                self.assertEqual([item['timestamp'] for page in pages for item in page], self.expected())
+    
+    def test_filtered_pages(self):
+        pages = self.read_all(3, 'business')
+        self.assertEqual([item['timestamp'] for page in pages for item in page], self.expected('business'))
+    
+    def test_cursor_validation(self):
+        _, cursor = backend.query_recent_submissions(ENVIRONMENT['DYNAMODB_TABLE'], 3, 2)
+        backend.parse_recent_cursor(cursor)
+        for broken in (
+            {**cursor, 'day': 'yesterday'},
+            {**cursor, 'offset': -1},
+            {**cursor, 'keys': cursor['keys'][:1]},
+            {**cursor, 'keys': [{'id': 'x'}] + cursor['keys'][1:]},
+            {**cursor, 'done': [backend.TIME_BUCKET_SHARDS]},
+            {'offset': 0}
+        ):
+            with self.subTest(broken=broken):
+                with self.assertRaises(ValueError):
+                    backend.parse_recent_cursor(broken)
+    
+    def test_listing_requires_admin_and_rejects_foreign_tokens(self):
+        listing = lambda headers, query: backend.lambda_handler(api_event('GET', '/api/contact', headers, query), None)
+        self.assertEqual(listing({}, {'days': '3'})['statusCode'], 401)
+        
+        response = listing(ADMIN_HEADERS, {'days': '3', 'limit': '5'})
+        body = json.loads(response['body'])
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(body['count'], 5)
+        self.assertEqual(listing(ADMIN_HEADERS, {'days': '3', 'nextToken': body['nextToken']})['statusCode'], 200)
+        
+        for token in (
+            page_token({'id': 'x'}),
+            page_token({'id': 'x', 'status': 'closed', 'timestamp': '2026-01-01T00:00:00'}),
+            page_token({'id': 'x', 'status': 'new', 'timestamp': 5}),
+            'not base64!'
+        ):
+            with self.subTest(token=token):
+                self.assertEqual(listing(ADMIN_HEADERS, {'nextToken': token})['statusCode'], 400)
+        self.assertEqual(listing(ADMIN_HEADERS, {'days': '3', 'nextToken': page_token({'id': 'x'})})['statusCode'], 400)
+
+class BroadcastTest(BackendTestCase):
+    def test_invalid_recipients_are_skipped_and_reported(self):
+        response = backend.broadcast_handler({
+            'template': 'reminder',
+            'recipients': [
+                {'email': 'ada@example.com', 'data': {'name': 'Ada'}},
+                {'email': 'ada@example'},
+                {'data': {}},
+                'grace@example.com',
+                {'email': 'grace@example.com'}
+            ]
+        }, None)
+        self.assertEqual(response['sent'], 2)
+        self.assertEqual(response['failed'], 0)
+        self.assertEqual([result['email'] for result in response['results']], ['ada@example.com', 'grace@example.com'])
+        self.assertEqual([entry['index'] for entry in response['invalid']], [1, 2, 3])
+        self.assertEqual(response['invalid'][0]['error'], 'Invalid email address')
+        self.assertEqual(len(self.services['ses'].outbox), 2)
+    
+    def test_nothing_is_sent_when_every_recipient_is_invalid(self):
+        response = backend.broadcast_handler({'recipients': [{'email': 'not an address'}]}, None)
+        self.assertEqual((response['sent'], response['failed'], len(response['invalid'])), (0, 0, 1))
+        self.assertEqual(len(self.services['ses'].outbox), 0)
+
+if __name__ == '__main__':
+    unittest.main()
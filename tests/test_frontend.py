@@ -0,0 +1,62 @@
+"""
+Tests for the frontend's conditional and range request handling
+"""
+
+import unittest
+from email.utils import formatdate
+
+from lambda_env import frontend
+
+ENTRY = {
+    'etags': frozenset(['"abc"', '"abc-gzip"']),
+    'last_modified': 1_700_000_000
+}
+
+def conditional(**headers):
+    return {'headers': {name.replace('_', '-'): value for name, value in headers.items()}}
+
+class ParseRangeTest(unittest.TestCase):
+    def test_no_or_unsupported_header_serves_everything(self):
+        for header in (None, '', 'items=0-1', 'bytes=0-1,5-6', 'bytes=a-b'):
+            with self.subTest(header=header):
+                self.assertIsNone(frontend.parse_range(header, 100))
+    
+    def test_closed_and_open_ranges(self):
+        self.assertEqual(frontend.parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(frontend.parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(frontend.parse_range('bytes=90-500', 100), (90, 99))
+    
+    def test_suffix_ranges(self):
+        self.assertEqual(frontend.parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(frontend.parse_range('bytes=-500', 100), (0, 99))
+        self.assertEqual(frontend.parse_range('bytes=-0', 100), 'unsatisfiable')
+    
+    def test_unsatisfiable_ranges(self):
+        self.assertEqual(frontend.parse_range('bytes=100-', 100), 'unsatisfiable')
+        self.assertEqual(frontend.parse_range('bytes=9-5', 100), 'unsatisfiable')
+
+class IsNotModifiedTest(unittest.TestCase):
+    def test_no_validators(self):
+        self.assertFalse(frontend.is_not_modified(conditional(), ENTRY))
+    
+    def test_if_none_match(self):
+        self.assertTrue(frontend.is_not_modified(conditional(If_None_Match='"abc"'), ENTRY))
+        self.assertTrue(frontend.is_not_modified(conditional(If_None_Match='"x", W/"abc-gzip"'), ENTRY))
+        self.assertTrue(frontend.is_not_modified(conditional(If_None_Match='*'), ENTRY))
+        self.assertFalse(frontend.is_not_modified(conditional(If_None_Match='"stale"'), ENTRY))
+    
+    def test_if_none_match_takes_precedence(self):
+        event = conditional(If_None_Match='"stale"', If_Modified_Since=formatdate(ENTRY['last_modified'] + 60, usegmt=True))
+        self.assertFalse(frontend.is_not_modified(event, ENTRY))
+    
+    def test_if_modified_since(self):
+        at = ENTRY['last_modified']
+        self.assertTrue(frontend.is_not_modified(conditional(If_Modified_Since=formatdate(at, usegmt=True)), ENTRY))
+        self.assertFalse(frontend.is_not_modified(conditional(If_Modified_Since=formatdate(at - 1, usegmt=True)), ENTRY))
+        self.assertFalse(frontend.is_not_modified(conditional(If_Modified_Since='yesterday'), ENTRY))
+    
+    def test_header_names_are_case_insensitive(self):
+        self.assertTrue(frontend.is_not_modified({'headers': {'if-none-match': '"abc"'}}, ENTRY))
+
+if __name__ == '__main__':
+    unittest.main()
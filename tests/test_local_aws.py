@@ -0,0 +1,247 @@
+"""
+Tests for the in-memory DynamoDB stand-in in local_aws.py
+These pin down the expression and paging behaviour the emulator and the
+benchmarks rely on, so a change to the parser cannot silently diverge from
+what DynamoDB does for the handlers' requests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+import local_aws
+
+def contact(submission_id, status, timestamp, service_type='mobile'):
+    """Build a contact submission in attribute-value form"""
+    
+    return {
+        'id': {'S': submission_id},
+        'status': {'S': status},
+        'timestamp': {'S': timestamp},
+        'timeBucket': {'S': timestamp[:10] + '#0'},
+        'serviceType': {'S': service_type}
+    }
+
+class LocalDynamoDBTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dynamodb = local_aws.LocalDynamoDB(local_aws.contact_tables('contacts', 'idempotency', 'rate-limits'))
+    
+    def assertConditionFails(self, call, **kwargs):
+        with self.assertRaises(ClientError) as raised:
+            call(**kwargs)
+        self.assertEqual(raised.exception.response['Error']['Code'], 'ConditionalCheckFailedException')
+
+class ConditionalPutTest(LocalDynamoDBTestCase):
+    def claim(self, key, now, lease_expires_at):
+        self.dynamodb.put_item(
+            TableName='idempotency',
+            Item={
+                'idempotencyKey': {'S': key},
+                'state': {'S': 'IN_PROGRESS'},
+                'expiresAt': {'N': str(now + 3600)},
+                'leaseExpiresAt': {'N': str(lease_expires_at)}
+            },
+            ConditionExpression=(
+                'attribute_not_exists(idempotencyKey) OR expiresAt < :now '
+                'OR (#state = :in_progress AND leaseExpiresAt < :now)'
+            ),
+            ExpressionAttributeNames={'#state': 'state'},
+            ExpressionAttributeValues={':now': {'N': str(now)}, ':in_progress': {'S': 'IN_PROGRESS'}}
+        )
+    
+    def test_attribute_not_exists_allows_only_the_first_write(self):
+        self.claim('key-1', now=1000, lease_expires_at=1030)
+        self.assertConditionFails(self.claim, key='key-1', now=1010, lease_expires_at=1040)
+        self.claim('key-2', now=1010, lease_expires_at=1040)
+    
+    def test_expired_lease_can_be_reclaimed(self):
+        self.claim('key-1', now=1000, lease_expires_at=1030)
+        self.claim('key-1', now=1031, lease_expires_at=1061)
+        item = self.dynamodb.get_item(TableName='idempotency', Key={'idempotencyKey': {'S': 'key-1'}})['Item']
+        self.assertEqual(item['leaseExpiresAt'], {'N': '1061'})
+    
+    def test_failed_condition_leaves_the_item_unchanged(self):
+        self.claim('key-1', now=1000, lease_expires_at=1030)
+        self.assertConditionFails(self.claim, key='key-1', now=1020, lease_expires_at=1050)
+        item = self.dynamodb.get_item(TableName='idempotency', Key={'idempotencyKey': {'S': 'key-1'}})['Item']
+        self.assertEqual(item['leaseExpiresAt'], {'N': '1030'})
+    
+    def test_not_and_comparison_operators(self):
+        self.dynamodb.put_item(TableName='contacts', Item=contact('a', 'new', '2026-01-01T00:00:00'))
+        condition = {
+            'TableName': 'contacts',
+            'Item': contact('a', 'contacted', '2026-01-01T00:00:00'),
+            'ConditionExpression': 'NOT #status <> :expected',
+            'ExpressionAttributeNames': {'#status': 'status'}
+        }
+        self.assertConditionFails(
+            self.dynamodb.put_item, **condition, ExpressionAttributeValues={':expected': {'S': 'closed'}}
+        )
+        self.dynamodb.put_item(**condition, ExpressionAttributeValues={':expected': {'S': 'new'}})
+
+class UpdateExpressionTest(LocalDynamoDBTestCase):
+    def hit(self, now):
+        return self.dynamodb.update_item(
+            TableName='rate-limits',
+            Key={'limitKey': {'S': 'ip#203.0.113.7'}},
+            UpdateExpression='ADD hits :one SET expiresAt = if_not_exists(expiresAt, :expires)',
+            ExpressionAttributeValues={':one': {'N': '1'}, ':expires': {'N': str(now + 60)}},
+            ReturnValues='UPDATED_NEW'
+        )['Attributes']
+    
+    def test_add_creates_then_increments_a_counter(self):
+        self.assertEqual(self.hit(1000)['hits'], {'N': '1'})
+        self.assertEqual(self.hit(1001)['hits'], {'N': '2'})
+        self.assertEqual(self.hit(1002)['hits'], {'N': '3'})
+    
+    def test_if_not_exists_keeps_the_first_value(self):
+        self.hit(1000)
+        self.assertEqual(self.hit(1030)['expiresAt'], {'N': '1060'})
+    
+    def test_add_to_a_set_and_remove(self):
+        key = {'limitKey': {'S': 'sets'}}
+        for members in (['a', 'b'], ['b', 'c']):
+            self.dynamodb.update_item(
+                TableName='rate-limits', Key=key,
+                UpdateExpression='ADD tags :tags SET note = :note',
+                ExpressionAttributeValues={':tags': {'SS': members}, ':note': {'S': 'x'}}
+            )
+        item = self.dynamodb.update_item(
+            TableName='rate-limits', Key=key, UpdateExpression='REMOVE note', ReturnValues='ALL_NEW'
+        )['Attributes']
+        self.assertEqual(item, {'limitKey': {'S': 'sets'}, 'tags': {'SS': ['a', 'b', 'c']}})
+    
+    def test_set_arithmetic(self):
+        key = {'limitKey': {'S': 'arithmetic'}}
+        self.dynamodb.put_item(TableName='rate-limits', Item={**key, 'tokens': {'N': '10'}})
+        attributes = self.dynamodb.update_item(
+            TableName='rate-limits', Key=key,
+            UpdateExpression='SET tokens = tokens - :cost',
+            ConditionExpression='tokens >= :cost',
+            ExpressionAttributeValues={':cost': {'N': '4'}},
+            ReturnValues='ALL_NEW'
+        )['Attributes']
+        self.assertEqual(attributes['tokens'], {'N': '6'})
+
+class KeyConditionTest(LocalDynamoDBTestCase):
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 8):
+            self.dynamodb.put_item(TableName='contacts', Item=contact(f"new-{day}", 'new', f"2026-03-0{day}T12:00:00"))
+        self.dynamodb.put_item(TableName='contacts', Item=contact('done-3', 'done', '2026-03-03T12:00:00'))
+    
+    def query_ids(self, expression, values, **kwargs):
+        response = self.dynamodb.query(
+            TableName='contacts',
+            IndexName='status-timestamp-index',
+            KeyConditionExpression=expression,
+            ExpressionAttributeNames={'#status': 'status', '#timestamp': 'timestamp'},
+            ExpressionAttributeValues=values,
+            **kwargs
+        )
+        return [item['id']['S'] for item in response['Items']]
+    
+    def test_between_is_inclusive_and_limited_to_the_partition(self):
+        ids = self.query_ids(
+            '#status = :status AND #timestamp BETWEEN :from AND :to',
+            {
+                ':status': {'S': 'new'},
+                ':from': {'S': '2026-03-03T12:00:00'},
+                ':to': {'S': '2026-03-05T12:00:00'}
+            }
+        )
+        self.assertEqual(ids, ['new-3', 'new-4', 'new-5'])
+    
+    def test_scan_index_forward_false_returns_newest_first(self):
+        ids = self.query_ids(
+            '#status = :status AND #timestamp >= :from',
+            {':status': {'S': 'new'}, ':from': {'S': '2026-03-05'}},
+            ScanIndexForward=False
+        )
+        self.assertEqual(ids, ['new-7', 'new-6', 'new-5'])
+    
+    def test_begins_with(self):
+        ids = self.query_ids(
+            '#status = :status AND begins_with(#timestamp, :day)',
+            {':status': {'S': 'new'}, ':day': {'S': '2026-03-02'}}
+        )
+        self.assertEqual(ids, ['new-2'])
+    
+    def test_resource_client_builds_expressions_from_conditions(self):
+        client = local_aws.LocalDynamoDBResource(self.dynamodb).meta.client
+        response = client.query(
+            TableName='contacts',
+            IndexName='status-timestamp-index',
+            KeyConditionExpression=Key('status').eq('new') & Key('timestamp').between('2026-03-02', '2026-03-04'),
+            FilterExpression=Attr('serviceType').eq('mobile'),
+            ScanIndexForward=False
+        )
+        self.assertEqual([item['id'] for item in response['Items']], ['new-3', 'new-2'])
+
+class PagingTest(LocalDynamoDBTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(10):
+            service_type = 'office' if number % 3 == 0 else 'mobile'
+            self.dynamodb.put_item(
+                TableName='contacts',
+                Item=contact(f"id-{number}", 'new', f"2026-04-01T00:00:{number:02d}", service_type)
+            )
+    
+    def pages(self, **kwargs):
+        pages = []
+        start_key = None
+        while True:
+            if start_key:
+                kwargs['ExclusiveStartKey'] = start_key
+            response = self.dynamodb.query(
+                TableName='contacts',
+                IndexName='status-timestamp-index',
+                KeyConditionExpression='#status = :status',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':status': {'S': 'new'}, ':office': {'S': 'office'}},
+                ScanIndexForward=False,
+                **kwargs
+            )
+            pages.append(response)
+            start_key = response.get('LastEvaluatedKey')
+            if not start_key:
+                return pages
+    
+    def test_limit_and_exclusive_start_key_visit_every_item_once(self):
+        pages = self.pages(Limit=3)
+        ids = [item['id']['S'] for page in pages for item in page['Items']]
+        self.assertEqual([len(page['Items']) for page in pages], [3, 3, 3, 1])
+        self.assertEqual(ids, [f"id-{number}" for number in range(9, -1, -1)])
+    
+    def test_last_evaluated_key_carries_the_table_and_index_keys(self):
+        last_key = self.pages(Limit=4)[0]['LastEvaluatedKey']
+        self.assertEqual(last_key, {
+            'id': {'S': 'id-6'},
+            'status': {'S': 'new'},
+            'timestamp': {'S': '2026-04-01T00:00:06'}
+        })
+    
+    def test_filter_applies_after_the_limit(self):
+        pages = self.pages(Limit=4, FilterExpression='serviceType = :office')
+        self.assertEqual([page['ScannedCount'] for page in pages], [4, 4, 2])
+        self.assertEqual([page['Count'] for page in pages], [2, 1, 1])
+        self.assertEqual(
+            [item['id']['S'] for page in pages for item in page['Items']],
+            ['id-9', 'id-6', 'id-3', 'id-0']
+        )
+    
+    def test_parallel_scan_segments_partition_the_table(self):
+        seen = []
+        for segment in range(3):
+            response = self.dynamodb.scan(TableName='contacts', Segment=segment, TotalSegments=3)
+            seen.extend(item['id']['S'] for item in response['Items'])
+        self.assertEqual(sorted(seen), sorted(f"id-{number}" for number in range(10)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests for the route table shared by both Lambdas and the backend's 404/405 handling
+"""
+
+import json
+import unittest
+
+from lambda_env import api_event, backend, reset
+from routing import Router
+
+def handler(name):
+    def handle(event, cors_headers, **params):
+        return name
+    handle.__name__ = name
+    return handle
+
+class RouterTest(unittest.TestCase):
+    def setUp(self):
+        self.router = Router()
+        self.router.add('GET', '/api/contact', handler('list'))
+        self.router.add('POST', '/api/contact', handler('create'))
+        self.router.add('GET', '/api/contact/export', handler('export'))
+        self.router.add('GET', '/api/contact/{submission_id}', handler('get'))
+        self.router.add('DELETE', '/api/contact/{submission_id}', handler('delete'))
+        self.router.add('GET', '/assets/*', handler('asset'))
+    
+    def test_exact_paths_dispatch_by_method(self):
+        self.assertEqual(self.router.resolve('GET', '/api/contact').handler.__name__, 'list')
+        self.assertEqual(self.router.resolve('POST', '/api/contact').handler.__name__, 'create')
+    
+    def test_parameters_are_captured(self):
+        match = self.router.resolve('GET', '/api/contact/abc-123')
+        self.assertEqual(match.handler.__name__, 'get')
+        self.assertEqual(match.params, {'submission_id': 'abc-123'})
+    
+    def test_literal_segments_win_over_parameters(self):
+        match = self.router.resolve('GET', '/api/contact/export')
+        self.assertEqual(match.handler.__name__, 'export')
+        self.assertEqual(match.params, {})
+    
+    def test_wildcard_matches_any_depth(self):
+        self.assertEqual(self.router.resolve('GET', '/assets/images/a.jpg').handler.__name__, 'asset')
+        self.assertEqual(self.router.resolve('GET', '/assets/a.jpg').handler.__name__, 'asset')
+    
+    def test_unknown_path_has_nothing_allowed(self):
+        match = self.router.resolve('GET', '/api/unknown')
+        self.assertIsNone(match.handler)
+        self.assertEqual(match.allowed, ())
+        self.assertIsNone(self.router.resolve('GET', '/api/contact/a/b').handler)
+    
+    def test_wrong_method_reports_the_allowed_ones(self):
+        match = self.router.resolve('PUT', '/api/contact/abc')
+        self.assertIsNone(match.handler)
+        self.assertEqual(match.allowed, ('DELETE', 'GET'))
+        self.assertEqual(match.params, {})
+    
+    def test_head_falls_back_to_get(self):
+        self.assertEqual(self.router.resolve('HEAD', '/api/contact/abc').handler.__name__, 'get')
+        self.assertEqual(self.router.resolve('HEAD', '/assets/a.jpg').handler.__name__, 'asset')
+    
+    def test_head_without_a_get_route_is_not_allowed(self):
+        self.router.add('POST', '/api/contact/import', handler('import'))
+        match = self.router.resolve('HEAD', '/api/contact/import')
+        self.assertIsNone(match.handler)
+        self.assertEqual(match.allowed, ('POST',))
+    
+    def test_invalid_patterns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.router.add('GET', '/assets/*/thumb', handler('thumb'))
+        with self.assertRaises(ValueError):
+            self.router.add('GET', '/api/contact/{id}/notes', handler('notes'))
+
+class BackendDispatchTest(unittest.TestCase):
+    def setUp(self):
+        reset()
+    
+    def test_wrong_method_is_405_with_allow(self):
+        response = backend.lambda_handler(api_event('DELETE', '/api/contact'), None)
+        self.assertEqual(response['statusCode'], 405)
+        self.assertEqual(response['headers']['Allow'], 'GET,POST')
+    
+    def test_unknown_path_is_404(self):
+        response = backend.lambda_handler(api_event('GET', '/api/nothing'), None)
+        self.assertEqual(response['statusCode'], 404)
+        self.assertEqual(json.loads(response['body']), {'error': 'Endpoint not found'})
+    
+    def test_options_is_answered_without_routing(self):
+        response = backend.lambda_handler(api_event('OPTIONS', '/api/nothing'), None)
+        self.assertEqual(response['statusCode'], 200)
+        self.assertIn('Access-Control-Allow-Headers', response['headers'])
+
+if __name__ == '__main__':
+    unittest.main()
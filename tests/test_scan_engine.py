@@ -0,0 +1,107 @@
+"""
+Tests for the checkpointed parallel scan used by the maintenance jobs
+"""
+
+import threading
+import time
+import unittest
+
+from botocore.exceptions import ClientError
+
+from lambda_env import local_aws
+import scan_engine
+
+def table_with(count):
+    dynamodb = local_aws.LocalDynamoDB({'items': {'key': 'id'}})
+    for index in range(count):
+        dynamodb.put_item(TableName='items', Item={'id': {'S': f"item-{index}"}})
+    return dynamodb
+
+class Collector:
+    """A thread-safe process() callback recording every item by segment"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seen = []
+        self.segments = set()
+    
+    def __call__(self, items, segment):
+        with self.lock:
+            self.seen.extend(item['id']['S'] for item in items)
+            self.segments.add(segment)
+
+class ParallelScanTest(unittest.TestCase):
+    def test_every_item_is_processed_once(self):
+        collect = Collector()
+        checkpoint = scan_engine.parallel_scan(
+            table_with(50), 'items', collect, total_segments=4, scan_kwargs={'Limit': 3}
+        )
+        self.assertEqual(sorted(collect.seen), sorted(f"item-{index}" for index in range(50)))
+        self.assertTrue(scan_engine.scan_complete(checkpoint))
+        self.assertEqual(scan_engine.scanned_count(checkpoint), 50)
+        self.assertEqual(collect.segments, {0, 1, 2, 3})
+    
+    def test_deadline_stops_the_scan_and_the_checkpoint_resumes_it(self):
+        dynamodb = table_with(30)
+        first = Collector()
+        checkpoints = []
+        checkpoint = scan_engine.parallel_scan(
+            dynamodb, 'items', first, total_segments=3, scan_kwargs={'Limit': 2},
+            deadline=time.monotonic() - 1, on_checkpoint=checkpoints.append
+        )
+        self.assertEqual(first.seen, [])
+        self.assertFalse(scan_engine.scan_complete(checkpoint))
+        self.assertEqual(checkpoints[-1], checkpoint)
+        
+        # Finish one segment, then resume the rest from the saved checkpoint
+        checkpoint['segments'][0]['done'] = True
+        second = Collector()
+        checkpoint = scan_engine.parallel_scan(dynamodb, 'items', second, scan_kwargs={'Limit': 2}, checkpoint=checkpoint)
+        self.assertTrue(scan_engine.scan_complete(checkpoint))
+        self.assertNotIn(0, second.segments)
+        self.assertEqual(len(second.seen), len(set(second.seen)))
+    
+    def test_throttled_pages_are_retried_with_backoff(self):
+        dynamodb = table_with(10)
+        real_scan = dynamodb.scan
+        failures = {'remaining': 3}
+        
+        def flaky_scan(**kwargs):
+            if failures['remaining']:
+                failures['remaining'] -= 1
+                raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'Scan')
+            return real_scan(**kwargs)
+        
+        dynamodb.scan = flaky_scan
+        sleeps = []
+        backoff = scan_engine.AdaptiveBackoff(base=0.01, sleep=sleeps.append)
+        collect = Collector()
+        checkpoint = scan_engine.parallel_scan(dynamodb, 'items', collect, total_segments=1, backoff=backoff)
+        self.assertTrue(scan_engine.scan_complete(checkpoint))
+        self.assertEqual(len(collect.seen), 10)
+        self.assertEqual(len(sleeps), 3)
+    
+    def test_other_errors_stop_the_scan_and_propagate(self):
+        dynamodb = table_with(10)
+        
+        def broken_scan(**kwargs):
+            raise ClientError({'Error': {'Code': 'AccessDeniedException'}}, 'Scan')
+        
+        dynamodb.scan = broken_scan
+        with self.assertRaises(ClientError):
+            scan_engine.parallel_scan(dynamodb, 'items', Collector(), total_segments=2)
+
+class AdaptiveBackoffTest(unittest.TestCase):
+    def test_delay_doubles_when_throttled_and_halves_back_to_zero(self):
+        backoff = scan_engine.AdaptiveBackoff(base=0.1, maximum=0.5)
+        delays = []
+        for _ in range(4):
+            backoff.throttled()
+            delays.append(backoff.delay)
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.5])
+        for expected in (0.25, 0.125, 0.0625, 0.0):
+            backoff.succeeded()
+            self.assertEqual(backoff.delay, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for the declarative request validation in lambda_functions/validation.py
+"""
+
+import unittest
+
+from lambda_env import backend
+from validation import Field, compile_schema, validate_contact, validate_import_record
+
+VALID_CONTACT = {
+    'fullName': 'Ada Lovelace',
+    'email': 'ada@example.com',
+    'phone': '+1 (555) 123-4567',
+    'serviceType': 'mobile'
+}
+
+class CompileSchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.validate = compile_schema({
+            'name': Field(required=True, max_length=5),
+            'code': Field(pattern=r'[A-Z]{3}', message='code must be three capitals'),
+            'size': Field(choices=('S', 'M', 'L'))
+        })
+    
+    def test_valid_body_has_no_errors(self):
+        self.assertEqual(self.validate({'name': 'Ada', 'code': 'ABC', 'size': 'M'}), {})
+    
+    def test_every_error_is_reported_in_declaration_order(self):
+        errors = self.validate({'name': 'Too long', 'code': 'abc', 'size': 'XL'})
+        self.assertEqual(list(errors), ['name', 'code', 'size'])
+        self.assertEqual(errors['name'], 'name must be at most 5 characters')
+        self.assertEqual(errors['code'], 'code must be three capitals')
+        self.assertEqual(errors['size'], 'Invalid size')
+    
+    def test_required_fields(self):
+        self.assertEqual(self.validate({}), {'name': 'Missing required field: name'})
+        self.assertEqual(self.validate({'name': '   '}), {'name': 'Missing required field: name'})
+    
+    def test_optional_fields_are_skipped_when_empty(self):
+        self.assertEqual(self.validate({'name': 'Ada', 'code': '', 'size': None}), {})
+    
+    def test_pattern_must_match_the_whole_value(self):
+        self.assertIn('code', self.validate({'name': 'Ada', 'code': 'ABCD'}))
+    
+    def test_non_strings_are_rejected(self):
+        self.assertEqual(self.validate({'name': 42}), {'name': 'name must be a string'})
+    
+    def test_body_must_be_an_object(self):
+        self.assertEqual(self.validate(['name']), {'body': 'Request body must be a JSON object'})
+
+class ContactFieldsTest(unittest.TestCase):
+    def test_valid_contact(self):
+        self.assertEqual(validate_contact(VALID_CONTACT), {})
+    
+    def test_invalid_contact_fields(self):
+        errors = validate_contact({
+            **VALID_CONTACT,
+            'email': 'ada@example',
+            'phone': '12-34',
+            'serviceType': 'courier',
+            'preferredDate': '18/10/2026'
+        })
+        self.assertEqual(set(errors), {'email', 'phone', 'serviceType', 'preferredDate'})
+
+class ImportTimestampTest(unittest.TestCase):
+    def timestamp_error(self, value):
+        return validate_import_record({**VALID_CONTACT, 'timestamp': value}).get('timestamp')
+    
+    def test_accepted_forms(self):
+        for value in (
+            '2026-10-18T10:00',
+            '2026-10-18T10:00:00',
+            '2026-10-18T10:00:00.123',
+            '2026-10-18T10:00:00.123456',
+            '2026-10-18T10:00:00Z',
+            '2026-10-18T10:00:00+05:30',
+            '2026-10-18T10:00:00-0200'
+        ):
+            with self.subTest(value=value):
+                self.assertIsNone(self.timestamp_error(value))
+    
+    def test_rejected_forms(self):
+        for value in ('2026-10-18', '2026-10-18 10:00', '2026-10-18T10:00:00.1234', '2026-10-18T10:00+5'):
+            with self.subTest(value=value):
+                self.assertIsNotNone(self.timestamp_error(value))
+    
+    def test_parse_import_timestamp_converts_to_naive_utc(self):
+        cases = {
+            '2026-10-18T10:00': '2026-10-18T10:00:00',
+            '2026-10-18T10:00:00Z': '2026-10-18T10:00:00',
+            '2026-10-18T10:00:00.123Z': '2026-10-18T10:00:00.123000',
+            '2026-10-18T10:00:00+05:30': '2026-10-18T04:30:00',
+            '2026-10-18T23:30:00-0200': '2026-10-19T01:30:00'
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                moment = backend.parse_import_timestamp(value)
+                self.assertIsNone(moment.tzinfo)
+                self.assertEqual(moment.isoformat(), expected)
+
+if __name__ == '__main__':
+    unittest.main()
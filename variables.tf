@@ -84,6 +84,25 @@ variable "enable_ses_email" {
   default     = false
 }
 
+variable "admin_api_token" {
+  description = "Bearer token for the admin export/import endpoints (empty disables them); only its SHA-256 reaches the Lambda"
+  type        = string
+  default     = ""
+  sensitive   = true
+}
+
+variable "alarm_email" {
+  description = "Email address subscribed to operational alarms such as failed submission emails (empty for none)"
+  type        = string
+  default     = ""
+}
+
+variable "enable_request_metrics" {
+  description = "Log per-request phase timings from the Lambdas as CloudWatch Embedded Metric Format"
+  type        = bool
+  default     = true
+}
+
 variable "lambda_timeout" {
   description = "Timeout for Lambda functions in seconds"
   type        = number